@@ -0,0 +1,127 @@
+"""
+Benchmark del tiempo de arranque (importaciones) del proyecto usando `python -X importtime`.
+
+Ejecuta cada módulo en un proceso nuevo varias veces, toma la mediana del tiempo total de importación
+y de los módulos más costosos, y guarda el resultado en benchmarks/resultados/arranque.jsonl para
+comparar una ejecución con la anterior.
+
+Uso (desde la carpeta del proyecto):
+    python benchmarks/benchmark_arranque.py
+    python benchmarks/benchmark_arranque.py --modulos main database.consultas --repeticiones 10
+"""
+# Importaciones de la biblioteca estándar de Python
+import os
+import re
+import sys
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+CARPETA_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVO_RESULTADOS = os.path.join(CARPETA_PROYECTO, 'benchmarks', 'resultados', 'arranque.jsonl')
+
+# Formato de cada línea de -X importtime: "import time:   self [us] | cumulative | imported package"
+PATRON_IMPORTTIME = re.compile(r'^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)')
+
+
+def medir_importacion(modulo: str) -> dict:
+    """
+    Importa el módulo en un proceso nuevo con -X importtime y devuelve el tiempo acumulado por módulo (ms).
+
+    Solo se consideran los módulos importados por el módulo medido, no los que carga el intérprete al iniciar (site, encodings, etc.).
+    """
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=CARPETA_PROYECTO, capture_output=True, text=True,
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(f'No se pudo importar {modulo}:\n{resultado.stderr[-2000:]}')
+
+    lineas = resultado.stderr.splitlines()
+    # Las líneas del módulo medido terminan con la línea del propio módulo (nivel 0)
+    fin = max(i for i, linea in enumerate(lineas) if linea.rstrip().endswith(f'| {modulo}'))
+    # Retroceder mientras las líneas sean importaciones anidadas (sangría mayor a la del nivel 0)
+    inicio = fin
+    while inicio > 0:
+        coincidencia = PATRON_IMPORTTIME.match(lineas[inicio - 1])
+        if not coincidencia or len(coincidencia.group(3)) <= 1:
+            break
+        inicio -= 1
+
+    tiempos = {}
+    for linea in lineas[inicio:fin + 1]:
+        coincidencia = PATRON_IMPORTTIME.match(linea)
+        if coincidencia:
+            tiempos[coincidencia.group(4)] = int(coincidencia.group(2)) / 1000
+    return tiempos
+
+
+def ejecutar_benchmark(modulos: list, repeticiones: int, cantidad_top: int) -> dict:
+    """
+    Mide cada módulo varias veces y devuelve la mediana del tiempo total y de los módulos más costosos.
+    """
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'repeticiones': repeticiones,
+        'modulos': {},
+    }
+    for modulo in modulos:
+        mediciones = [medir_importacion(modulo) for _ in range(repeticiones)]
+        total = statistics.median(medicion[modulo] for medicion in mediciones)
+
+        nombres = set().union(*mediciones)
+        medianas = {nombre: statistics.median(medicion.get(nombre, 0) for medicion in mediciones) for nombre in nombres}
+        mas_costosos = sorted((item for item in medianas.items() if item[0] != modulo), key=lambda item: item[1], reverse=True)
+
+        resultado['modulos'][modulo] = {
+            'total_ms': round(total, 2),
+            'cantidad_modulos': len(nombres),
+            'mas_costosos': [[nombre, round(tiempo, 2)] for nombre, tiempo in mas_costosos[:cantidad_top]],
+        }
+    return resultado
+
+
+def leer_ultimo_resultado() -> dict:
+    if not os.path.exists(ARCHIVO_RESULTADOS):
+        return None
+    with open(ARCHIVO_RESULTADOS, 'r', encoding='utf-8') as archivo:
+        lineas = [linea for linea in archivo if linea.strip()]
+    return json.loads(lineas[-1]) if lineas else None
+
+
+def guardar_resultado(resultado: dict):
+    os.makedirs(os.path.dirname(ARCHIVO_RESULTADOS), exist_ok=True)
+    with open(ARCHIVO_RESULTADOS, 'a', encoding='utf-8') as archivo:
+        archivo.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+
+
+def imprimir_resultado(resultado: dict, anterior: dict = None):
+    for modulo, datos in resultado['modulos'].items():
+        comparacion = ''
+        if anterior and modulo in anterior.get('modulos', {}):
+            total_anterior = anterior['modulos'][modulo]['total_ms']
+            comparacion = f" (anterior {total_anterior:.1f} ms, diferencia {datos['total_ms'] - total_anterior:+.1f} ms)"
+        print(f"\nimport {modulo}: {datos['total_ms']:.1f} ms, {datos['cantidad_modulos']} módulos{comparacion}")
+        for nombre, tiempo in datos['mas_costosos']:
+            print(f"  {tiempo:>9.1f} ms  {nombre}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mide el tiempo de importación de los módulos del proyecto.')
+    parser.add_argument('--modulos', nargs='+', default=['main'], help='Módulos a importar (por defecto main)')
+    parser.add_argument('--repeticiones', type=int, default=5, help='Cantidad de procesos por módulo, se usa la mediana')
+    parser.add_argument('--top', type=int, default=15, help='Cantidad de módulos más costosos a mostrar')
+    parser.add_argument('--no-guardar', action='store_true', help='No agregar el resultado a benchmarks/resultados/arranque.jsonl')
+    argumentos = parser.parse_args()
+
+    anterior = leer_ultimo_resultado()
+    resultado = ejecutar_benchmark(argumentos.modulos, argumentos.repeticiones, argumentos.top)
+    imprimir_resultado(resultado, anterior)
+
+    if not argumentos.no_guardar:
+        guardar_resultado(resultado)
+        print(f'\nResultado guardado en {ARCHIVO_RESULTADOS}')
@@ -0,0 +1,352 @@
+"""
+Benchmark de la ruta base de datos -> DataFrame -> CSV/Parquet con SQLite como sustituto local de SQL Server.
+
+Genera tablas sintéticas en SQLite (se guardan en benchmarks/datos/ y se reutilizan) y mide para cada
+tamaño y cada forma de conexión:
+    - pyodbc: ejecutar_consulta_pyodbc con una conexión simulada cuyo cursor DB-API lee de SQLite.
+    - sqlalchemy: ejecutar_consulta con un engine de SQLAlchemy sobre el mismo archivo SQLite.
+
+Cada caso se ejecuta en un proceso nuevo para que el pico de memoria (RSS, medido con psutil) de
+un caso no afecte al siguiente. Se registran las filas por segundo y el pico de RSS de cada fase
+(consulta, CSV y Parquet) y el resultado se compara con la línea base guardada con --guardar-linea-base
+o, si no existe, con la ejecución anterior (benchmarks/resultados/bd.jsonl).
+
+Uso (desde la carpeta del proyecto):
+    python benchmarks/benchmark_bd.py
+    python benchmarks/benchmark_bd.py --filas 10k 1M 10M --rutas pyodbc
+    python benchmarks/benchmark_bd.py --guardar-linea-base
+    python benchmarks/benchmark_bd.py --tolerancia 0.1 --fallar-si-regresion
+"""
+# Importaciones de la biblioteca estándar de Python
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import multiprocessing
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+CARPETA_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CARPETA_DATOS = os.path.join(CARPETA_PROYECTO, 'benchmarks', 'datos')
+ARCHIVO_RESULTADOS = os.path.join(CARPETA_PROYECTO, 'benchmarks', 'resultados', 'bd.jsonl')
+ARCHIVO_LINEA_BASE = os.path.join(CARPETA_PROYECTO, 'benchmarks', 'resultados', 'bd_linea_base.json')
+sys.path.insert(0, CARPETA_PROYECTO)
+
+# Importaciones de terceros
+import psutil
+
+RUTAS = ('pyodbc', 'sqlalchemy')
+CONSULTA = 'SELECT id, sku, descripcion, bodega, cantidad, precio, fecha_actualizacion, activo FROM inventario'
+
+# Misma codificación que la exportación de main.py ('ansi' solo existe en Windows)
+CODIFICACION_CSV = 'ansi' if sys.platform == 'win32' else 'cp1252'
+
+
+def interpretar_filas(valor: str) -> int:
+    """
+    Convierte '10k', '1M' o '2500' en cantidad de filas.
+    """
+    multiplicadores = {'k': 1_000, 'm': 1_000_000}
+    sufijo = valor[-1].lower()
+    if sufijo in multiplicadores:
+        return int(float(valor[:-1]) * multiplicadores[sufijo])
+    return int(valor)
+
+
+def preparar_tabla(filas: int, carpeta: str = CARPETA_DATOS) -> str:
+    """
+    Crea (o reutiliza) un archivo SQLite con la tabla `inventario` de `filas` filas sintéticas y devuelve su ruta.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = os.path.join(carpeta, f'inventario_{filas}.sqlite')
+    if os.path.exists(ruta):
+        return ruta
+
+    aleatorio = random.Random(filas)
+    bodegas = [f'BOD{numero:02d}' for numero in range(20)]
+    fecha_inicial = datetime(2024, 1, 1)
+
+    def generar():
+        for numero in range(filas):
+            yield (
+                numero,
+                f'SKU-{numero:08d}',
+                f'Producto de prueba {numero % 5000} talla {aleatorio.choice("SMLX")}',
+                aleatorio.choice(bodegas),
+                aleatorio.randint(0, 500),
+                round(aleatorio.uniform(1, 1000), 2),
+                (fecha_inicial + timedelta(minutes=numero % 500000)).isoformat(sep=' '),
+                aleatorio.random() < 0.9,
+            )
+
+    # Se escribe en un archivo temporal para no dejar una tabla incompleta si se interrumpe la generación
+    ruta_temporal = ruta + '.tmp'
+    if os.path.exists(ruta_temporal):
+        os.remove(ruta_temporal)
+    conexion = sqlite3.connect(ruta_temporal)
+    try:
+        conexion.execute('PRAGMA journal_mode = OFF')
+        conexion.execute('PRAGMA synchronous = OFF')
+        conexion.execute(
+            'CREATE TABLE inventario (id INTEGER PRIMARY KEY, sku TEXT, descripcion TEXT, bodega TEXT, '
+            'cantidad INTEGER, precio REAL, fecha_actualizacion TEXT, activo INTEGER)'
+        )
+        conexion.executemany('INSERT INTO inventario VALUES (?, ?, ?, ?, ?, ?, ?, ?)', generar())
+        conexion.commit()
+    finally:
+        conexion.close()
+    os.replace(ruta_temporal, ruta)
+    return ruta
+
+
+class CursorPyodbcSimulado:
+    """
+    Cursor con la interfaz de pyodbc (execute, fetchall, fetchmany, description, close) que lee de SQLite.
+    """
+
+    def __init__(self, cursor_sqlite: sqlite3.Cursor):
+        self._cursor = cursor_sqlite
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, consulta: str, *parametros):
+        self._cursor.execute(consulta, *parametros)
+        return self
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, cantidad: int):
+        return self._cursor.fetchmany(cantidad)
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexionPyodbcSimulada:
+    """
+    Conexión con la interfaz de pyodbc.Connection para usar las funciones de database/consultas.py sin SQL Server.
+    """
+
+    def __init__(self, ruta_sqlite: str):
+        self._conexion = sqlite3.connect(ruta_sqlite)
+
+    def cursor(self) -> CursorPyodbcSimulado:
+        return CursorPyodbcSimulado(self._conexion.cursor())
+
+    def close(self):
+        self._conexion.close()
+
+
+class MedidorMemoria:
+    """
+    Mide el pico de RSS del proceso mientras se ejecuta un bloque, consultando psutil cada pocos milisegundos.
+    """
+
+    def __init__(self, intervalo: float = 0.005):
+        self.intervalo = intervalo
+        self.proceso = psutil.Process()
+        self.pico = 0
+        self._detener = threading.Event()
+
+    def _muestrear(self):
+        while not self._detener.wait(self.intervalo):
+            self.pico = max(self.pico, self.proceso.memory_info().rss)
+
+    def __enter__(self):
+        self.inicial = self.pico = self.proceso.memory_info().rss
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._detener.set()
+        self._hilo.join()
+        self.pico = max(self.pico, self.proceso.memory_info().rss)
+
+
+def medir_fase(funcion, filas: int) -> tuple:
+    with MedidorMemoria() as memoria:
+        inicio = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+    fase = {
+        'duracion_s': round(duracion, 4),
+        'filas_s': round(filas / duracion) if duracion else None,
+        'rss_pico_mb': round(memoria.pico / 2**20, 1),
+        'rss_incremento_mb': round((memoria.pico - memoria.inicial) / 2**20, 1),
+    }
+    return resultado, fase
+
+
+def medir_caso(ruta_sqlite: str, ruta: str, filas: int, carpeta_salida: str) -> dict:
+    """
+    Mide consulta -> DataFrame -> CSV -> Parquet para una ruta de conexión. Se ejecuta en un proceso nuevo.
+    """
+    # Importaciones propias, dentro del proceso del caso
+    from utils.logger import logger
+    from utils import eventos_ejecucion
+    from database.consultas import ejecutar_consulta, ejecutar_consulta_pyodbc
+
+    # Sin mensajes de info el logger no se configura, y los eventos de las consultas se escriben en la carpeta temporal
+    logger.setLevel(logging.WARNING)
+    eventos_ejecucion._registro_eventos = eventos_ejecucion.RegistroEventos(carpeta_salida)
+
+    if ruta == 'pyodbc':
+        conexion = ConexionPyodbcSimulada(ruta_sqlite)
+        consultar = lambda: ejecutar_consulta_pyodbc(conexion, CONSULTA)
+    else:
+        from sqlalchemy import create_engine
+        conexion = create_engine(f'sqlite:///{ruta_sqlite}')
+        consultar = lambda: ejecutar_consulta(conexion, CONSULTA)
+
+    try:
+        df, fase_consulta = medir_fase(consultar, filas)
+    finally:
+        if hasattr(conexion, 'dispose'):
+            conexion.dispose()
+        else:
+            conexion.close()
+    if df is None or len(df) != filas:
+        raise RuntimeError(f'La consulta por {ruta} devolvió {0 if df is None else len(df)} filas de {filas}.')
+
+    fases = {'consulta': fase_consulta}
+    ruta_csv = os.path.join(carpeta_salida, f'{ruta}_{filas}.csv')
+    _, fases['csv'] = medir_fase(lambda: df.to_csv(ruta_csv, index=False, sep='|', encoding=CODIFICACION_CSV), filas)
+    fases['csv']['bytes'] = os.path.getsize(ruta_csv)
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        ruta_parquet = os.path.join(carpeta_salida, f'{ruta}_{filas}.parquet')
+        _, fases['parquet'] = medir_fase(lambda: df.to_parquet(ruta_parquet, index=False), filas)
+        fases['parquet']['bytes'] = os.path.getsize(ruta_parquet)
+    return fases
+
+
+def ejecutar_benchmark(tamanos: list, rutas: list, carpeta_datos: str = CARPETA_DATOS) -> dict:
+    import pandas as pd
+
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'casos': {},
+    }
+    # 'spawn' en todas las plataformas, como en Windows, para que cada caso inicie con la memoria limpia
+    contexto = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory(prefix='benchmark_bd_') as carpeta_salida:
+        for filas in tamanos:
+            ruta_sqlite = preparar_tabla(filas, carpeta_datos)
+            for ruta in rutas:
+                with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as ejecutor:
+                    fases = ejecutor.submit(medir_caso, ruta_sqlite, ruta, filas, carpeta_salida).result()
+                resultado['casos'][f'{ruta}/{filas}'] = fases
+                imprimir_caso(f'{ruta}/{filas}', fases)
+    return resultado
+
+
+def leer_ultimo_resultado() -> dict:
+    if not os.path.exists(ARCHIVO_RESULTADOS):
+        return None
+    with open(ARCHIVO_RESULTADOS, 'r', encoding='utf-8') as archivo:
+        lineas = [linea for linea in archivo if linea.strip()]
+    return json.loads(lineas[-1]) if lineas else None
+
+
+def leer_linea_base() -> dict:
+    if not os.path.exists(ARCHIVO_LINEA_BASE):
+        return None
+    with open(ARCHIVO_LINEA_BASE, 'r', encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+def guardar_resultado(resultado: dict):
+    os.makedirs(os.path.dirname(ARCHIVO_RESULTADOS), exist_ok=True)
+    with open(ARCHIVO_RESULTADOS, 'a', encoding='utf-8') as archivo:
+        archivo.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+
+
+def guardar_linea_base(resultado: dict):
+    os.makedirs(os.path.dirname(ARCHIVO_LINEA_BASE), exist_ok=True)
+    with open(ARCHIVO_LINEA_BASE, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+
+
+def imprimir_caso(caso: str, fases: dict):
+    for nombre, fase in fases.items():
+        print(f"{caso:>22} {nombre:<9} {fase['duracion_s']:>8.3f}s {fase['filas_s']:>12,} filas/s "
+              f"RSS pico {fase['rss_pico_mb']:>8.1f} MB (+{fase['rss_incremento_mb']:.1f})")
+
+
+def comparar(resultado: dict, referencia: dict, tolerancia: float) -> list:
+    """
+    Compara filas/s y pico de RSS con la referencia y devuelve las regresiones mayores a la tolerancia.
+    """
+    regresiones = []
+    for caso, fases in resultado['casos'].items():
+        fases_referencia = referencia.get('casos', {}).get(caso)
+        if not fases_referencia:
+            continue
+        for nombre, fase in fases.items():
+            anterior = fases_referencia.get(nombre)
+            if not anterior or not anterior.get('filas_s') or not fase.get('filas_s'):
+                continue
+            cambio_velocidad = fase['filas_s'] / anterior['filas_s'] - 1
+            cambio_memoria = fase['rss_pico_mb'] / anterior['rss_pico_mb'] - 1
+            marca = ''
+            if cambio_velocidad < -tolerancia or cambio_memoria > tolerancia:
+                marca = '  <-- REGRESIÓN'
+                regresiones.append(f'{caso} {nombre}')
+            print(f"{caso:>22} {nombre:<9} filas/s {cambio_velocidad:+7.1%}  RSS pico {cambio_memoria:+7.1%}{marca}")
+    return regresiones
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mide consulta -> DataFrame -> CSV/Parquet con SQLite como sustituto de SQL Server.')
+    parser.add_argument('--filas', nargs='+', default=['10k', '1M'],
+                        help="Tamaños de las tablas sintéticas, por ejemplo 10k 1M 10M (10M requiere varios GB de memoria)")
+    parser.add_argument('--rutas', nargs='+', choices=RUTAS, default=list(RUTAS), help='Formas de conexión a medir')
+    parser.add_argument('--carpeta-datos', default=CARPETA_DATOS, help='Carpeta donde se generan y reutilizan las tablas SQLite')
+    parser.add_argument('--tolerancia', type=float, default=0.15,
+                        help='Variación máxima aceptada frente a la referencia (0.15 = 15%% menos filas/s o 15%% más RSS)')
+    parser.add_argument('--fallar-si-regresion', action='store_true', help='Terminar con código 1 si hay regresiones')
+    parser.add_argument('--guardar-linea-base', action='store_true', help=f'Guardar este resultado como línea base en {ARCHIVO_LINEA_BASE}')
+    parser.add_argument('--no-guardar', action='store_true', help='No agregar el resultado a benchmarks/resultados/bd.jsonl')
+    argumentos = parser.parse_args()
+
+    tamanos = [interpretar_filas(valor) for valor in argumentos.filas]
+    referencia, origen = leer_linea_base(), 'la línea base'
+    if referencia is None:
+        referencia, origen = leer_ultimo_resultado(), 'la ejecución anterior'
+
+    resultado = ejecutar_benchmark(tamanos, argumentos.rutas, argumentos.carpeta_datos)
+
+    regresiones = []
+    if referencia:
+        print(f"\nComparación con {origen} ({referencia['fecha']}):")
+        regresiones = comparar(resultado, referencia, argumentos.tolerancia)
+
+    if not argumentos.no_guardar:
+        guardar_resultado(resultado)
+        print(f'\nResultado guardado en {ARCHIVO_RESULTADOS}')
+    if argumentos.guardar_linea_base:
+        guardar_linea_base(resultado)
+        print(f'Línea base guardada en {ARCHIVO_LINEA_BASE}')
+
+    if regresiones and argumentos.fallar_si_regresion:
+        print(f"\n{len(regresiones)} regresiones: {', '.join(regresiones)}")
+        sys.exit(1)
@@ -0,0 +1,406 @@
+"""
+Benchmark de las integraciones HTTP (Shopify y VTEX) contra un servidor simulado local con aiohttp.
+
+El servidor se ejecuta en otro proceso y simula:
+    - Shopify: products.json con paginación por encabezado Link (page_info), inventory_levels/set.json,
+      el encabezado X-Shopify-Shop-Api-Call-Limit con una cubeta de 40 solicitudes que se vacía 2 por segundo
+      (429 al llenarse) y errores 429 inyectados al azar (--tasa-429).
+    - VTEX: la lista de órdenes con `paging` y el `balance` de inventario por SKU.
+Cada respuesta espera --latencia-ms para simular la red.
+
+Escenarios medidos con las funciones de external_services:
+    - shopify_productos: recorrido del catálogo con get_all_products_pages.
+    - shopify_inventario: actualización de inventario con put_inventory_levels (una solicitud por SKU).
+    - vtex_ordenes: recorrido de páginas con inicializa_endpoint.
+    - vtex_inventario: consulta de inventario por SKU con list_inventory_by_sku_async.
+
+De cada escenario se registran la duración total, las solicitudes por segundo, los 429 recibidos y
+las latencias p50/p95/p99 de las solicitudes (tomadas del registro de eventos de cada función).
+El resultado se guarda en benchmarks/resultados/http.jsonl y se compara con la ejecución anterior.
+
+Uso (desde la carpeta del proyecto):
+    python benchmarks/benchmark_http.py
+    python benchmarks/benchmark_http.py --escenarios shopify_productos vtex_inventario --latencia-ms 80
+    python benchmarks/benchmark_http.py --tasa-429 0.05 --inventario 50
+"""
+# Importaciones de la biblioteca estándar de Python
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import multiprocessing
+from datetime import datetime, timezone
+
+CARPETA_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVO_RESULTADOS = os.path.join(CARPETA_PROYECTO, 'benchmarks', 'resultados', 'http.jsonl')
+sys.path.insert(0, CARPETA_PROYECTO)
+
+# Importaciones de terceros
+from aiohttp import web
+
+ESCENARIOS = ('shopify_productos', 'shopify_inventario', 'vtex_ordenes', 'vtex_inventario')
+
+# Límite de la API REST de Shopify (plan estándar): cubeta de 40 solicitudes que se vacía 2 por segundo
+CAPACIDAD_CUBETA_SHOPIFY = 40
+FUGA_CUBETA_SHOPIFY = 2.0
+
+ID_BODEGA_VTEX = '1_1'
+
+
+# ------------------------------------------------------------------------------------------------
+# Servidor simulado
+# ------------------------------------------------------------------------------------------------
+
+def generar_productos(cantidad: int, semilla: int = 0) -> list:
+    aleatorio = random.Random(semilla)
+    productos = []
+    for numero_producto in range(cantidad):
+        productos.append({
+            'id': 7000000000 + numero_producto,
+            'title': f'Producto {numero_producto}',
+            'body_html': '<p>' + 'Descripción del producto. ' * 20 + '</p>',
+            'vendor': 'Proveedor',
+            'tags': 'tag1, tag2, tag3',
+            'variants': [
+                {
+                    'id': 40000000000 + numero_producto * 100 + numero_variante,
+                    'product_id': 7000000000 + numero_producto,
+                    'sku': f'SKU-{numero_producto}-{numero_variante}',
+                    'inventory_item_id': 42000000000 + numero_producto * 100 + numero_variante,
+                    'price': '10.00',
+                    'inventory_quantity': aleatorio.randint(0, 100),
+                }
+                for numero_variante in range(aleatorio.randint(1, 5))
+            ],
+            'images': [{'id': numero_producto, 'src': f'https://cdn.shopify.com/{numero_producto}.jpg'}],
+        })
+    return productos
+
+
+def crear_aplicacion(latencia_s: float, tasa_429: float, productos: int, ordenes: int, semilla: int = 0) -> web.Application:
+    """
+    Crea la aplicación aiohttp con los endpoints simulados de Shopify y VTEX.
+    """
+    aleatorio = random.Random(semilla)
+    catalogo = generar_productos(productos, semilla)
+    estado = {}
+
+    def reiniciar():
+        estado.update(solicitudes=0, errores_429=0, cubeta=0.0, ultima_fuga=time.monotonic())
+
+    reiniciar()
+
+    def respuesta_429(encabezados: dict = None):
+        return web.json_response(
+            {'errors': 'Exceeded 2 calls per second for api client. Reduce request rates to resume uninterrupted service.'},
+            status=429, headers={'Retry-After': '1.0', **(encabezados or {})},
+        )
+
+    @web.middleware
+    async def simular_red(request, handler):
+        if request.path.startswith('/_'):
+            return await handler(request)
+
+        estado['solicitudes'] += 1
+        await asyncio.sleep(latencia_s)
+
+        encabezados = {}
+        if request.path.startswith('/admin/'):
+            # Cubeta de Shopify: se vacía a FUGA_CUBETA_SHOPIFY solicitudes por segundo
+            ahora = time.monotonic()
+            estado['cubeta'] = max(0.0, estado['cubeta'] - (ahora - estado['ultima_fuga']) * FUGA_CUBETA_SHOPIFY)
+            estado['ultima_fuga'] = ahora
+            if estado['cubeta'] + 1 > CAPACIDAD_CUBETA_SHOPIFY:
+                estado['errores_429'] += 1
+                return respuesta_429({'X-Shopify-Shop-Api-Call-Limit': f'{CAPACIDAD_CUBETA_SHOPIFY}/{CAPACIDAD_CUBETA_SHOPIFY}'})
+            estado['cubeta'] += 1
+            encabezados['X-Shopify-Shop-Api-Call-Limit'] = f"{math.ceil(estado['cubeta'])}/{CAPACIDAD_CUBETA_SHOPIFY}"
+
+        if aleatorio.random() < tasa_429:
+            estado['errores_429'] += 1
+            return respuesta_429(encabezados)
+
+        respuesta = await handler(request)
+        respuesta.headers.update(encabezados)
+        return respuesta
+
+    async def listar_productos(request):
+        limite = min(int(request.query.get('limit', 50)), 250)
+        inicio = int(request.query.get('page_info', '0'), 16)
+        pagina = catalogo[inicio:inicio + limite]
+        if 'fields' in request.query:
+            campos = request.query['fields'].split(',')
+            pagina = [{campo: producto[campo] for campo in campos if campo in producto} for producto in pagina]
+
+        # Como en Shopify, los enlaces de page_info solo conservan el parámetro limit
+        enlaces = []
+        url_base = request.url.with_query(None)
+        if inicio > 0:
+            enlaces.append(f'<{url_base.with_query(limit=limite, page_info=format(max(inicio - limite, 0), "x"))}>; rel="previous"')
+        if inicio + limite < len(catalogo):
+            enlaces.append(f'<{url_base.with_query(limit=limite, page_info=format(inicio + limite, "x"))}>; rel="next"')
+        encabezados = {'Link': ', '.join(enlaces)} if enlaces else {}
+        return web.json_response({'products': pagina}, headers=encabezados)
+
+    async def actualizar_inventario(request):
+        datos = await request.json()
+        return web.json_response({'inventory_level': {
+            'inventory_item_id': datos['inventory_item_id'],
+            'location_id': datos['location_id'],
+            'available': datos['available'],
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+        }})
+
+    async def listar_ordenes(request):
+        por_pagina = int(request.query.get('per_page', 15))
+        pagina = int(request.query.get('page', 1))
+        paginas = max(math.ceil(ordenes / por_pagina), 1)
+        inicio = (pagina - 1) * por_pagina
+        lista = [
+            {'orderId': f'ORD-{numero:07d}', 'status': 'ready-for-handling', 'totalValue': 10000 + numero}
+            for numero in range(inicio, min(inicio + por_pagina, ordenes))
+        ]
+        return web.json_response({
+            'list': lista,
+            'paging': {'total': ordenes, 'pages': paginas, 'currentPage': pagina, 'perPage': por_pagina},
+        })
+
+    async def balance_sku(request):
+        sku = request.match_info['sku']
+        return web.json_response({'skuId': sku, 'balance': [
+            {'warehouseId': ID_BODEGA_VTEX, 'warehouseName': 'Principal', 'totalQuantity': len(sku) * 7,
+             'reservedQuantity': 0, 'hasUnlimitedQuantity': False},
+            {'warehouseId': '1_2', 'warehouseName': 'Secundaria', 'totalQuantity': 0,
+             'reservedQuantity': 0, 'hasUnlimitedQuantity': False},
+        ]})
+
+    async def estadisticas(request):
+        return web.json_response({'solicitudes': estado['solicitudes'], 'errores_429': estado['errores_429']})
+
+    async def reiniciar_estado(request):
+        reiniciar()
+        return web.json_response({})
+
+    aplicacion = web.Application(middlewares=[simular_red])
+    aplicacion.router.add_get('/admin/api/{version}/products.json', listar_productos)
+    aplicacion.router.add_post('/admin/api/{version}/inventory_levels/set.json', actualizar_inventario)
+    aplicacion.router.add_get('/api/oms/pvt/orders', listar_ordenes)
+    aplicacion.router.add_get('/api/logistics/pvt/inventory/skus/{sku}', balance_sku)
+    aplicacion.router.add_get('/_estadisticas', estadisticas)
+    aplicacion.router.add_post('/_reiniciar', reiniciar_estado)
+    return aplicacion
+
+
+def ejecutar_servidor(cola, latencia_s: float, tasa_429: float, productos: int, ordenes: int):
+    """
+    Inicia el servidor simulado en un puerto libre y envía la URL por la cola. Se ejecuta en otro proceso.
+    """
+    async def iniciar():
+        runner = web.AppRunner(crear_aplicacion(latencia_s, tasa_429, productos, ordenes), access_log=None)
+        await runner.setup()
+        sitio = web.TCPSite(runner, '127.0.0.1', 0)
+        await sitio.start()
+        host, puerto = runner.addresses[0][:2]
+        cola.put(f'http://{host}:{puerto}')
+        await asyncio.Event().wait()
+
+    asyncio.run(iniciar())
+
+
+# ------------------------------------------------------------------------------------------------
+# Escenarios
+# ------------------------------------------------------------------------------------------------
+
+ENCABEZADOS_SHOPIFY = {'X-Shopify-Access-Token': 'token-de-prueba', 'Content-Type': 'application/json'}
+
+
+def escenario_shopify_productos(url_servidor: str, argumentos) -> int:
+    from external_services.shopify_integration import get_all_products_pages, SHOPIFY_API_VERSION
+
+    productos = get_all_products_pages(f'{url_servidor}/admin/api/{SHOPIFY_API_VERSION}/products.json?limit=250', ENCABEZADOS_SHOPIFY)
+    return len(productos)
+
+
+def escenario_shopify_inventario(url_servidor: str, argumentos) -> int:
+    import pandas as pd
+    from external_services.shopify_integration import put_inventory_levels
+
+    actualizados = 0
+    for numero in range(argumentos.inventario):
+        producto = pd.Series({'inventory_item_id': 42000000000 + numero, 'CantidadDisponible': numero % 50, 'sku': f'SKU-{numero}'})
+        try:
+            put_inventory_levels(ENCABEZADOS_SHOPIFY, producto, location_id=1)
+            actualizados += 1
+        except Exception:
+            # Los 429 se cuentan en el servidor, se continúa con el siguiente SKU como en el proceso real
+            pass
+    return actualizados
+
+
+def escenario_vtex_ordenes(url_servidor: str, argumentos) -> int:
+    from external_services.vtex_integration import inicializa_endpoint
+
+    ordenes = inicializa_endpoint(f'{url_servidor}/api/oms/pvt/orders', {'per_page': 100}, 'app-key', 'app-token')
+    return len(ordenes)
+
+
+def escenario_vtex_inventario(url_servidor: str, argumentos) -> int:
+    import pandas as pd
+    from external_services.vtex_integration import list_inventory_by_sku_async
+
+    data_frame = pd.DataFrame({
+        'ApiCliente': [f'{url_servidor}/api/logistics/pvt/inventory/skus/{numero}' for numero in range(argumentos.skus)],
+        'warehouseId': ID_BODEGA_VTEX,
+        'AppKey': 'app-key',
+        'AppToken': 'app-token',
+    })
+    resultado = asyncio.run(list_inventory_by_sku_async(data_frame))
+    return int(pd.to_numeric(resultado['totalQuantity'], errors='coerce').notna().sum())
+
+
+def percentil(valores: list, porcentaje: int) -> float:
+    if len(valores) < 2:
+        return valores[0] if valores else None
+    return statistics.quantiles(valores, n=100, method='inclusive')[porcentaje - 1]
+
+
+def leer_latencias(carpeta: str) -> list:
+    """
+    Lee las duraciones de las solicitudes HTTP (api_pagina y api_actualizacion) del registro de eventos, en ms.
+    """
+    from utils.eventos_ejecucion import ETAPA_API_PAGINA, ETAPA_API_ACTUALIZACION
+
+    latencias = []
+    for nombre in os.listdir(carpeta):
+        with open(os.path.join(carpeta, nombre), 'r', encoding='utf-8') as archivo:
+            for linea in archivo:
+                evento = json.loads(linea)
+                if evento['etapa'] in (ETAPA_API_PAGINA, ETAPA_API_ACTUALIZACION):
+                    latencias.append(evento['duracion_s'] * 1000)
+    return latencias
+
+
+def medir_escenario(nombre: str, url_servidor: str, argumentos) -> dict:
+    import requests
+    from utils import eventos_ejecucion
+
+    requests.post(f'{url_servidor}/_reiniciar')
+    with tempfile.TemporaryDirectory(prefix=f'benchmark_http_{nombre}_') as carpeta_eventos:
+        # Cada escenario escribe sus eventos en una carpeta temporal para leer las latencias de sus solicitudes
+        eventos_ejecucion._registro_eventos = eventos_ejecucion.RegistroEventos(carpeta_eventos)
+        error = None
+        inicio = time.perf_counter()
+        try:
+            elementos = globals()[f'escenario_{nombre}'](url_servidor, argumentos)
+        except Exception as e:
+            # Un escenario interrumpido (por ejemplo el recorrido del catálogo con un 429) queda registrado como fallido
+            elementos, error = None, str(e)[:300]
+        duracion = time.perf_counter() - inicio
+        eventos_ejecucion._registro_eventos.cerrar()
+        latencias = leer_latencias(carpeta_eventos)
+
+    servidor = requests.get(f'{url_servidor}/_estadisticas').json()
+    return {
+        'elementos': elementos,
+        'error': error,
+        'duracion_s': round(duracion, 3),
+        'solicitudes': servidor['solicitudes'],
+        'solicitudes_s': round(servidor['solicitudes'] / duracion, 1),
+        'errores_429': servidor['errores_429'],
+        'latencia_p50_ms': round(percentil(latencias, 50), 1) if latencias else None,
+        'latencia_p95_ms': round(percentil(latencias, 95), 1) if latencias else None,
+        'latencia_p99_ms': round(percentil(latencias, 99), 1) if latencias else None,
+        'latencia_max_ms': round(max(latencias), 1) if latencias else None,
+    }
+
+
+def ejecutar_benchmark(argumentos) -> dict:
+    from external_services import shopify_integration
+
+    # 'spawn' en todas las plataformas, como en Windows; el servidor corre en otro proceso para no competir por el GIL
+    contexto = multiprocessing.get_context('spawn')
+    cola = contexto.Queue()
+    servidor = contexto.Process(
+        target=ejecutar_servidor, daemon=True,
+        args=(cola, argumentos.latencia_ms / 1000, argumentos.tasa_429, argumentos.productos, argumentos.ordenes),
+    )
+    servidor.start()
+    try:
+        url_servidor = cola.get(timeout=60)
+        # Las funciones de Shopify arman las URLs de inventario con obtener_base_url (la tienda del .env)
+        shopify_integration.obtener_base_url = lambda: f'{url_servidor}/admin/api/{shopify_integration.SHOPIFY_API_VERSION}'
+
+        resultado = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'latencia_ms': argumentos.latencia_ms,
+            'tasa_429': argumentos.tasa_429,
+            'escenarios': {},
+        }
+        for nombre in argumentos.escenarios:
+            resultado['escenarios'][nombre] = medir_escenario(nombre, url_servidor, argumentos)
+        return resultado
+    finally:
+        servidor.terminate()
+        servidor.join()
+
+
+def leer_ultimo_resultado() -> dict:
+    if not os.path.exists(ARCHIVO_RESULTADOS):
+        return None
+    with open(ARCHIVO_RESULTADOS, 'r', encoding='utf-8') as archivo:
+        lineas = [linea for linea in archivo if linea.strip()]
+    return json.loads(lineas[-1]) if lineas else None
+
+
+def guardar_resultado(resultado: dict):
+    os.makedirs(os.path.dirname(ARCHIVO_RESULTADOS), exist_ok=True)
+    with open(ARCHIVO_RESULTADOS, 'a', encoding='utf-8') as archivo:
+        archivo.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+
+
+def imprimir_resultado(resultado: dict, anterior: dict = None):
+    for nombre, datos in resultado['escenarios'].items():
+        comparacion = ''
+        if anterior and nombre in anterior.get('escenarios', {}):
+            previo = anterior['escenarios'][nombre]
+            comparacion = f" (anterior {previo['duracion_s']:.2f}s, p95 {previo['latencia_p95_ms']} ms)"
+        print(f"{nombre:>20}: {datos['elementos']} elementos en {datos['duracion_s']:.2f}s, "
+              f"{datos['solicitudes']} solicitudes ({datos['solicitudes_s']:.1f}/s), {datos['errores_429']} errores 429, "
+              f"latencia p50 {datos['latencia_p50_ms']} ms / p95 {datos['latencia_p95_ms']} ms / "
+              f"p99 {datos['latencia_p99_ms']} ms{comparacion}")
+        if datos['error']:
+            print(f"{'':>20}  interrumpido: {datos['error']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mide las integraciones de Shopify y VTEX contra un servidor simulado local.')
+    parser.add_argument('--escenarios', nargs='+', choices=ESCENARIOS, default=list(ESCENARIOS), help='Escenarios a medir')
+    parser.add_argument('--productos', type=int, default=5000, help='Productos del catálogo simulado de Shopify')
+    parser.add_argument('--inventario', type=int, default=20, help='Actualizaciones de inventario en Shopify')
+    parser.add_argument('--ordenes', type=int, default=2000, help='Órdenes de la lista simulada de VTEX')
+    parser.add_argument('--skus', type=int, default=500, help='SKUs consultados en el inventario de VTEX')
+    parser.add_argument('--latencia-ms', type=float, default=30, help='Latencia simulada de cada respuesta en milisegundos')
+    parser.add_argument('--tasa-429', type=float, default=0.0, help='Probabilidad de responder 429 a una solicitud (0 a 1)')
+    parser.add_argument('--no-guardar', action='store_true', help='No agregar el resultado a benchmarks/resultados/http.jsonl')
+    argumentos = parser.parse_args()
+
+    # Sin mensajes el logger no se configura ni escribe archivos durante la medición (los errores se cuentan en el servidor)
+    from utils.logger import logger
+    logger.setLevel(logging.CRITICAL)
+
+    anterior = leer_ultimo_resultado()
+    resultado = ejecutar_benchmark(argumentos)
+    imprimir_resultado(resultado, anterior)
+
+    if not argumentos.no_guardar:
+        guardar_resultado(resultado)
+        print(f'\nResultado guardado en {ARCHIVO_RESULTADOS}')
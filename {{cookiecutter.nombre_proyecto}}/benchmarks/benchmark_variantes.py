@@ -0,0 +1,140 @@
+"""
+Benchmark de utilidades.convert_list_to_data_frame: recorrido iterativo contra construcción por columnas.
+
+Genera catálogos sintéticos con la estructura de la API de Shopify (productos con sus variantes),
+mide cada método varias veces tomando la mediana y guarda el resultado en
+benchmarks/resultados/variantes.jsonl para comparar una ejecución con la anterior.
+
+Uso (desde la carpeta del proyecto):
+    python benchmarks/benchmark_variantes.py
+    python benchmarks/benchmark_variantes.py --catalogos 10000x20 50000x4 --repeticiones 5
+"""
+# Importaciones de la biblioteca estándar de Python
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import statistics
+from datetime import datetime
+
+CARPETA_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVO_RESULTADOS = os.path.join(CARPETA_PROYECTO, 'benchmarks', 'resultados', 'variantes.jsonl')
+sys.path.insert(0, CARPETA_PROYECTO)
+
+# Importaciones de terceros
+import pandas as pd
+
+# Importaciones propias
+from utils.logger import logger
+from utils.utilidades import convert_list_to_data_frame
+
+
+def generar_catalogo(cantidad_productos: int, variantes_por_producto: int, semilla: int = 0) -> list:
+    """
+    Genera una lista de productos como la que devuelve get_all_products_pages.
+
+    La cantidad de variantes de cada producto varía entre 1 y el doble del promedio indicado.
+    """
+    aleatorio = random.Random(semilla)
+    productos = []
+    for numero_producto in range(cantidad_productos):
+        cantidad_variantes = aleatorio.randint(1, max(2 * variantes_por_producto - 1, 1))
+        productos.append({
+            'id': 7000000000 + numero_producto,
+            'title': f'Producto {numero_producto}',
+            'variants': [
+                {
+                    'id': 40000000000 + numero_producto * 100 + numero_variante,
+                    'sku': f'SKU-{numero_producto}-{numero_variante}',
+                    'inventory_item_id': 42000000000 + numero_producto * 100 + numero_variante,
+                    'price': '10.00',
+                }
+                for numero_variante in range(cantidad_variantes)
+            ],
+        })
+    return productos
+
+
+def medir(funcion, repeticiones: int) -> float:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def ejecutar_benchmark(catalogos: list, repeticiones: int) -> dict:
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'repeticiones': repeticiones,
+        'catalogos': {},
+    }
+    for catalogo in catalogos:
+        cantidad_productos, variantes_por_producto = (int(valor) for valor in catalogo.split('x'))
+        productos = generar_catalogo(cantidad_productos, variantes_por_producto)
+
+        # Ambos métodos deben generar el mismo DataFrame
+        pd.testing.assert_frame_equal(
+            convert_list_to_data_frame(productos, vectorizado=True),
+            convert_list_to_data_frame(productos, vectorizado=False),
+        )
+
+        iterativo = medir(lambda: convert_list_to_data_frame(productos, vectorizado=False), repeticiones)
+        vectorizado = medir(lambda: convert_list_to_data_frame(productos, vectorizado=True), repeticiones)
+        resultado['catalogos'][catalogo] = {
+            'variantes': sum(len(producto['variants']) for producto in productos),
+            'iterativo_s': round(iterativo, 4),
+            'vectorizado_s': round(vectorizado, 4),
+            'aceleracion': round(iterativo / vectorizado, 2),
+        }
+    return resultado
+
+
+def leer_ultimo_resultado() -> dict:
+    if not os.path.exists(ARCHIVO_RESULTADOS):
+        return None
+    with open(ARCHIVO_RESULTADOS, 'r', encoding='utf-8') as archivo:
+        lineas = [linea for linea in archivo if linea.strip()]
+    return json.loads(lineas[-1]) if lineas else None
+
+
+def guardar_resultado(resultado: dict):
+    os.makedirs(os.path.dirname(ARCHIVO_RESULTADOS), exist_ok=True)
+    with open(ARCHIVO_RESULTADOS, 'a', encoding='utf-8') as archivo:
+        archivo.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+
+
+def imprimir_resultado(resultado: dict, anterior: dict = None):
+    for catalogo, datos in resultado['catalogos'].items():
+        comparacion = ''
+        if anterior and catalogo in anterior.get('catalogos', {}):
+            comparacion = f" (anterior {anterior['catalogos'][catalogo]['vectorizado_s']:.3f}s)"
+        print(f"{catalogo:>12} ({datos['variantes']} variantes): iterativo {datos['iterativo_s']:.3f}s, "
+              f"vectorizado {datos['vectorizado_s']:.3f}s{comparacion}, {datos['aceleracion']:.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compara los métodos de convert_list_to_data_frame con catálogos sintéticos.')
+    parser.add_argument('--catalogos', nargs='+', default=['1000x5', '10000x20', '50000x4'],
+                        help='Catálogos a generar en formato PRODUCTOSxVARIANTES_PROMEDIO')
+    parser.add_argument('--repeticiones', type=int, default=5, help='Cantidad de mediciones por método, se usa la mediana')
+    parser.add_argument('--no-guardar', action='store_true', help='No agregar el resultado a benchmarks/resultados/variantes.jsonl')
+    argumentos = parser.parse_args()
+
+    # Sin mensajes de info el logger no se configura ni escribe archivos durante la medición
+    logger.setLevel(logging.WARNING)
+
+    anterior = leer_ultimo_resultado()
+    resultado = ejecutar_benchmark(argumentos.catalogos, argumentos.repeticiones)
+    imprimir_resultado(resultado, anterior)
+
+    if not argumentos.no_guardar:
+        guardar_resultado(resultado)
+        print(f'\nResultado guardado en {ARCHIVO_RESULTADOS}')
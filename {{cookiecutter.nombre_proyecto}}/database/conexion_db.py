@@ -1,14 +1,19 @@
+# Imports de Python
+from typing import TYPE_CHECKING
+
 # Imports de terceros
-from sqlalchemy import create_engine, text, Engine
-from sqlalchemy.exc import OperationalError, InterfaceError, SQLAlchemyError
 import pyodbc
-from decouple import Config, UndefinedValueError, RepositoryEnv
+
+# SQLAlchemy se importa dentro de las funciones que lo usan para no cargarlo cuando la conexión es por pyodbc
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
 
 # Imports propios
 from utils.bcolors import bcolors
-import utils.utilidades as utilidades
-from utils.logger import logger_info, logger_debug, logger_error
+from utils.logger import logger
+from utils.perfilado import perfilar
 
+@perfilar
 def conectar_bd_pyodbc(usuario: str, contrasena: str, servidor: str, base_datos: str, instancia: str = None):
     """
     Conecta a una base de datos SQL Server.
@@ -31,10 +36,10 @@ def conectar_bd_pyodbc(usuario: str, contrasena: str, servidor: str, base_datos:
             return conexion_sql_server
         else:
             return None
-    except OperationalError as error:
+    except pyodbc.OperationalError as error:
         mensaje_error = f'Error al conectar a la base de datos: {error}'
         print(f"{bcolors.FAIL}{mensaje_error}{bcolors.RESET}")
-        logger_error.error(mensaje_error)
+        logger.error(mensaje_error)
         return None
 
 def _crear_conexion_pyodbc(usuario: str, contrasena: str, servidor: str, base_datos: str, instancia: str):
@@ -63,7 +68,7 @@ def _crear_conexion_pyodbc(usuario: str, contrasena: str, servidor: str, base_da
     except pyodbc.Error as error:
         mensaje_error = f'Error al conectar a la base de datos: {error}'
         print(f"{bcolors.FAIL}{mensaje_error}{bcolors.RESET}")
-        logger_error.error(mensaje_error)
+        logger.error(mensaje_error)
         return None
 
 def _verificar_conexion_pyodbc(connection):
@@ -82,13 +87,16 @@ def _verificar_conexion_pyodbc(connection):
         cursor.execute("SELECT 1")
         mensaje_log_conexion_bdd = f'Conexión exitosa a la base de datos.'
         # print(f"{bcolors.OK}{mensaje_log_conexion_bdd}{bcolors.RESET}")
-        logger_info.info(mensaje_log_conexion_bdd)
+        logger.info(mensaje_log_conexion_bdd)
     except pyodbc.Error as error:
         mensaje_error = f'Error al conectar a la base de datos: {error}'
         print(f"{bcolors.FAIL}{mensaje_error}{bcolors.RESET}")
-        logger_error.error(mensaje_error)
+        logger.error(mensaje_error)
 
+@perfilar
 def conectar_bd_sqlalchemy(usuario: str, contrasena: str, servidor: str, base_datos: str, instancia: str = None):
+    from sqlalchemy.exc import OperationalError
+    
     try:
         engine = _crear_conexion_sqlalchemy(usuario, contrasena, servidor, base_datos, instancia)
         if engine:
@@ -99,26 +107,31 @@ def conectar_bd_sqlalchemy(usuario: str, contrasena: str, servidor: str, base_da
     except OperationalError as error:
         mensaje_error = f'Error al conectar a la base de datos: {error}'
         print(f"{bcolors.FAIL}{mensaje_error}{bcolors.RESET}")
-        logger_error.error(mensaje_error)
+        logger.error(mensaje_error)
         return None
 
 def _crear_conexion_sqlalchemy(usuario: str, contrasena: str, servidor: str, base_datos: str, instancia: str):
+    from sqlalchemy import create_engine
+    
     if instancia:
         return create_engine(f"mssql+pyodbc://{usuario}:{contrasena}@{servidor}\\{instancia}/{base_datos}?driver=ODBC+Driver+17+for+SQL+Server")
     else:
         return create_engine(f"mssql+pyodbc://{usuario}:{contrasena}@{servidor}/{base_datos}?driver=ODBC+Driver+17+for+SQL+Server")
 
 
-def _verificar_conexion_sqlalchemy(engine: Engine):
+def _verificar_conexion_sqlalchemy(engine: 'Engine'):
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError, InterfaceError
+    
     try:
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
             
             # print(f"{bcolors.OK}Conexión exitosa a la base de datos.{bcolors.RESET}")
-            logger_info.info('Conexión exitosa a la base de datos')            
+            logger.info('Conexión exitosa a la base de datos')            
             
     except (OperationalError, InterfaceError) as error:
         mensaje_error = f'Error al conectar a la base de datos: {error}'
         print(f"{bcolors.FAIL}{mensaje_error}{bcolors.RESET}")
-        logger_error.error(mensaje_error)
+        logger.error(mensaje_error)
         raise
\ No newline at end of file
@@ -6,19 +6,22 @@ import datetime
 import time
 import json
 from datetime import datetime
+from typing import TYPE_CHECKING
 
 # Imports de terceros
 import pandas as pd
-from tqdm import tqdm
-from sqlalchemy import Engine, text, create_engine
-from sqlalchemy.orm import sessionmaker
 import pyodbc
 
+# SQLAlchemy se importa dentro de las funciones que lo usan para no cargarlo cuando la conexión es por pyodbc
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
 
 # Imports propios
 from utils.bcolors import bcolors
-import utils.utilidades as utilidades
-from utils.logger import logger_info, logger_debug, logger_error
+from utils.logger import logger
+from utils.eventos_ejecucion import obtener_registro_eventos, ETAPA_CONSULTA, ETAPA_FETCH
+from utils.perfilado import perfilar, tamano_data_frame
+from utils.tipos_datos import aplicar_esquema
 
 # ******ESTAS FUNCIONES SE UTILIZARÁN CUANDO LA CONEXIÓN A BASE DE DATOS SE REALICE POR MEDIO DE PYODBC*********
 
@@ -49,7 +52,7 @@ def consultar_registros_en_BDD(conexion_sql_server: pyodbc.Connection, parametro
             cursor.close()
             
             mensaje_log_ejecucion_bdd = f'Cantidad de registros obtenidos en {parametro} de la BDD de EDM: {df.shape[0]}'
-            logger_info.info(mensaje_log_ejecucion_bdd)
+            logger.info(mensaje_log_ejecucion_bdd)
             print(f'{bcolors.WARNING}{mensaje_log_ejecucion_bdd}{bcolors.RESET}')
             
             return df
@@ -57,20 +60,20 @@ def consultar_registros_en_BDD(conexion_sql_server: pyodbc.Connection, parametro
             # Si no hay resultados, retornar DataFrame vacío
             mensaje_error_pyodbc = f'El procedimiento almacenado no retornó ningún resultado: {e}'
             print(f'{bcolors.FAIL}{mensaje_error_pyodbc}{bcolors.RESET}')
-            logger_error.error(mensaje_error_pyodbc)
+            logger.error(mensaje_error_pyodbc)
             return pd.DataFrame()  # Retorna un DataFrame vacío en caso de error
     
     except pyodbc.Error as e:
         # Manejar error de pyobc
         mensaje_error_pyodbc = f'Error al ejecutar el procedimiento almacenado: {e}'
         print(f'{bcolors.FAIL}{mensaje_error_pyodbc}{bcolors.RESET}')
-        logger_error.error(mensaje_error_pyodbc)
+        logger.error(mensaje_error_pyodbc)
         return pd.DataFrame()  # Retorna un DataFrame vacío en caso de error
     except Exception as e:
         # Manejar otros tipos de errores
         mensaje_error_otro = f'Ocurrió un error: {e}'
         print(f'{bcolors.FAIL}{mensaje_error_otro}{bcolors.RESET}')
-        logger_error.error(mensaje_error_otro)
+        logger.error(mensaje_error_otro)
         return pd.DataFrame()  # Retorna un DataFrame vacío en caso de error
 
 def ejecutar_sp_consulta_sin_parametros_pyodbc(conexion_sql_server: pyodbc.Connection, nombre_procedimiento_almacenado: str) -> pd.DataFrame:
@@ -84,7 +87,7 @@ def ejecutar_sp_consulta_sin_parametros_pyodbc(conexion_sql_server: pyodbc.Conne
         if cursor.description is None:
             mensaje_error_pyodbc = 'El procedimiento almacenado no retornó ningún conjunto de resultados.'
             print(f'{bcolors.FAIL}{mensaje_error_pyodbc}{bcolors.RESET}')
-            logger_error.error(mensaje_error_pyodbc)
+            logger.error(mensaje_error_pyodbc)
         
         try:
             # Obtener los resultados y cargarlos en un DataFrame
@@ -97,7 +100,7 @@ def ejecutar_sp_consulta_sin_parametros_pyodbc(conexion_sql_server: pyodbc.Conne
             cursor.close()
             
             mensaje_log_ejecucion_bdd = f'Cantidad de registros obtenidos de la BDD de EDM: {df.shape[0]}'
-            logger_info.info(mensaje_log_ejecucion_bdd)
+            logger.info(mensaje_log_ejecucion_bdd)
             print(f'{bcolors.WARNING}{mensaje_log_ejecucion_bdd}{bcolors.RESET}')
             
             return df
@@ -105,20 +108,20 @@ def ejecutar_sp_consulta_sin_parametros_pyodbc(conexion_sql_server: pyodbc.Conne
             # Si no hay resultados, retornar DataFrame vacío
             mensaje_error_pyodbc = f'El procedimiento almacenado no retornó ningún resultado: {e}'
             print(f'{bcolors.FAIL}{mensaje_error_pyodbc}{bcolors.RESET}')
-            logger_error.error(mensaje_error_pyodbc)
+            logger.error(mensaje_error_pyodbc)
             return pd.DataFrame()  # Retorna un DataFrame vacío en caso de error
     
     except pyodbc.Error as e:
         # Manejar error de pyodbc
         mensaje_error_pyodbc = f'Error al ejecutar el procedimiento almacenado: {e}'
         print(f'{bcolors.FAIL}{mensaje_error_pyodbc}{bcolors.RESET}')
-        logger_error.error(mensaje_error_pyodbc)
+        logger.error(mensaje_error_pyodbc)
         return pd.DataFrame()  # Retorna un DataFrame vacío en caso de error
     except Exception as e:
         # Manejar otros tipos de errores
         mensaje_error_otro = f'Ocurrió un error: {e}'
         print(f'{bcolors.FAIL}{mensaje_error_otro}{bcolors.RESET}')
-        logger_error.error(mensaje_error_otro)
+        logger.error(mensaje_error_otro)
         return pd.DataFrame()  # Retorna un DataFrame vacío en caso de error
 
 def consultar_correos_notificaciones_en_BDD(conexion_sql_server: pyodbc.Connection) -> pd.DataFrame:
@@ -141,7 +144,7 @@ def consultar_correos_notificaciones_en_BDD(conexion_sql_server: pyodbc.Connecti
             cursor.close()
             
             mensaje_log_ejecucion_bdd = f'Cantidad de registros obtenidos en correos_notificaciones de la BDD de EDM: {df.shape[0]}'
-            logger_info.info(mensaje_log_ejecucion_bdd)
+            logger.info(mensaje_log_ejecucion_bdd)
             print(f'{bcolors.WARNING}{mensaje_log_ejecucion_bdd}{bcolors.RESET}')
             
             return df
@@ -149,36 +152,56 @@ def consultar_correos_notificaciones_en_BDD(conexion_sql_server: pyodbc.Connecti
             # Si no hay resultados, retornar DataFrame vacío
             mensaje_error_pyodbc = f'La consulta no retornó ningún resultado: {e}'
             print(f'{bcolors.FAIL}{mensaje_error_pyodbc}{bcolors.RESET}')
-            logger_error.error(mensaje_error_pyodbc)
+            logger.error(mensaje_error_pyodbc)
             raise
     
     except pyodbc.Error as e:
         # Manejar error de pyobc
         mensaje_error_pyodbc = f'Error al ejecutar la consulta de correos_notificaciones: {e}'
         print(f'{bcolors.FAIL}{mensaje_error_pyodbc}{bcolors.RESET}')
-        logger_error.error(mensaje_error_pyodbc)
+        logger.error(mensaje_error_pyodbc)
         raise
     except Exception as e:
         # Manejar otros tipos de errores
         mensaje_error_otro = f'Ocurrió un error: {e}'
         print(f'{bcolors.FAIL}{mensaje_error_otro}{bcolors.RESET}')
-        logger_error.error(mensaje_error_otro)
+        logger.error(mensaje_error_otro)
         raise
 
-def ejecutar_consulta_pyodbc(conexion_sql_server: pyodbc.Connection, consulta: str) -> pd.DataFrame:
+@perfilar(bytes_resultado=tamano_data_frame)
+def ejecutar_consulta_pyodbc(conexion_sql_server: pyodbc.Connection, consulta: str, esquema=None, nombre: str = 'consulta') -> pd.DataFrame:
+    """
+    Ejecuta una consulta y devuelve el resultado en un DataFrame.
+
+    Args:
+        conexion_sql_server (pyodbc.Connection): conexión a la base de datos
+        consulta (str): consulta SQL
+        esquema (dict o str, opcional): tipos de las columnas del resultado o 'auto' (ver utils/tipos_datos.py);
+            sin esquema se conservan los tipos que infiere pandas
+        nombre (str): nombre de la consulta en el reporte de memoria de los tipos
+
+    Returns:
+        DataFrame: resultado de la consulta
+    """
+    eventos = obtener_registro_eventos()
     try:
         # Llamar al procedimiento almacenado y obtener el resultado
         cursor = conexion_sql_server.cursor()
 
         # Consulta SQL
-        cursor.execute(consulta)
+        with eventos.medir(ETAPA_CONSULTA):
+            cursor.execute(consulta)
         
         try:
             # Obtener los resultados y cargarlos en un DataFrame
-            resultados = [tuple(row) for row in cursor.fetchall()]  # Desempaquetar las tuplas internas
-            columnas = [column[0] for column in cursor.description]
+            with eventos.medir(ETAPA_FETCH) as evento:
+                resultados = [tuple(row) for row in cursor.fetchall()]  # Desempaquetar las tuplas internas
+                columnas = [column[0] for column in cursor.description]
 
-            df = pd.DataFrame(resultados, columns=columnas)
+                df = pd.DataFrame(resultados, columns=columnas)
+                if esquema is not None:
+                    df = aplicar_esquema(df, esquema, nombre=nombre)
+                evento['filas'] = len(df)
 
             # Cerrar el cursor
             cursor.close()
@@ -188,24 +211,26 @@ def ejecutar_consulta_pyodbc(conexion_sql_server: pyodbc.Connection, consulta: s
             # Si no hay resultados, retornar DataFrame vacío
             mensaje_error_pyodbc = f'La consulta no retornó ningún resultado: {e}'
             print(f'{bcolors.FAIL}{mensaje_error_pyodbc}{bcolors.RESET}')
-            logger_error.error(mensaje_error_pyodbc)
+            logger.error(mensaje_error_pyodbc)
             raise
     
     except pyodbc.Error as e:
         # Manejar error de pyobc
         mensaje_error_pyodbc = f'Error al ejecutar la consulta de correos_notificaciones: {e}'
         print(f'{bcolors.FAIL}{mensaje_error_pyodbc}{bcolors.RESET}')
-        logger_error.error(mensaje_error_pyodbc)
+        logger.error(mensaje_error_pyodbc)
         raise
     except Exception as e:
         # Manejar otros tipos de errores
         mensaje_error_otro = f'Ocurrió un error: {e}'
         print(f'{bcolors.FAIL}{mensaje_error_otro}{bcolors.RESET}')
-        logger_error.error(mensaje_error_otro)
+        logger.error(mensaje_error_otro)
         raise
 
 # ******ESTAS FUNCIONES SE UTILIZARÁN CUANDO LA CONEXIÓN A BASE DE DATOS SE REALICE POR MEDIO DE SQL ALCHEMY*********
-def ejecutar_sp_consulta_sin_parametros(engine: Engine, nombre_sp: str):
+def ejecutar_sp_consulta_sin_parametros(engine: 'Engine', nombre_sp: str):
+    from sqlalchemy.orm import sessionmaker
+    
     try:
         Session = sessionmaker(bind=engine)
         session = Session()
@@ -216,7 +241,7 @@ def ejecutar_sp_consulta_sin_parametros(engine: Engine, nombre_sp: str):
         # # Ejecutar el procedimiento almacenado y cargar los resultados en un DataFrame
         resultados = pd.read_sql_query(llamada_sp, engine)
         
-        # logger_info.info(f'\t{len(resultados)} registros recuperados del procedimiento almacenado {nombre_sp}')
+        # logger.info(f'\t{len(resultados)} registros recuperados del procedimiento almacenado {nombre_sp}')
         
         return resultados
     except Exception as error:
@@ -225,38 +250,48 @@ def ejecutar_sp_consulta_sin_parametros(engine: Engine, nombre_sp: str):
         return None
     finally:
         session.close()
-        logger_info.info('Conexión finalizada a la base de datos')
+        logger.info('Conexión finalizada a la base de datos')
 
-def ejecutar_consulta(engine: Engine, consulta: str):
+@perfilar(bytes_resultado=tamano_data_frame)
+def ejecutar_consulta(engine: 'Engine', consulta: str, esquema=None, nombre: str = 'consulta'):
     """
     Ejecuta una consulta SQL en una base de datos utilizando el motor proporcionado.
 
     Args:
         engine (sqlalchemy.engine.Engine): Motor de SQLAlchemy para la conexión a la base de datos.
         consulta (str): Consulta SQL a ejecutar.
+        esquema (dict o str, opcional): Tipos de las columnas del resultado o 'auto' (ver utils/tipos_datos.py).
+        nombre (str): Nombre de la consulta en el reporte de memoria de los tipos.
 
     Returns:
         pandas.DataFrame or None: DataFrame de pandas que contiene los resultados de la consulta si la ejecución es exitosa, None si hay un error.
 
     """
+    from sqlalchemy import text
+    from sqlalchemy.orm import sessionmaker
+    
     try:
         Session = sessionmaker(bind=engine)
         session = Session()
 
         # resultados = session.execute(text(consulta)).fetchall()
-        resultados = pd.read_sql_query(text(consulta), engine)
+        with obtener_registro_eventos().medir(ETAPA_CONSULTA) as evento:
+            resultados = pd.read_sql_query(text(consulta), engine)
+            if esquema is not None:
+                resultados = aplicar_esquema(resultados, esquema, nombre=nombre)
+            evento['filas'] = len(resultados)
         return resultados
     except Exception as error:
         mensaje_error = f'Error al ejecutar la consulta: {error}'
         print(f"{bcolors.FAIL}{mensaje_error}{bcolors.RESET}")
-        logger_error.error(mensaje_error)
+        logger.error(mensaje_error)
         return None
     finally:
         session.close()
-        logger_info.info(f'{bcolors.WARNING}Conexión finalizada a la base de datos{bcolors.RESET}')
+        logger.info(f'{bcolors.WARNING}Conexión finalizada a la base de datos{bcolors.RESET}')
 
 
-def ejecutar_sp_consulta_con_parametros(engine: Engine, nombre_sp: str, parametros: dict):
+def ejecutar_sp_consulta_con_parametros(engine: 'Engine', nombre_sp: str, parametros: dict):
     """
     Ejecuta un procedimiento almacenado en una base de datos utilizando el motor proporcionado y los parámetros especificados.
 
@@ -269,6 +304,8 @@ def ejecutar_sp_consulta_con_parametros(engine: Engine, nombre_sp: str, parametr
         pandas.DataFrame or None: DataFrame de pandas que contiene los resultados de la ejecución del procedimiento almacenado si es exitosa, None si hay un error.
 
     """
+    from sqlalchemy.orm import sessionmaker
+    
     try:
         Session = sessionmaker(bind=engine)
         session = Session()
@@ -291,14 +328,14 @@ def ejecutar_sp_consulta_con_parametros(engine: Engine, nombre_sp: str, parametr
     except Exception as error:
         mensaje_error = f'Error al ejecutar el procedimiento almacenado "{nombre_sp}": {error}'
         print(f"{bcolors.FAIL}{mensaje_error}{bcolors.RESET}")
-        logger_error.error(mensaje_error)
+        logger.error(mensaje_error)
         return None
     finally:
         session.close()
-        logger_info.info('Conexión finalizada a la base de datos')
+        logger.info('Conexión finalizada a la base de datos')
 
 
-def ejecutar_sp_eliminar_duplicados(engine: Engine):
+def ejecutar_sp_eliminar_duplicados(engine: 'Engine'):
     """
     Ejecuta un procedimiento almacenado para eliminar registros duplicados en una tabla específica.
 
@@ -306,6 +343,9 @@ def ejecutar_sp_eliminar_duplicados(engine: Engine):
         engine (sqlalchemy.engine.Engine): Motor de SQLAlchemy para la conexión a la base de datos.
 
     """
+    from sqlalchemy import text
+    from sqlalchemy.orm import sessionmaker
+    
     try:
         Session = sessionmaker(bind=engine)
         session = Session()
@@ -324,10 +364,10 @@ def ejecutar_sp_eliminar_duplicados(engine: Engine):
     except Exception as error:
         mensaje_error = f'Error al ejecutar el procedimiento almacenado {llamada_sp}: Error: {error}'
         print(f"{bcolors.FAIL}{mensaje_error}{bcolors.RESET}")
-        logger_error.error(mensaje_error)
+        logger.error(mensaje_error)
     finally:
         session.close()
-        logger_info.info('Conexión finalizada a la base de datos')
+        logger.info('Conexión finalizada a la base de datos')
 
 
 def prueba_insertar_datos_con_parametros_con_valores_tabla(USUARIO_DB: str, CONTRASENA_DB: str, SERVIDOR_DB: str, INSTANCIA_DB: str, NOMBRE_DB: str):
@@ -354,6 +394,8 @@ def prueba_insertar_datos_con_parametros_con_valores_tabla(USUARIO_DB: str, CONT
     Python call sql-server stored procedure with table valued parameter
     https://copyprogramming.com/howto/execute-stored-procedure-with-table-valued-parameters-in-sql#how-to-use-table-valued-parameter-in-stored-procedure
     """
+    from sqlalchemy import text, create_engine
+    
     # Crear la cadena de conexión
     cadena_conexion = f"mssql+pyodbc://{USUARIO_DB}:{CONTRASENA_DB}@{SERVIDOR_DB}\\{INSTANCIA_DB}/{NOMBRE_DB}?driver=ODBC+Driver+17+for+SQL+Server"
 
@@ -392,7 +434,7 @@ def prueba_insertar_datos_con_parametros_con_valores_tabla(USUARIO_DB: str, CONT
         data = {"tvp": [(1, "foo"), (2, "bar"), (3, "navi")]}
         
         # Se construye la consulta SQL utilizando el nombre del procedimiento almacenado y el parámetro de la tabla de valor.
-        concatena_nombre_sp = f'{CALL {proc_name} (:tvp)}'
+        concatena_nombre_sp = '{CALL ' + proc_name + ' (:tvp)}'
         sql = f"{concatena_nombre_sp}"
         print('PRUEBA EJECUTAR')
         
@@ -429,7 +471,7 @@ def prueba_insertar_datos_con_parametros_con_valores_tabla(USUARIO_DB: str, CONT
         data_tvp = {"tvp": data_dos}
         
         # Se construye la consulta SQL utilizando el nombre del procedimiento almacenado y el parámetro de la tabla de valor.
-        concatena_nombre_sp = f'{CALL {proc_name_dos} (:tvp)}'
+        concatena_nombre_sp = '{CALL ' + proc_name_dos + ' (:tvp)}'
         sql = f"{concatena_nombre_sp}"
         
         # Se ejecuta la consulta SQL utilizando la conexión conn, pasando los datos a través del parámetro data_tvp.
@@ -451,6 +493,8 @@ def ejecutar_sp_insercion(nombre_sp:str, data_frame_errores: pd.DataFrame, caden
             data_frame_errores (pd.DataFrame): DataFrame que contiene los datos de errores a insertar en la base de datos.
 
     """
+    from sqlalchemy import text, create_engine
+    
     try:
         # Definir la conexión al motor de la base de datos
         engine = create_engine(cadena_conexion, echo=False)
@@ -461,7 +505,7 @@ def ejecutar_sp_insercion(nombre_sp:str, data_frame_errores: pd.DataFrame, caden
             # Convertir el DataFrame de errores a una lista de tuplas para los parámetros del procedimiento almacenado
             tupla_lista_errores = [tuple(row) for row in data_frame_errores.to_numpy()]
             dataos_parametros_con_valores_de_tabla = {"tvp": tupla_lista_errores}
-            concatena_nombre_sp = f'{CALL {nombre_sp} (:tvp)}'
+            concatena_nombre_sp = '{CALL ' + nombre_sp + ' (:tvp)}'
             sql = f"{concatena_nombre_sp}"
             
             # registros_invalidos = validar_dataframe(data_frame_errores, 'FechaTareaLogPrincipal')
@@ -485,4 +529,4 @@ def ejecutar_sp_insercion(nombre_sp:str, data_frame_errores: pd.DataFrame, caden
         # Mostrar un mensaje de error si ocurre algún problema durante la ejecución del procedimiento almacenado
         mensaje_error = f'Se ha producido un error al ejecutar el procedimiento almacenado {nombre_sp}: {str(error)}'
         print(f"{bcolors.FAIL}{mensaje_error}{bcolors.RESET}")
-        logger_error.error(mensaje_error)
+        logger.error(mensaje_error)
@@ -0,0 +1,147 @@
+# Imports de Python
+import asyncio
+import threading
+import functools
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+# Imports propios
+from utils.logger import logger
+
+# Cantidad de hilos (y de conexiones pyodbc) por defecto para las consultas asíncronas
+MAX_HILOS_BD = 4
+
+
+class BaseDatosAsync:
+    """
+    Fachada asíncrona sobre las funciones de database/consultas.py.
+
+    Las consultas se ejecutan en un ThreadPoolExecutor propio y acotado, de modo que las corrutinas
+    (por ejemplo las que consultan VTEX con aiohttp) pueden esperar la base de datos sin detener
+    el event loop ni las solicitudes HTTP en curso.
+
+    Una conexión pyodbc no se puede usar desde varios hilos al mismo tiempo, por eso cada hilo del
+    executor abre su propia conexión con `crear_conexion` la primera vez que la necesita. Un engine
+    de SQLAlchemy sí se puede compartir, ya que tiene su propio pool de conexiones.
+
+    Ejemplo:
+        async with BaseDatosAsync.desde_pyodbc(USUARIO_DB, CONTRASENA_DB, SERVIDOR_DB, NOMBRE_DB, INSTANCIA_DB) as bd:
+            df_productos, inventario = await asyncio.gather(
+                bd.ejecutar_consulta(GET_CONSULTA_1_DB),
+                list_inventory_by_sku_async(df_skus),
+            )
+    """
+
+    def __init__(self, crear_conexion: Callable, max_hilos: int = MAX_HILOS_BD, compartida: bool = False):
+        """
+        Args:
+            crear_conexion (Callable): Función sin argumentos que devuelve la conexión (o el engine) a usar.
+            max_hilos (int): Cantidad máxima de consultas ejecutándose al mismo tiempo.
+            compartida (bool): True si la misma conexión se puede usar desde todos los hilos (engine de SQLAlchemy).
+        """
+        self.crear_conexion = crear_conexion
+        self.max_hilos = max_hilos
+        self.compartida = compartida
+
+        self._executor = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix='bd_async')
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conexiones = []
+
+    @classmethod
+    def desde_pyodbc(cls, usuario: str, contrasena: str, servidor: str, base_datos: str, instancia: str = None,
+                     max_hilos: int = MAX_HILOS_BD) -> 'BaseDatosAsync':
+        """
+        Crea la fachada con una conexión pyodbc por hilo, usando conectar_bd_pyodbc.
+        """
+        from database.conexion_db import conectar_bd_pyodbc
+
+        def crear_conexion():
+            conexion = conectar_bd_pyodbc(usuario, contrasena, servidor, base_datos, instancia)
+            if conexion is None:
+                raise ConnectionError('No se pudo conectar a la base de datos.')
+            return conexion
+
+        return cls(crear_conexion, max_hilos)
+
+    @classmethod
+    def desde_engine(cls, engine, max_hilos: int = MAX_HILOS_BD) -> 'BaseDatosAsync':
+        """
+        Crea la fachada sobre un engine de SQLAlchemy ya creado (por ejemplo con conectar_bd_sqlalchemy).
+        """
+        return cls(lambda: engine, max_hilos, compartida=True)
+
+    async def ejecutar(self, funcion: Callable, *args, **kwargs):
+        """
+        Ejecuta en el executor una función que recibe la conexión como primer argumento.
+
+        Permite usar de forma asíncrona cualquier función de database/consultas.py, por ejemplo:
+            df = await bd.ejecutar(consultar_registros_en_BDD, 'cargos')
+        """
+        loop = asyncio.get_running_loop()
+        llamada = functools.partial(self._ejecutar_en_hilo, funcion, args, kwargs)
+        return await loop.run_in_executor(self._executor, llamada)
+
+    async def ejecutar_consulta(self, consulta: str, esquema=None, nombre: str = 'consulta'):
+        """
+        Ejecuta una consulta y devuelve un DataFrame, con ejecutar_consulta_pyodbc o ejecutar_consulta según la conexión.
+
+        Con `esquema` las columnas se convierten a los tipos indicados (ver utils/tipos_datos.py).
+        """
+        from database.consultas import ejecutar_consulta, ejecutar_consulta_pyodbc
+
+        funcion = ejecutar_consulta if self.compartida else ejecutar_consulta_pyodbc
+        return await self.ejecutar(funcion, consulta, esquema=esquema, nombre=nombre)
+
+    async def ejecutar_sp_insercion(self, nombre_sp: str, data_frame, cadena_conexion: str):
+        """
+        Versión asíncrona de ejecutar_sp_insercion (inserta un DataFrame con un parámetro de tipo tabla).
+        """
+        from database.consultas import ejecutar_sp_insercion
+
+        loop = asyncio.get_running_loop()
+        llamada = functools.partial(ejecutar_sp_insercion, nombre_sp, data_frame, cadena_conexion)
+        return await loop.run_in_executor(self._executor, llamada)
+
+    def cerrar(self):
+        """
+        Espera las consultas en curso y cierra las conexiones abiertas por los hilos.
+        """
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            conexiones, self._conexiones = self._conexiones, []
+        for conexion in conexiones:
+            try:
+                if hasattr(conexion, 'dispose'):
+                    conexion.dispose()
+                else:
+                    conexion.close()
+            except Exception as e:
+                logger.error(f'Error al cerrar una conexión de la base de datos: {e}')
+        logger.info('Conexiones asíncronas a la base de datos cerradas.')
+
+    async def __aenter__(self) -> 'BaseDatosAsync':
+        return self
+
+    async def __aexit__(self, *exc):
+        # El cierre espera a que terminen las consultas, se hace fuera del event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.cerrar)
+
+    def _obtener_conexion(self):
+        # Se ejecuta en el hilo del executor
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            if self.compartida:
+                with self._lock:
+                    if not self._conexiones:
+                        self._conexiones.append(self.crear_conexion())
+                    conexion = self._conexiones[0]
+            else:
+                conexion = self.crear_conexion()
+                with self._lock:
+                    self._conexiones.append(conexion)
+            self._local.conexion = conexion
+        return conexion
+
+    def _ejecutar_en_hilo(self, funcion: Callable, args: tuple, kwargs: dict):
+        return funcion(self._obtener_conexion(), *args, **kwargs)
@@ -3,4 +3,10 @@ SELECT TOP 10
 *
 FROM SCHEMA.NombreTablaAConsultar WITH(NOLOCK)
 WHERE Fecha BETWEEN '2024-01-01 00:00:00' AND '2024-01-31 23:59:59'
-'''
\ No newline at end of file
+'''
+
+# Tipos de las columnas de GET_CONSULTA_1_DB (ver utils/tipos_datos.py). Con None se conservan los tipos que
+# infiere pandas y el CSV exportado no cambia; con 'auto' se eligen según los datos. Conviene declararlos
+# cuando se conocen las columnas, por ejemplo:
+# {'Id': 'int32', 'Sku': 'string[pyarrow]', 'Bodega': 'category', 'Cantidad': 'Int32'}
+ESQUEMA_CONSULTA_1_DB = None
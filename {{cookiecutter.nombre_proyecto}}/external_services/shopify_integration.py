@@ -2,34 +2,81 @@
 import time
 import os
 import sys
+import logging
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
 # Importaciones de terceros
 import requests
-from decouple import Config, UndefinedValueError, RepositoryEnv
+from decouple import UndefinedValueError
 import pandas as pd
 
 # Importaciones propias
-from utils.logger import logger_info, logger_debug, logger_error
-from database.conexion_db import conectar_bd_sqlalchemy
-from database.consultas import ejecutar_sp_consulta
-from utils.clean_logs import clean_old_logs
-from utils.utilidades import ruta_recurso
+from utils.logger import logger
+from utils.configuracion import obtener_configuracion
+from utils.api_conexion import CacheHTTP, decodificar_respuesta
+from utils.eventos_ejecucion import obtener_registro_eventos, ETAPA_API_PAGINA, ETAPA_API_ACTUALIZACION
+from utils.perfilado import perfilar, agregar_bytes
 
+# Versión de la API de Shopify que se consume
+SHOPIFY_API_VERSION = '2023-07'
 
-# Intentamos cargar las credenciales desde las variables de entorno
-try:
-    config = Config(RepositoryEnv(ruta_recurso('.env')))
-    
-    SHOPIFY_API_KEY = config('SHOPIFY_API_KEY')
-    SHOPIFY_API_SECRET = config('SHOPIFY_API_SECRET')
-    SHOPIFY_ACCESS_TOKEN = config('SHOPIFY_ACCESS_TOKEN')
-    SHOPIFY_STORE_NAME = config('SHOPIFY_STORE_NAME')
-except UndefinedValueError as e:
-    logger_error.error(f"Error al obtener una de las variables de entorno: {e}")
-    raise
+# Campos de los productos que se solicitan a la API (parámetro fields); del producto solo se usan
+# el id, el título y el sku/inventory_item_id de las variantes, no se descargan body_html, imágenes ni opciones
+CAMPOS_PRODUCTOS = 'id,title,variants'
+
+NOMBRES_CREDENCIALES_SHOPIFY = ('SHOPIFY_API_KEY', 'SHOPIFY_API_SECRET', 'SHOPIFY_ACCESS_TOKEN', 'SHOPIFY_STORE_NAME')
+
+# Credenciales de Shopify, se cargan la primera vez que se necesitan y no al importar el módulo
+_credenciales_shopify = None
+
+
+def obtener_credenciales_shopify() -> dict:
+    """
+    Carga una sola vez las credenciales de Shopify desde las variables de entorno.
+
+    Retorna
+    -------
+    dict
+        Diccionario con SHOPIFY_API_KEY, SHOPIFY_API_SECRET, SHOPIFY_ACCESS_TOKEN y SHOPIFY_STORE_NAME.
+
+    Excepciones
+    -----------
+    UndefinedValueError
+        Si alguna de las variables de entorno no está definida.
+    """
+    global _credenciales_shopify
+    if _credenciales_shopify is None:
+        # Las credenciales se toman de la configuración del proceso (.env y variables de entorno)
+        try:
+            config = obtener_configuracion()
+            
+            credenciales = {nombre: getattr(config, nombre) for nombre in NOMBRES_CREDENCIALES_SHOPIFY}
+            faltantes = [nombre for nombre, valor in credenciales.items() if valor is None]
+            if faltantes:
+                raise UndefinedValueError(f"Faltan las variables de entorno {', '.join(faltantes)}.")
+            _credenciales_shopify = credenciales
+        except UndefinedValueError as e:
+            logger.error(f"Error al obtener una de las variables de entorno: {e}")
+            raise
+    return _credenciales_shopify
+
+
+def obtener_base_url() -> str:
+    """
+    Devuelve la URL base de la API de administración de la tienda de Shopify.
+    """
+    return f"https://{obtener_credenciales_shopify()['SHOPIFY_STORE_NAME']}.myshopify.com/admin/api/{SHOPIFY_API_VERSION}"
 
-BASE_URL = f"https://{SHOPIFY_STORE_NAME}.myshopify.com/admin/api/2023-07"
 
+def __getattr__(nombre: str):
+    # Compatibilidad con el código que usa las constantes del módulo (BASE_URL, SHOPIFY_ACCESS_TOKEN, etc.)
+    if nombre == 'BASE_URL':
+        return obtener_base_url()
+    if nombre in NOMBRES_CREDENCIALES_SHOPIFY:
+        return obtener_credenciales_shopify()[nombre]
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+@perfilar
 def put_inventory_levels(headers: dict, producto: pd.Series, location_id: int):
     """
     Actualiza los niveles de inventario de un producto específico en Shopify a través de la API.
@@ -76,14 +123,14 @@ def put_inventory_levels(headers: dict, producto: pd.Series, location_id: int):
     try:
         # Validar que location_id sea un entero positivo
         if not isinstance(location_id, int) or location_id <= 0:
-            logger_error.error(f"El ID de la ubicación proporcionado no es válido: {location_id}")
+            logger.error(f"El ID de la ubicación proporcionado no es válido: {location_id}")
             raise ValueError("El ID de la ubicación debe ser un número entero positivo.")
         
         # Validar que producto tenga los campos necesarios
         required_fields = ['inventory_item_id', 'CantidadDisponible', 'sku']
         for field in required_fields:
             if field not in producto:
-                logger_error.error(f"Falta el campo requerido '{field}' en el producto: {producto}")
+                logger.error(f"Falta el campo requerido '{field}' en el producto: {producto}")
                 raise ValueError(f"El campo '{field}' es requerido en el producto.")
         
         # Construimos el cuerpo de la petición POST
@@ -94,32 +141,38 @@ def put_inventory_levels(headers: dict, producto: pd.Series, location_id: int):
         }
 
         # Realizamos la petición POST a la URL especificada
-        url_update_inventory = f"{BASE_URL}/inventory_levels/set.json"
+        url_update_inventory = f"{obtener_base_url()}/inventory_levels/set.json"
         time.sleep(1)
-        response = requests.post(url_update_inventory, json=payload, headers=headers)
+        with obtener_registro_eventos().medir(ETAPA_API_ACTUALIZACION, endpoint=url_update_inventory) as evento:
+            response = requests.post(url_update_inventory, json=payload, headers=headers)
+            evento['codigo_http'] = response.status_code
+            evento['estado'] = 'ok' if response.status_code == 200 else 'error'
 
         # Verificar si la respuesta fue exitosa
         if response.status_code == 200:
-            logger_info.info(f'Registro Actualizado: SKU: {producto["sku"]} - inventory_item_id: {producto["inventory_item_id"]} - location_id: {location_id} - Cantidad Disponible: {producto["CantidadDisponible"]}')
+            # Evitar leer los campos de la Serie si el nivel INFO está deshabilitado
+            if logger.isEnabledFor(logging.INFO):
+                logger.info('Registro Actualizado: SKU: %s - inventory_item_id: %s - location_id: %s - Cantidad Disponible: %s',
+                            producto['sku'], producto['inventory_item_id'], location_id, producto['CantidadDisponible'])
             return response.json()
         else:
             # Manejo de error si la API devuelve un código de estado distinto de 200
-            logger_error.error(f"Error en la actualización: {response.status_code}, {response.text} -> Registro: SKU: {producto['sku']} - inventory_item_id: {producto['inventory_item_id']} - location_id: {location_id} - Cantidad Disponible: {producto['CantidadDisponible']}")
+            logger.error(f"Error en la actualización: {response.status_code}, {response.text} -> Registro: SKU: {producto['sku']} - inventory_item_id: {producto['inventory_item_id']} - location_id: {location_id} - Cantidad Disponible: {producto['CantidadDisponible']}")
             raise Exception(f"Error al actualizar el inventario: {response.status_code}, {response.text}")
 
     except requests.exceptions.RequestException as req_err:
         # Manejo de errores de conexión y HTTP
-        logger_error.error(f"Error en la solicitud HTTP: {req_err}")
+        logger.error(f"Error en la solicitud HTTP: {req_err}")
         raise requests.exceptions.RequestException(f"Error en la solicitud HTTP: {req_err}")
     
     except ValueError as ve:
         # Manejar errores de valores no válidos
-        logger_error.error(f"Error en los datos de entrada: {ve}")
+        logger.error(f"Error en los datos de entrada: {ve}")
         raise
     
     except Exception as e:
         # Manejar cualquier otro error inesperado
-        logger_error.error(f"Error inesperado en put_inventory_levels: {e}")
+        logger.error(f"Error inesperado en put_inventory_levels: {e}")
         raise Exception(f"Ocurrió un error inesperado: {e}") from e
     
 def get_inventory_levels(headers: dict, inventory_item_id: int) -> dict:
@@ -164,15 +217,15 @@ def get_inventory_levels(headers: dict, inventory_item_id: int) -> dict:
     try:
         # Validar que el inventory_item_id sea un entero positivo
         if not isinstance(inventory_item_id, int) or inventory_item_id <= 0:
-            logger_error.error(f"El ID de inventario proporcionado no es válido: {inventory_item_id}")
+            logger.error(f"El ID de inventario proporcionado no es válido: {inventory_item_id}")
             raise ValueError("El ID de inventario debe ser un número entero positivo.")
         
         # Verificar que los headers contengan el token de autenticación requerido
         if not headers.get("X-Shopify-Access-Token"):
-            logger_error.error("Falta el encabezado de autenticación 'X-Shopify-Access-Token'.")
+            logger.error("Falta el encabezado de autenticación 'X-Shopify-Access-Token'.")
             raise ValueError("Encabezado de autenticación 'X-Shopify-Access-Token' faltante.")
 
-        url_inventory = f"{BASE_URL}/inventory_levels.json?inventory_item_ids={inventory_item_id}"
+        url_inventory = f"{obtener_base_url()}/inventory_levels.json?inventory_item_ids={inventory_item_id}"
 
         time.sleep(1)
         # Realizar la solicitud a la API de Shopify
@@ -185,17 +238,17 @@ def get_inventory_levels(headers: dict, inventory_item_id: int) -> dict:
         
         else:
             # Si el código de estado no es 200, registrar el error y lanzar una excepción
-            logger_error.error(f"Error en la API de Shopify (Status Code: {response.status_code}): {response.text}")
+            logger.error(f"Error en la API de Shopify (Status Code: {response.status_code}): {response.text}")
             raise Exception(f"Error en la API de Shopify: {response.status_code}")
     
     except requests.exceptions.RequestException as req_err:
         # Manejar errores de conexión y HTTP
-        logger_error.error(f"Error en la solicitud HTTP: {req_err}")
+        logger.error(f"Error en la solicitud HTTP: {req_err}")
         raise requests.exceptions.RequestException(f"Error en la solicitud HTTP: {req_err}")
     
     except Exception as e:
         # Manejar cualquier otro error inesperado
-        logger_error.error(f"Error inesperado en get_inventory_levels: {e}")
+        logger.error(f"Error inesperado en get_inventory_levels: {e}")
         raise Exception(f"Ocurrió un error inesperado: {e}") from e
 
 def parse_pagination_links(link_header: str) -> dict:
@@ -235,7 +288,7 @@ def parse_pagination_links(link_header: str) -> dict:
     """
     try:
         if not link_header:
-            logger_error.error("El encabezado de enlaces está vacío.")
+            logger.error("El encabezado de enlaces está vacío.")
             raise ValueError("El encabezado de enlaces está vacío.")
 
         links = link_header.split(", ")
@@ -244,7 +297,7 @@ def parse_pagination_links(link_header: str) -> dict:
         for link in links:
             # Asegurarse de que el enlace tiene la estructura esperada
             if ';' not in link:
-                logger_error.error(f"Formato incorrecto en el enlace: '{link}'")
+                logger.error(f"Formato incorrecto en el enlace: '{link}'")
                 raise ValueError(f"Formato incorrecto en el enlace: '{link}'")
 
             url, rel = link.split("; ")
@@ -253,7 +306,7 @@ def parse_pagination_links(link_header: str) -> dict:
 
             # Validar que tanto la URL como la relación (rel) sean válidas
             if not url or not rel:
-                logger_error.error(f"El enlace o relación no son válidos: '{link}'")
+                logger.error(f"El enlace o relación no son válidos: '{link}'")
                 raise ValueError(f"El enlace o relación no son válidos: '{link}'")
 
             pagination_links[rel] = url
@@ -262,14 +315,15 @@ def parse_pagination_links(link_header: str) -> dict:
 
     except ValueError as ve:
         # Lanza un error detallado si el encabezado no tiene el formato correcto
-        logger_error.error(f"Error al procesar el encabezado de enlaces: {ve}")
+        logger.error(f"Error al procesar el encabezado de enlaces: {ve}")
         raise ValueError(f"Error al procesar el encabezado de enlaces: {ve}")
     except Exception as e:
         # Captura cualquier otro error inesperado y lo lanza
-        logger_error.error(f"Ocurrió un error inesperado: {e}")
+        logger.error(f"Ocurrió un error inesperado: {e}")
         raise Exception(f"Ocurrió un error inesperado: {e}")
 
-def get_product_page(url: str, headers: dict) -> tuple:
+@perfilar
+def get_product_page(url: str, headers: dict, cache: CacheHTTP = None) -> tuple:
     """
     Obtiene una página de productos desde la API de Shopify.
 
@@ -283,6 +337,8 @@ def get_product_page(url: str, headers: dict) -> tuple:
         La URL de la API de Shopify para la solicitud de productos.
     headers : dict
         Diccionario con los encabezados necesarios para la autenticación en la API de Shopify.
+    cache : CacheHTTP, opcional
+        Caché HTTP en disco; si se indica, las páginas sin cambios se obtienen con una solicitud condicional (304).
 
     Retorna
     -------
@@ -310,54 +366,90 @@ def get_product_page(url: str, headers: dict) -> tuple:
     try:
         # Validar que la URL y los headers sean correctos
         if not isinstance(url, str) or not url:
-            logger_error.error("La URL proporcionada no es válida.")
+            logger.error("La URL proporcionada no es válida.")
             raise ValueError("La URL proporcionada no es válida.")
         
         if not isinstance(headers, dict) or not headers.get("X-Shopify-Access-Token"):
-            logger_error.error("Los headers proporcionados no son válidos o faltan los encabezados de autenticación.")
+            logger.error("Los headers proporcionados no son válidos o faltan los encabezados de autenticación.")
             raise ValueError("Los headers proporcionados no son válidos o faltan los encabezados de autenticación.")
 
-        # Realizar la solicitud GET
-        response = requests.get(url, headers=headers)
+        # Realizar la solicitud GET, usando la caché HTTP si se proporcionó
+        with obtener_registro_eventos().medir(ETAPA_API_PAGINA, endpoint=url) as evento:
+            if cache:
+                response = cache.get(url, headers=headers)
+            else:
+                response = requests.get(url, headers=headers)
+            evento['codigo_http'] = response.status_code
+            evento['estado'] = 'ok' if response.status_code == 200 else 'error'
+            evento['bytes'] = len(getattr(response, 'content', b''))
+            evento['desde_cache'] = getattr(response, 'desde_cache', False)
+        agregar_bytes(evento['bytes'])
 
         # Verificar el código de estado de la respuesta
         if response.status_code == 200:
-            # Obtener los datos en formato JSON
-            data = response.json()
+            # Obtener los datos en formato JSON (con orjson si está instalado)
+            data = decodificar_respuesta(response)
 
             # Obtener los enlaces de paginación desde los encabezados, si existen
             header_link_paginas = response.headers.get('link', None)
             if header_link_paginas:
                 # Procesar los enlaces de paginación
                 pagination_links = parse_pagination_links(header_link_paginas)
-                logger_info.info(f"Paginación detectada. Procesando enlaces de paginación.")
+                logger.info("Paginación detectada. Procesando enlaces de paginación.")
                 return data, pagination_links
 
-            logger_info.info(f"Datos obtenidos exitosamente de la API de Shopify sin paginación.")
+            logger.info("Datos obtenidos exitosamente de la API de Shopify sin paginación.")
             return data, None
 
         else:
             # Registrar y lanzar excepción si la respuesta no es exitosa
-            logger_error.error(f"Error al consumir la API de Shopify: {response.status_code}, {response.text}")
+            logger.error(f"Error al consumir la API de Shopify: {response.status_code}, {response.text}")
             raise Exception(f"Error al consumir la API de Shopify: {response.status_code}")
 
     except requests.exceptions.RequestException as req_err:
         # Manejo de errores de red y conexión
-        logger_error.error(f"Error en la solicitud HTTP: {req_err}")
+        logger.error(f"Error en la solicitud HTTP: {req_err}")
         raise requests.exceptions.RequestException(f"Error en la solicitud HTTP: {req_err}")
     
     except ValueError as ve:
         # Manejar errores de validación
-        logger_error.error(f"Error en los parámetros de entrada: {ve}")
+        logger.error(f"Error en los parámetros de entrada: {ve}")
         raise
     
     except Exception as e:
         # Manejar cualquier otro error inesperado
-        logger_error.error(f"Error inesperado en get_product_page: {e}")
+        logger.error(f"Error inesperado en get_product_page: {e}")
         raise Exception(f"Ocurrió un error inesperado: {e}") from e
 
 
-def get_all_products_pages(api_url: str, headers: dict) -> list:
+def agregar_campos_url(url: str, campos: str) -> str:
+    """
+    Agrega el parámetro `fields` a la URL si todavía no lo tiene.
+
+    Los enlaces de paginación de Shopify (page_info) no siempre conservan el parámetro,
+    por eso se agrega a cada página y no solo a la primera.
+
+    Parámetros
+    ----------
+    url : str
+        URL de la solicitud.
+    campos : str
+        Campos separados por coma, por ejemplo 'id,title,variants'.
+
+    Retorna
+    -------
+    str
+        La URL con el parámetro `fields`.
+    """
+    partes = urlsplit(url)
+    parametros = parse_qsl(partes.query, keep_blank_values=True)
+    if any(nombre == 'fields' for nombre, _ in parametros):
+        return url
+    parametros.append(('fields', campos))
+    return urlunsplit(partes._replace(query=urlencode(parametros, safe=',')))
+
+
+def get_all_products_pages(api_url: str, headers: dict, cache: CacheHTTP = None, campos: str = CAMPOS_PRODUCTOS) -> list:
     """
     Obtiene todos los productos paginados desde la API de Shopify.
 
@@ -370,6 +462,10 @@ def get_all_products_pages(api_url: str, headers: dict) -> list:
         La URL base de la API de Shopify para la solicitud de productos.
     headers : dict
         Diccionario con los encabezados necesarios para la autenticación en la API de Shopify.
+    cache : CacheHTTP, opcional
+        Caché HTTP en disco que se usa para cada página de productos.
+    campos : str, opcional
+        Campos de los productos que se solicitan (por defecto CAMPOS_PRODUCTOS). Con None se descarga el producto completo.
 
     Retorna
     -------
@@ -396,34 +492,38 @@ def get_all_products_pages(api_url: str, headers: dict) -> list:
     
     try:
         while current_url:
+            # Solicitar solo los campos que se usan de cada producto
+            if campos:
+                current_url = agregar_campos_url(current_url, campos)
+            
             # Obtener los datos de la página actual y los enlaces de paginación
-            data, pagination_links = get_product_page(current_url, headers)
+            data, pagination_links = get_product_page(current_url, headers, cache)
 
             # Agregar los datos de la página actual a la lista de resultados
             if 'products' in data:
                 all_data.extend(data['products'])  # Asumimos que el endpoint devuelve un campo 'products'
-                logger_info.info(f"Obtenidos {len(data['products'])} productos de la página {current_url}.")
+                logger.info("Obtenidos %s productos de la página %s.", len(data['products']), current_url)
             else:
-                logger_error.error(f"El formato de los datos es inesperado en {current_url}.")
+                logger.error(f"El formato de los datos es inesperado en {current_url}.")
                 raise Exception(f"El formato de los datos es inesperado en {current_url}.")
 
             # Verificar si hay una página siguiente en los enlaces de paginación
             if pagination_links and 'next' in pagination_links:
                 current_url = pagination_links['next']
-                logger_info.info(f"Siguiente página encontrada: {current_url}.")
+                logger.info("Siguiente página encontrada: %s.", current_url)
             else:
                 # No hay más páginas, salimos del bucle
-                logger_info.info("No se encontraron más páginas. Finalizando la recolección de productos.")
+                logger.info("No se encontraron más páginas. Finalizando la recolección de productos.")
                 current_url = None
 
         return all_data
     
     except requests.exceptions.RequestException as req_err:
-        logger_error.error(f"Error en la solicitud HTTP: {req_err}")
+        logger.error(f"Error en la solicitud HTTP: {req_err}")
         raise requests.exceptions.RequestException(f"Error en la solicitud HTTP: {req_err}")
     
     except Exception as e:
-        logger_error.error(f"Error inesperado al obtener productos: {e}")
+        logger.error(f"Error inesperado al obtener productos: {e}")
         raise Exception(f"Ocurrió un error inesperado al obtener productos: {e}") from e
 
 
@@ -1,10 +1,15 @@
 # Importaciones de la biblioteca estándar de Python
+import asyncio
+import logging
 import requests
 from urllib.parse import urlencode
 from datetime import datetime, timedelta, timezone
 
 # Importaciones propias
-from utils.logger import logger_info, logger_debug, logger_error
+from utils.logger import logger
+from utils.api_conexion import CacheHTTP, decodificar_json, decodificar_respuesta
+from utils.eventos_ejecucion import obtener_registro_eventos, ETAPA_API_PAGINA
+from utils.perfilado import perfilar, agregar_bytes
 
 # Importaciones de terceros
 import pandas as pd
@@ -31,7 +36,7 @@ def build_creation_date_param(days_back):
     # Construir el rango de fechas
     return f"creationDate:[{start_date_str} TO {end_date_str}]"
 
-def inicializa_endpoint(base_url, params, app_key, app_token) -> list:
+def inicializa_endpoint(base_url, params, app_key, app_token, cache: CacheHTTP = None) -> list:
     """
     Inicializa un endpoint y recorre todas las páginas devolviendo los datos completos.
     
@@ -40,6 +45,7 @@ def inicializa_endpoint(base_url, params, app_key, app_token) -> list:
     :param params: Diccionario con los parámetros de la consulta
     :param app_key: Clave de la API de VTEX
     :param app_token: Token de la API de VTEX
+    :param cache: Caché HTTP opcional para no descargar de nuevo las páginas sin cambios
     :return: Lista completa de datos obtenidos
     """
     headers = {
@@ -59,10 +65,17 @@ def inicializa_endpoint(base_url, params, app_key, app_token) -> list:
             query_string = urlencode(params)
             url = f"{base_url}?{query_string}"
 
-            response = requests.get(url, headers=headers)
+            with obtener_registro_eventos().medir(ETAPA_API_PAGINA, endpoint=base_url, pagina=current_page) as evento:
+                if cache:
+                    response = cache.get(url, headers=headers)
+                else:
+                    response = requests.get(url, headers=headers)
+                evento['codigo_http'] = response.status_code
+                evento['estado'] = 'ok' if response.status_code == 200 else 'error'
+                evento['bytes'] = len(getattr(response, 'content', b''))
 
             if response.status_code == 200:
-                data = response.json()
+                data = decodificar_respuesta(response)
                 
                 # Procesar la lista de datos
                 if data.get('list'):
@@ -70,21 +83,22 @@ def inicializa_endpoint(base_url, params, app_key, app_token) -> list:
 
                 # Revisar si hay más páginas
                 paging = data.get('paging', {})
+                logger.debug("Página %s de %s obtenida de VTEX | URL: %s", paging.get('currentPage'), paging.get('pages'), base_url)
                 if paging.get('currentPage') >= paging.get('pages', 1):
                     break  # Salir del bucle si estamos en la última página
 
                 # Avanzar a la siguiente página
                 current_page += 1
             else:
-                logger_error.error(f"Error HTTP {response.status_code}: {response.text} | URL: {url}")
+                logger.error(f"Error HTTP {response.status_code}: {response.text} | URL: {url}")
                 break  # Salir en caso de error
 
     except requests.exceptions.RequestException as e:
-        logger_error.error(f"Error de conexión: {str(e)} | URL: {base_url}")
+        logger.error(f"Error de conexión: {str(e)} | URL: {base_url}")
     except ValueError as e:
-        logger_error.error(f"Error de decodificación JSON: {str(e)} | URL: {base_url}")
+        logger.error(f"Error de decodificación JSON: {str(e)} | URL: {base_url}")
     except Exception as e:
-        logger_error.error(f"Error desconocido: {str(e)} | URL: {base_url}")
+        logger.error(f"Error desconocido: {str(e)} | URL: {base_url}")
 
     return all_data
 
@@ -104,34 +118,69 @@ params = {
     'f_creationDate': f_creation_date
 }
     
-df_full_information = procesar_datos_bodegas(df_apis_vtex, endpoint_list_orders_vtex, estados_a_filtrar, f_creation_date, params, nombre_carpeta_exportacion, logger_info)
+df_full_information = procesar_datos_bodegas(df_apis_vtex, endpoint_list_orders_vtex, estados_a_filtrar, f_creation_date, params, nombre_carpeta_exportacion, logger)
 """
 
-async def fetch_inventory_async(session, base_url, headers, warehouseId):
+@perfilar
+async def fetch_inventory_async(session, base_url, headers, warehouseId, cache: CacheHTTP = None):
     try:
-        async with session.get(base_url, headers=headers) as response:
-            if response.status == 200:
-                data = await response.json()
-
-                # Validar que 'balance' esté en la respuesta y sea una lista
-                if 'balance' in data and isinstance(data['balance'], list):
-                    # Buscar el warehouseId específico
-                    matching_warehouse = next(
-                        (entry for entry in data['balance'] if entry['warehouseId'] == warehouseId),
-                        None
-                    )
-                    if matching_warehouse:
-                        return matching_warehouse.get('totalQuantity', 'N/A')
-                    else:
-                        return f"No data for warehouseId {warehouseId}"
-                else:
-                    return "No balance data returned by VTEX"
+        data = None
+        request_headers = headers
+        # La caché lee y escribe archivos y toma un lock de hilos: sus operaciones se ejecutan en el pool
+        # de hilos por defecto para no detener el event loop mientras se consultan los demás SKUs
+        loop = asyncio.get_running_loop()
+
+        if cache:
+            clave_cache = cache.generar_clave(base_url, headers)
+            respuesta_cache = await loop.run_in_executor(None, cache.obtener_vigente, clave_cache, base_url)
+            if respuesta_cache is not None:
+                data = respuesta_cache.json()
+            else:
+                request_headers = cache.cabeceras_condicionales(clave_cache, headers)
+
+        if data is None:
+            with obtener_registro_eventos().medir(ETAPA_API_PAGINA, endpoint=base_url) as evento:
+                for cabeceras_solicitud in (request_headers, headers):
+                    async with session.get(base_url, headers=cabeceras_solicitud) as response:
+                        evento['codigo_http'] = response.status
+                        if response.status == 304 and cache:
+                            respuesta_cache = await loop.run_in_executor(None, cache.revalidar, clave_cache, base_url)
+                            if respuesta_cache is None:
+                                # La entrada desapareció del disco: se descarga de nuevo el recurso completo,
+                                # sin los encabezados condicionales
+                                continue
+                            data = respuesta_cache.json()
+                        elif response.status == 200:
+                            contenido = await response.read()
+                            data = decodificar_json(contenido)
+                            evento['bytes'] = len(contenido)
+                            agregar_bytes(len(contenido))
+                            if cache:
+                                await loop.run_in_executor(None, cache.guardar, clave_cache, base_url, response.headers, data, contenido)
+                        break
+                if data is None:
+                    evento['estado'] = 'error'
+                    return f"Error {response.status}: {response.reason}"
+
+        # Validar que 'balance' esté en la respuesta y sea una lista
+        if 'balance' in data and isinstance(data['balance'], list):
+            # Buscar el warehouseId específico
+            matching_warehouse = next(
+                (entry for entry in data['balance'] if entry['warehouseId'] == warehouseId),
+                None
+            )
+            if matching_warehouse:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Inventario VTEX warehouseId %s: %s | URL: %s", warehouseId, matching_warehouse.get('totalQuantity'), base_url)
+                return matching_warehouse.get('totalQuantity', 'N/A')
             else:
-                return f"Error {response.status}: {response.reason}"
+                return f"No data for warehouseId {warehouseId}"
+        else:
+            return "No balance data returned by VTEX"
     except Exception as e:
         return f"Exception occurred: {str(e)}"
 
-async def list_inventory_by_sku_async(data_frame: pd.DataFrame):
+async def list_inventory_by_sku_async(data_frame: pd.DataFrame, cache: CacheHTTP = None):
     # Agregar columnas adicionales al DataFrame
     data_frame['DatosVTEX'] = 'DatosVtex->'
     data_frame['totalQuantity'] = None
@@ -152,7 +201,7 @@ async def list_inventory_by_sku_async(data_frame: pd.DataFrame):
             }
 
             # Crear una tarea para cada solicitud
-            tasks.append(fetch_inventory_async(session, base_url, headers, warehouseId))
+            tasks.append(fetch_inventory_async(session, base_url, headers, warehouseId, cache))
 
         # Ejecutar las tareas de manera concurrente
         results = await tqdm_asyncio.gather(*tasks, desc="Consultando inventario de cada registro")
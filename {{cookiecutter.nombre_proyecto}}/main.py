@@ -2,26 +2,50 @@
 import time
 import os
 import sys
+import argparse
+import multiprocessing
 
 # Importaciones propias
-from utils.logger import logger_info, logger_debug, logger_error
-from database.conexion_db import conectar_bd_pyodbc, conectar_bd_sqlalchemy
-from database.consultas import ejecutar_consulta, ejecutar_consulta_pyodbc
+from utils.logger import logger
 from utils.variables_entorno import VariablesEntorno
 from utils.bcolors import bcolors
-from utils.utilidades import crear_carpeta
-from database.queries import GET_CONSULTA_1_DB
+from utils.eventos_ejecucion import obtener_registro_eventos, ETAPA_CONEXION_BD, ETAPA_EXPORTACION
+from database.queries import GET_CONSULTA_1_DB, ESQUEMA_CONSULTA_1_DB
 
-# Importaciones de terceros
-import sqlalchemy
-import pyodbc
+def main(recursos=None):
+    """
+    Ejecuta el proceso una vez.
 
-def main():
+    Args:
+        recursos (RecursosCompartidos, opcional): Recursos que se conservan entre ejecuciones cuando el proceso
+            se ejecuta con el programador (--programador); la conexión a la base de datos se reutiliza y no se cierra.
+
+    Returns:
+        bool: False si la ejecución terminó con un error, para que el programador la registre como fallida
+            y el .exe termine con código de salida 1.
+    """
+    # Los módulos que cargan pandas, pyodbc y SQLAlchemy se importan al ejecutar el proceso y no al importar main,
+    # para que el arranque del .exe no espere la carga de librerías que todavía no se necesitan
+    from database.conexion_db import conectar_bd_pyodbc, conectar_bd_sqlalchemy
+    from database.consultas import ejecutar_consulta, ejecutar_consulta_pyodbc
+    from utils.utilidades import crear_carpeta
+    from utils.configuracion import obtener_configuracion
+    from utils.clean_logs import iniciar_limpieza_en_segundo_plano
+    from utils.notificaciones import obtener_notificador
+    
+    notificador = None
+    exitoso = False
     try:
         # Registrar inicio de la ejecución
-        logger_info.info("********** INICIO de la ejecución **********")
-        logger_debug.debug("********** INICIO de la ejecución **********")
-        logger_error.error("********** INICIO de la ejecución **********")
+        logger.info("********** INICIO de la ejecución **********", extra={'marcador': True})
+        eventos = obtener_registro_eventos()
+        logger.info("Id de la ejecución en el registro de eventos: %s", eventos.id_ejecucion)
+        
+        # Si hay un servidor SMTP configurado, los errores de la ejecución se envían al final en un solo correo
+        notificador = obtener_notificador()
+        
+        # Comprimir y eliminar logs y exportaciones antiguos mientras se ejecuta el proceso
+        iniciar_limpieza_en_segundo_plano()
         
         print('Hola, este es el proyecto llamado "{{cookiecutter.nombre_proyecto}}" se ha inicializado correctamente')
         
@@ -33,46 +57,126 @@ def main():
         
         # Conectar a la base de datos
         # engine_database = conectar_bd_sqlalchemy(variables_entorno.USUARIO_DB, variables_entorno.CONTRASENA_DB, variables_entorno.SERVIDOR_DB, variables_entorno.NOMBRE_DB, variables_entorno.INSTANCIA_DB)
-        engine_database = conectar_bd_pyodbc(variables_entorno.USUARIO_DB, variables_entorno.CONTRASENA_DB, variables_entorno.SERVIDOR_DB, variables_entorno.NOMBRE_DB, variables_entorno.INSTANCIA_DB)
+        with eventos.medir(ETAPA_CONEXION_BD) as evento:
+            if recursos is not None:
+                engine_database = recursos.obtener_conexion_bd()
+            else:
+                engine_database = conectar_bd_pyodbc(variables_entorno.USUARIO_DB, variables_entorno.CONTRASENA_DB, variables_entorno.SERVIDOR_DB, variables_entorno.NOMBRE_DB, variables_entorno.INSTANCIA_DB)
+            evento['estado'] = 'ok' if engine_database else 'error'
         
         if engine_database:
             try:
                 print('Conexión a la base de datos')
                 
-                df_data = ejecutar_consulta_pyodbc(engine_database, GET_CONSULTA_1_DB)
+                consultar = lambda: ejecutar_consulta_pyodbc(engine_database, GET_CONSULTA_1_DB, esquema=ESQUEMA_CONSULTA_1_DB, nombre='consulta_1')
+                minutos_reutilizar = obtener_configuracion().MINUTOS_REUTILIZAR_INTERMEDIOS
+                if minutos_reutilizar > 0:
+                    # El resultado de la consulta se guarda en Exportar/intermedios y una nueva ejecución
+                    # lo lee desde ahí sin volver a consultar la base de datos
+                    from utils.almacen_datos import AlmacenIntermedio
+                    df_data = AlmacenIntermedio().obtener_o_generar('consulta_1', consultar, max_antiguedad=minutos_reutilizar * 60)
+                else:
+                    df_data = consultar()
                 
                 # Opcional: exportar el resultado a CSV
-                df_data.to_csv(f'{nombre_carpeta_exportacion}/nombre_archivo.csv', index=False, sep='|', encoding='ansi')
+                ruta_archivo_exportado = f'{nombre_carpeta_exportacion}/nombre_archivo.csv'
+                with eventos.medir(ETAPA_EXPORTACION, archivo=ruta_archivo_exportado) as evento:
+                    df_data.to_csv(ruta_archivo_exportado, index=False, sep='|', encoding='ansi')
+                    evento['filas'] = len(df_data)
+                    evento['bytes'] = os.path.getsize(ruta_archivo_exportado)
             
             except Exception as e:
-                logger_error.error(f"Ocurrió un error durante el procesamiento de productos: {e}")
+                logger.error(f"Ocurrió un error durante el procesamiento de productos: {e}")
                 raise
             
             finally:
                 # Asegurar que la conexión a la base de datos se cierre correctamente
-                if isinstance(engine_database, sqlalchemy.engine.base.Engine):
-                    engine_database.dispose()
-                    logger_info.info("Conexión SQLAlchemy cerrada.")
-                elif isinstance(engine_database, pyodbc.Connection):
-                    engine_database.close()
-                    logger_info.info("Conexión pyodbc cerrada.")
-                else:
-                    logger_info.warning("No se pudo determinar el tipo de conexión.")
+                # (se identifica por sus métodos para no importar SQLAlchemy si no se usó)
+                # La conexión del programador se mantiene abierta para la siguiente ejecución
+                if recursos is None:
+                    if hasattr(engine_database, 'dispose'):
+                        engine_database.dispose()
+                        logger.info("Conexión SQLAlchemy cerrada.")
+                    elif hasattr(engine_database, 'close'):
+                        engine_database.close()
+                        logger.info("Conexión pyodbc cerrada.")
+                    else:
+                        logger.warning("No se pudo determinar el tipo de conexión.")
+        
+        # Sin conexión a la base de datos (las funciones de conexión devuelven None) el proceso no se completó
+        exitoso = bool(engine_database)
     
     except Exception as e:
-        logger_error.error(f"Ocurrió un error crítico en la ejecución del script: {e}")
+        logger.error(f"Ocurrió un error crítico en la ejecución del script: {e}")
     
     finally:
+        # El resumen se envía en segundo plano, sin esperar al servidor de correo
+        if notificador is not None:
+            notificador.enviar_resumen_errores('Errores en la ejecución del proceso')
+        
         # Registrar fin de la ejecución
-        logger_info.info("********** FIN de la ejecución **********")
-        logger_debug.debug("********** FIN de la ejecución **********")
-        logger_error.error("********** FIN de la ejecución **********")
+        logger.info("********** FIN de la ejecución **********", extra={'marcador': True})
+    
+    return exitoso
+
+def ejecutar_programador(intervalo: float = None, cron: str = None):
+    """
+    Ejecuta main de forma recurrente en un único proceso, en lugar de iniciar el .exe desde el Programador de tareas.
+
+    Las librerías, la conexión a la base de datos y la sesión HTTP se cargan una sola vez y se
+    reutilizan en cada ejecución; el archivo de bloqueo evita que se inicien dos programadores.
+    """
+    from services.programador import Programador, Trabajo
+
+    trabajo = Trabajo('main', main, intervalo=intervalo, cron=cron)
+    if not Programador([trabajo]).ejecutar():
+        sys.exit(1)
 
 if __name__ == "__main__":
-    # Cuando se ejecuta desde el archivo .exe detiene la ventana de la consola hasta presionar Enter
-    # if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
-    #     input("Presiona Enter para iniciar el proceso...")
-    main()
+    # En el .exe de PyInstaller los procesos de trabajo (services/data_organization.py y las etapas en_procesos
+    # de services/pipeline.py) vuelven a ejecutar el .exe: freeze_support los detiene aquí para que no ejecuten el proceso
+    multiprocessing.freeze_support()
+    
+    parser = argparse.ArgumentParser(description='Ejecuta el proceso una vez o de forma recurrente con el programador.')
+    parser.add_argument('--programador', action='store_true', help='Ejecutar de forma recurrente en un proceso de larga duración.')
+    parser.add_argument('--intervalo', type=float, default=300, help='Segundos entre ejecuciones con --programador (por defecto 300).')
+    parser.add_argument('--cron', help="Expresión cron de 5 campos con --programador, por ejemplo '*/5 6-22 * * *' (reemplaza a --intervalo).")
+    parser.add_argument('--perfilar', nargs='?', const='tiempos', metavar='MODOS',
+                        help="Perfilar la ejecución: tiempos, cprofile y/o tracemalloc separados por comas (por defecto tiempos; "
+                             "también se activa con PERFILADO en el .env). Los reportes se guardan en la carpeta de logs.")
+    parser.add_argument('--metricas', nargs='?', const=0, type=int, metavar='PUERTO',
+                        help='Registrar métricas en formato Prometheus y exponerlas en http://127.0.0.1:PUERTO/metrics '
+                             '(sin puerto solo se guarda el archivo final en la carpeta de logs; también con METRICAS_PUERTO en el .env).')
+    argumentos = parser.parse_args()
+
+    # Con el perfilado desactivado los decoradores de utils/perfilado.py no miden nada
+    from utils.perfilado import iniciar_perfilado, finalizar_perfilado, interpretar_modos
+    try:
+        modos_perfilado = interpretar_modos(argumentos.perfilar) if argumentos.perfilar else None
+    except ValueError as e:
+        parser.error(str(e))
+    perfilado_activo = iniciar_perfilado(modos_perfilado)
+
+    from utils.metricas import iniciar_metricas, finalizar_metricas
+    metricas_activas = iniciar_metricas(argumentos.metricas)
+
+    try:
+        if argumentos.programador:
+            ejecutar_programador(None if argumentos.cron else argumentos.intervalo, argumentos.cron)
+            sys.exit(0)
+
+        # Cuando se ejecuta desde el archivo .exe detiene la ventana de la consola hasta presionar Enter
+        # if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+        #     input("Presiona Enter para iniciar el proceso...")
+        exitoso = main()
+    finally:
+        if perfilado_activo:
+            finalizar_perfilado()
+        if metricas_activas:
+            finalizar_metricas()
+
+    if not exitoso:
+        sys.exit(1)
 
     # if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
     #     input("Presiona Enter para salir...") 
\ No newline at end of file
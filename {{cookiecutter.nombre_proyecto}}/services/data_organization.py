@@ -0,0 +1,185 @@
+# Importaciones de la biblioteca estándar de Python
+import os
+import uuid
+from pathlib import Path
+from typing import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+
+# Importaciones de terceros
+try:
+    # pyarrow es opcional, solo se necesita para la etapa de transformación en paralelo
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Importaciones propias
+from utils.logger import logger, argumentos_proceso_trabajo
+from utils.api_conexion import decodificar_json
+
+# Tipos de las columnas de las variantes de Shopify
+ESQUEMA_VARIANTES_SHOPIFY = {
+    'id': 'int64',
+    'title': 'string',
+    'sku': 'string',
+    'inventory_item_id': 'int64',
+}
+
+# Tipos de las columnas de los balances de inventario de VTEX (una fila por sku y bodega)
+ESQUEMA_BALANCES_VTEX = {
+    'skuId': 'string',
+    'warehouseId': 'string',
+    'warehouseName': 'string',
+    'totalQuantity': 'int64',
+    'reservedQuantity': 'int64',
+    'hasUnlimitedQuantity': 'bool',
+}
+
+
+def _validar_pyarrow():
+    if pa is None:
+        raise ImportError("La transformación en paralelo requiere pyarrow: pip install pyarrow")
+
+
+def _crear_esquema(tipos: dict):
+    return pa.schema([(nombre, pa.type_for_alias(tipo)) for nombre, tipo in tipos.items()])
+
+
+def cargar_lote(lote, llave: str = None) -> list:
+    """
+    Devuelve los registros de un lote que puede estar en memoria o guardado en disco.
+
+    Args:
+        lote (list, str o Path): Lista de registros o ruta de un archivo JSON con una página de la API.
+        llave (str, opcional): Llave de la página que contiene la lista de registros (por ejemplo 'products').
+
+    Returns:
+        list: Registros del lote.
+    """
+    if isinstance(lote, (str, Path)):
+        with open(lote, 'rb') as archivo:
+            lote = decodificar_json(archivo.read())
+    if llave and isinstance(lote, dict):
+        lote = lote[llave]
+    return lote
+
+
+def aplanar_productos_shopify(lote) -> 'pa.Table':
+    """
+    Convierte un lote de productos de Shopify en una tabla de Arrow con una fila por variante.
+
+    Args:
+        lote (list, str o Path): Productos o ruta de un archivo JSON con una página de products.json.
+
+    Returns:
+        pa.Table: Tabla con las columnas de ESQUEMA_VARIANTES_SHOPIFY.
+
+    Raises:
+        ValueError: Si algún producto o variante no tiene la estructura esperada.
+    """
+    _validar_pyarrow()
+    productos = cargar_lote(lote, 'products')
+
+    columnas = {nombre: [] for nombre in ESQUEMA_VARIANTES_SHOPIFY}
+    try:
+        for producto in productos:
+            variantes = producto['variants']
+            cantidad = len(variantes)
+            columnas['id'].extend([producto['id']] * cantidad)
+            columnas['title'].extend([producto['title']] * cantidad)
+            columnas['sku'].extend([variante['sku'] for variante in variantes])
+            columnas['inventory_item_id'].extend([variante['inventory_item_id'] for variante in variantes])
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Producto o variante sin la estructura esperada: {e}") from e
+
+    return pa.table(columnas, schema=_crear_esquema(ESQUEMA_VARIANTES_SHOPIFY))
+
+
+def aplanar_balances_vtex(lote) -> 'pa.Table':
+    """
+    Convierte un lote de inventarios de VTEX (respuestas de /inventory/skus/{skuId}) en una tabla de Arrow
+    con una fila por sku y bodega.
+
+    Args:
+        lote (list, str o Path): Respuestas de inventario o ruta de un archivo JSON con una lista de respuestas.
+
+    Returns:
+        pa.Table: Tabla con las columnas de ESQUEMA_BALANCES_VTEX.
+    """
+    _validar_pyarrow()
+    inventarios = cargar_lote(lote)
+
+    filas = []
+    for inventario in inventarios:
+        for balance in inventario.get('balance') or []:
+            filas.append({'skuId': str(inventario.get('skuId')), **balance})
+
+    columnas = {nombre: [fila.get(nombre) for fila in filas] for nombre in ESQUEMA_BALANCES_VTEX}
+    return pa.table(columnas, schema=_crear_esquema(ESQUEMA_BALANCES_VTEX))
+
+
+def _transformar_lote(funcion: Callable, lote, carpeta_salida: str):
+    # Se ejecuta en el proceso de trabajo: transforma el lote y, si se indicó una carpeta, lo guarda en Parquet
+    tabla = funcion(lote)
+    if carpeta_salida is None:
+        return tabla
+    ruta = os.path.join(carpeta_salida, f'lote_{uuid.uuid4().hex}.parquet')
+    pq.write_table(tabla, ruta)
+    return ruta
+
+
+def transformar_en_paralelo(lotes: Iterable, funcion: Callable = aplanar_productos_shopify, procesos: int = None,
+                            carpeta_salida: str = None) -> list:
+    """
+    Aplana y tipa lotes de resultados de una API en varios procesos.
+
+    Cada lote (una página o un grupo de registros, en memoria o guardado en un archivo JSON) se
+    transforma en un proceso distinto y el resultado se devuelve como tabla de Arrow, que se
+    transfiere entre procesos sin convertir fila por fila y se concatena sin copiar los datos.
+    Con `carpeta_salida` cada lote se guarda en un archivo Parquet y se devuelve su ruta.
+
+    Para aprovechar los procesos conviene pasar las rutas de las páginas guardadas en disco: así cada
+    proceso lee y decodifica su propio JSON y no se serializan los diccionarios de Python para enviarlos.
+
+    Es opcional: con procesos=1 los lotes se transforman en el proceso actual, lo que es más
+    rápido para pocos registros porque no se pagan el inicio de los procesos ni la transferencia.
+
+    Args:
+        lotes (Iterable): Lotes a transformar (listas de registros o rutas de archivos JSON).
+        funcion (Callable): Función de nivel de módulo que recibe un lote y devuelve una pa.Table.
+        procesos (int, opcional): Cantidad de procesos, por defecto la cantidad de núcleos.
+        carpeta_salida (str, opcional): Carpeta donde guardar cada lote en Parquet.
+
+    Returns:
+        list: Tablas de Arrow (o rutas de los archivos Parquet) en el mismo orden de los lotes.
+
+    Ejemplo:
+        tablas = transformar_en_paralelo(paginas, aplanar_productos_shopify, procesos=4)
+        df = concatenar_tablas(tablas).to_pandas()
+    """
+    _validar_pyarrow()
+    lotes = list(lotes)
+    procesos = procesos or os.cpu_count() or 1
+    if carpeta_salida is not None:
+        os.makedirs(carpeta_salida, exist_ok=True)
+
+    if procesos <= 1 or len(lotes) <= 1:
+        resultados = [_transformar_lote(funcion, lote, carpeta_salida) for lote in lotes]
+    else:
+        procesos = min(procesos, len(lotes))
+        with ProcessPoolExecutor(max_workers=procesos, **argumentos_proceso_trabajo()) as executor:
+            resultados = list(executor.map(_transformar_lote, [funcion] * len(lotes), lotes, [carpeta_salida] * len(lotes)))
+
+    logger.info("Se transformaron %s lotes con %s en %s procesos.", len(lotes), funcion.__name__, procesos)
+    return resultados
+
+
+def concatenar_tablas(resultados: list) -> 'pa.Table':
+    """
+    Une las tablas (o archivos Parquet) devueltos por transformar_en_paralelo en una sola tabla.
+    """
+    _validar_pyarrow()
+    tablas = [pq.read_table(resultado, memory_map=True) if isinstance(resultado, (str, Path)) else resultado
+              for resultado in resultados]
+    return pa.concat_tables(tablas)
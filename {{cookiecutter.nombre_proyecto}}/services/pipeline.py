@@ -0,0 +1,242 @@
+# Importaciones de la biblioteca estándar de Python
+import time
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+
+# Importaciones propias
+from utils import metricas
+from utils.logger import logger, argumentos_proceso_trabajo
+from utils.eventos_ejecucion import obtener_registro_eventos
+
+# Etapa con la que se registra cada etapa del pipeline en el archivo de eventos
+ETAPA_PIPELINE = 'pipeline'
+
+# Marca de fin de los elementos de una cola
+_FIN = object()
+
+
+@dataclass
+class Etapa:
+    """
+    Etapa de un pipeline: una función que recibe un elemento y devuelve el elemento transformado.
+
+    Atributos:
+        nombre (str): Nombre de la etapa en los logs y en el registro de eventos.
+        funcion (Callable): Función que procesa cada elemento. Si devuelve None el elemento no pasa a la siguiente etapa.
+        concurrencia (int): Cantidad de hilos (o procesos si en_procesos=True) que procesan elementos al mismo tiempo.
+        tamano_cola (int): Cantidad máxima de elementos esperando en la cola de entrada de la etapa;
+            cuando se llena la etapa anterior espera, así una etapa rápida no acumula todo en memoria.
+        en_procesos (bool): Ejecuta la función en procesos, para etapas que consumen CPU (la función debe ser de nivel de módulo).
+        genera (bool): La función devuelve un iterable y cada uno de sus elementos pasa por separado a la siguiente etapa
+            (por ejemplo una etapa que recibe una consulta y entrega los lotes de filas). Con en_procesos=True el
+            iterable (por ejemplo un generador) se convierte en lista dentro del proceso antes de enviarse.
+    """
+    nombre: str
+    funcion: Callable
+    concurrencia: int = 1
+    tamano_cola: int = 100
+    en_procesos: bool = False
+    genera: bool = False
+
+
+def _materializar(funcion: Callable, elemento):
+    # Se ejecuta en el proceso de trabajo: un generador no se puede enviar al proceso principal, una lista sí
+    resultado = funcion(elemento)
+    return list(resultado) if resultado is not None else None
+
+
+class ErrorPipeline(Exception):
+    """
+    Error en una etapa del pipeline; `etapa` indica el nombre de la etapa y la excepción original queda en __cause__.
+    """
+
+    def __init__(self, etapa: str, error: Exception):
+        super().__init__(f"Error en la etapa '{etapa}' del pipeline: {error}")
+        self.etapa = etapa
+
+
+class Pipeline:
+    """
+    Ejecuta etapas conectadas por colas acotadas, cada una con su propia concurrencia.
+
+    Los elementos pasan a la siguiente etapa en cuanto se procesan, de modo que la extracción, la
+    transformación y la carga se ejecutan al mismo tiempo (mientras se escribe un lote ya se está
+    consultando el siguiente). Con concurrencia mayor a 1 el orden de los elementos no se garantiza.
+
+    Si una etapa falla el pipeline se detiene, las demás etapas dejan de tomar elementos y
+    `ejecutar` lanza ErrorPipeline con la excepción original.
+
+    Ejemplo:
+        pipeline = Pipeline('exportar_productos', [
+            Etapa('consultar', lambda consulta: ejecutar_consulta_por_lotes(conexion, consulta), genera=True),
+            Etapa('transformar', transformar_lote, concurrencia=4, en_procesos=True),
+            Etapa('exportar', exportar_lote, concurrencia=2),
+        ])
+        pipeline.ejecutar([GET_CONSULTA_1_DB])
+    """
+
+    def __init__(self, nombre: str, etapas: list):
+        if not etapas:
+            raise ValueError("El pipeline necesita al menos una etapa.")
+        self.nombre = nombre
+        self.etapas = etapas
+        self.estadisticas = {}
+
+        self._cancelado = threading.Event()
+        self._errores = []
+
+    def ejecutar(self, entradas: Iterable, recolectar: bool = False) -> list:
+        """
+        Procesa los elementos de `entradas` por todas las etapas y espera a que terminen.
+
+        Args:
+            entradas (Iterable): Elementos de la primera etapa (consultas, URLs, lotes...); se consumen a medida que hay espacio en la cola.
+            recolectar (bool): Devuelve los resultados de la última etapa (por defecto se descartan).
+
+        Returns:
+            list: Resultados de la última etapa si recolectar=True, de lo contrario una lista vacía.
+
+        Raises:
+            ErrorPipeline: Si alguna etapa lanzó una excepción.
+        """
+        self._cancelado.clear()
+        self._errores = []
+        self.estadisticas = {etapa.nombre: {'elementos': 0, 'ocupado_s': 0.0} for etapa in self.etapas}
+
+        colas = [queue.Queue(maxsize=etapa.tamano_cola) for etapa in self.etapas]
+        resultados = queue.Queue() if recolectar else None
+        salidas = colas[1:] + [resultados]
+        # Con las métricas activas se expone la cantidad de elementos en espera de cada etapa
+        for etapa, cola in zip(self.etapas, colas):
+            metricas.registrar_cola(f'{self.nombre}.{etapa.nombre}', cola)
+
+        hilos = []
+        ejecutores = []
+        for etapa, entrada, salida in zip(self.etapas, colas, salidas):
+            # Los procesos reciben la configuración del proceso principal y le envían sus registros de log
+            ejecutor = ProcessPoolExecutor(max_workers=etapa.concurrencia, **argumentos_proceso_trabajo()) if etapa.en_procesos else None
+            if ejecutor:
+                ejecutores.append(ejecutor)
+            # Los trabajadores de una etapa comparten un contador: el último en terminar avisa el fin a la siguiente etapa
+            pendientes = [etapa.concurrencia]
+            lock = threading.Lock()
+            for numero in range(etapa.concurrencia):
+                hilo = threading.Thread(
+                    target=self._trabajador, args=(etapa, entrada, salida, ejecutor, pendientes, lock),
+                    name=f'{self.nombre}-{etapa.nombre}-{numero}', daemon=True,
+                )
+                hilo.start()
+                hilos.append(hilo)
+
+        inicio = time.perf_counter()
+        try:
+            for elemento in entradas:
+                if not self._poner(colas[0], elemento):
+                    break
+        except Exception as e:
+            self._registrar_error('entradas', e)
+        finally:
+            for _ in range(self.etapas[0].concurrencia):
+                colas[0].put(_FIN)
+
+            for hilo in hilos:
+                hilo.join()
+            for ejecutor in ejecutores:
+                ejecutor.shutdown(cancel_futures=True)
+            for etapa in self.etapas:
+                metricas.quitar_cola(f'{self.nombre}.{etapa.nombre}')
+
+        self._registrar_estadisticas(time.perf_counter() - inicio)
+
+        if self._errores:
+            etapa, error = self._errores[0]
+            raise ErrorPipeline(etapa, error) from error
+
+        if not recolectar:
+            return []
+        salida = []
+        while not resultados.empty():
+            elemento = resultados.get_nowait()
+            if elemento is not _FIN:
+                salida.append(elemento)
+        return salida
+
+    def _trabajador(self, etapa: Etapa, entrada: queue.Queue, salida: queue.Queue, ejecutor, pendientes: list, lock: threading.Lock):
+        estadisticas = self.estadisticas[etapa.nombre]
+        terminado = False
+        try:
+            while True:
+                elemento = entrada.get()
+                if elemento is _FIN:
+                    terminado = True
+                    break
+                if self._cancelado.is_set():
+                    # Se vacía la cola para no bloquear a la etapa anterior
+                    continue
+
+                inicio = time.perf_counter()
+                try:
+                    if ejecutor and etapa.genera:
+                        resultado = ejecutor.submit(_materializar, etapa.funcion, elemento).result()
+                    elif ejecutor:
+                        resultado = ejecutor.submit(etapa.funcion, elemento).result()
+                    else:
+                        resultado = etapa.funcion(elemento)
+
+                    if salida is not None and resultado is not None:
+                        for item in (resultado if etapa.genera else (resultado,)):
+                            if not self._poner(salida, item):
+                                break
+                except Exception as e:
+                    self._registrar_error(etapa.nombre, e)
+                finally:
+                    with lock:
+                        estadisticas['elementos'] += 1
+                        estadisticas['ocupado_s'] += time.perf_counter() - inicio
+        except BaseException as e:
+            self._errores.append((etapa.nombre, e))
+            raise
+        finally:
+            if not terminado:
+                # El hilo terminó por una excepción: se cancela el pipeline y se vacía la cola de entrada
+                # hasta su marca de fin, para que el productor y las demás etapas no queden esperando
+                self._cancelado.set()
+                while entrada.get() is not _FIN:
+                    pass
+            with lock:
+                pendientes[0] -= 1
+                ultimo = pendientes[0] == 0
+            if ultimo and salida is not None:
+                siguiente = self.etapas.index(etapa) + 1
+                cantidad = self.etapas[siguiente].concurrencia if siguiente < len(self.etapas) else 1
+                for _ in range(cantidad):
+                    salida.put(_FIN)
+
+    def _poner(self, cola: queue.Queue, elemento) -> bool:
+        # Espera a que haya espacio en la cola revisando si el pipeline fue cancelado, para no quedar bloqueado
+        while not self._cancelado.is_set():
+            try:
+                cola.put(elemento, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _registrar_error(self, etapa: str, error: Exception):
+        # Se cancela antes de registrar el log, así un error al escribir el log no deja el pipeline esperando
+        self._errores.append((etapa, error))
+        self._cancelado.set()
+        logger.error("Error en la etapa '%s' del pipeline %s: %s", etapa, self.nombre, error)
+
+    def _registrar_estadisticas(self, duracion: float):
+        eventos = obtener_registro_eventos()
+        for etapa in self.etapas:
+            estadisticas = self.estadisticas[etapa.nombre]
+            logger.info("Pipeline %s, etapa %s: %s elementos, %.3fs ocupada con concurrencia %s.",
+                        self.nombre, etapa.nombre, estadisticas['elementos'], estadisticas['ocupado_s'], etapa.concurrencia)
+            eventos.registrar(ETAPA_PIPELINE, duracion, estado='error' if self._errores else 'ok', filas=estadisticas['elementos'],
+                              pipeline=self.nombre, etapa_pipeline=etapa.nombre, ocupado_s=round(estadisticas['ocupado_s'], 6),
+                              concurrencia=etapa.concurrencia)
@@ -0,0 +1,347 @@
+# Importaciones de la biblioteca estándar de Python
+import os
+import sys
+import time
+import signal
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable
+
+# Importaciones propias
+from utils.logger import logger
+from utils.eventos_ejecucion import obtener_registro_eventos
+
+# Archivo de bloqueo por defecto para que solo se ejecute una instancia del programador
+ARCHIVO_BLOQUEO = 'programador.lock'
+
+# Etapa con la que se registra cada ejecución de un trabajo en el archivo de eventos
+ETAPA_TRABAJO = 'trabajo'
+
+
+class ExpresionCron:
+    """
+    Expresión cron de 5 campos: minuto, hora, día del mes, mes y día de la semana (0 o 7 = domingo).
+
+    Cada campo acepta *, números, listas (1,15), rangos (8-18) y pasos (*/5, 8-18/2).
+    Si se restringen el día del mes y el de la semana, basta con que se cumpla uno de los dos, como en cron.
+
+    Ejemplo:
+        ExpresionCron('*/10 6-22 * * 1-5')  # cada 10 minutos de 6:00 a 22:50, de lunes a viernes
+    """
+
+    RANGOS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expresion: str):
+        campos = expresion.split()
+        if len(campos) != 5:
+            raise ValueError(f"La expresión cron '{expresion}' debe tener 5 campos.")
+        self.expresion = expresion
+        self.minutos, self.horas, self.dias, self.meses, self.dias_semana = (
+            self._interpretar_campo(campo, minimo, maximo) for campo, (minimo, maximo) in zip(campos, self.RANGOS)
+        )
+        if 7 in self.dias_semana:
+            # Como en cron, el domingo se puede escribir como 0 o 7 (por ejemplo 1-7 = toda la semana)
+            self.dias_semana = (self.dias_semana - {7}) | {0}
+        self._dia_libre = campos[2] == '*'
+        self._dia_semana_libre = campos[4] == '*'
+
+    @staticmethod
+    def _interpretar_campo(campo: str, minimo: int, maximo: int) -> set:
+        valores = set()
+        for parte in campo.split(','):
+            rango, _, paso = parte.partition('/')
+            if rango == '*':
+                inicio, fin = minimo, maximo
+            elif '-' in rango:
+                inicio, fin = (int(valor) for valor in rango.split('-'))
+            else:
+                inicio = fin = int(rango)
+            if inicio < minimo or fin > maximo or inicio > fin:
+                raise ValueError(f"El campo cron '{campo}' está fuera del rango {minimo}-{maximo}.")
+            valores.update(range(inicio, fin + 1, int(paso) if paso else 1))
+        return valores
+
+    def _coincide_dia(self, momento: datetime) -> bool:
+        dia_semana = (momento.weekday() + 1) % 7
+        coincide_dia = momento.day in self.dias
+        coincide_semana = dia_semana in self.dias_semana
+        if self._dia_libre or self._dia_semana_libre:
+            return coincide_dia and coincide_semana
+        return coincide_dia or coincide_semana
+
+    def siguiente(self, desde: datetime) -> datetime:
+        """
+        Devuelve el siguiente minuto posterior a `desde` que cumple la expresión.
+        """
+        momento = desde.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = momento + timedelta(days=366 * 4)
+        while momento < limite:
+            if momento.month not in self.meses or not self._coincide_dia(momento):
+                momento = (momento + timedelta(days=1)).replace(hour=0, minute=0)
+            elif momento.hour not in self.horas:
+                momento = (momento + timedelta(hours=1)).replace(minute=0)
+            elif momento.minute not in self.minutos:
+                momento += timedelta(minutes=1)
+            else:
+                return momento
+        raise ValueError(f"La expresión cron '{self.expresion}' no tiene fechas de ejecución.")
+
+
+@dataclass
+class Trabajo:
+    """
+    Trabajo recurrente del programador.
+
+    Atributos:
+        nombre (str): Nombre del trabajo en los logs y en el registro de eventos.
+        funcion (Callable): Función que recibe los recursos compartidos (RecursosCompartidos). Si lanza una
+            excepción o devuelve False la ejecución se registra con estado 'error'.
+        intervalo (float): Segundos entre el inicio de una ejecución y la siguiente.
+        cron (str): Expresión cron, alternativa a intervalo.
+        al_iniciar (bool): Ejecutar el trabajo apenas inicia el programador (solo con intervalo).
+    """
+    nombre: str
+    funcion: Callable
+    intervalo: float = None
+    cron: str = None
+    al_iniciar: bool = True
+    proxima_ejecucion: datetime = field(default=None, init=False)
+
+    def __post_init__(self):
+        if (self.intervalo is None) == (self.cron is None):
+            raise ValueError(f"El trabajo '{self.nombre}' debe tener intervalo o cron (solo uno de los dos).")
+        self._cron = ExpresionCron(self.cron) if self.cron else None
+
+    def programar(self, ahora: datetime, primera_vez: bool = False, inicio: datetime = None):
+        """
+        Calcula la próxima ejecución del trabajo.
+
+        Args:
+            ahora (datetime): Momento actual, al iniciar el programador o al terminar la ejecución anterior.
+            primera_vez (bool): Primera programación, al iniciar el programador.
+            inicio (datetime, opcional): Inicio de la ejecución que acaba de terminar, desde el que se cuenta el intervalo.
+        """
+        if self._cron:
+            self.proxima_ejecucion = self._cron.siguiente(ahora)
+        elif primera_vez and self.al_iniciar:
+            self.proxima_ejecucion = ahora
+        else:
+            # Si la ejecución duró más que el intervalo, la siguiente inicia apenas termina, sin acumular las perdidas
+            self.proxima_ejecucion = max((inicio or ahora) + timedelta(seconds=self.intervalo), ahora)
+
+
+class RecursosCompartidos:
+    """
+    Recursos que se conservan entre las ejecuciones de los trabajos: conexión a la base de datos,
+    sesión HTTP, caché HTTP y un diccionario para datos en memoria (por ejemplo catálogos ya consultados).
+
+    Se crean la primera vez que se solicitan y se cierran al detener el programador.
+    """
+
+    def __init__(self):
+        self.cache = {}
+        self._conexion_bd = None
+        self._sesion_http = None
+        self._cache_http = None
+
+    def obtener_conexion_bd(self):
+        """
+        Devuelve la conexión pyodbc abierta, verificándola con SELECT 1 y reconectando si se perdió.
+        """
+        if self._conexion_bd is not None:
+            try:
+                self._conexion_bd.cursor().execute('SELECT 1').fetchall()
+                return self._conexion_bd
+            except Exception as e:
+                logger.warning(f'Se perdió la conexión a la base de datos, se reconecta: {e}')
+                self._cerrar(self._conexion_bd)
+                self._conexion_bd = None
+
+        from database.conexion_db import conectar_bd_pyodbc
+        from utils.configuracion import obtener_configuracion
+
+        configuracion = obtener_configuracion()
+        self._conexion_bd = conectar_bd_pyodbc(configuracion.USUARIO_DB, configuracion.CONTRASENA_DB, configuracion.SERVIDOR_DB,
+                                               configuracion.NOMBRE_DB, configuracion.INSTANCIA_DB)
+        return self._conexion_bd
+
+    def obtener_sesion_http(self):
+        """
+        Devuelve una requests.Session compartida, que reutiliza las conexiones TCP/TLS entre ejecuciones.
+        """
+        if self._sesion_http is None:
+            import requests
+            self._sesion_http = requests.Session()
+        return self._sesion_http
+
+    def obtener_cache_http(self, **parametros):
+        """
+        Devuelve una CacheHTTP que usa la sesión compartida; los parámetros se aplican la primera vez.
+        """
+        if self._cache_http is None:
+            from utils.api_conexion import CacheHTTP
+            self._cache_http = CacheHTTP(session=self.obtener_sesion_http(), **parametros)
+        return self._cache_http
+
+    def cerrar(self):
+        if self._cache_http is not None:
+            self._cache_http.cerrar()
+        for recurso in (self._conexion_bd, self._sesion_http):
+            if recurso is not None:
+                self._cerrar(recurso)
+        self._conexion_bd = self._sesion_http = self._cache_http = None
+        self.cache.clear()
+
+    @staticmethod
+    def _cerrar(recurso):
+        try:
+            recurso.close()
+        except Exception as e:
+            logger.error(f'Error al cerrar un recurso compartido: {e}')
+
+
+class BloqueoInstancia:
+    """
+    Bloqueo exclusivo sobre un archivo para que solo se ejecute una instancia del programador.
+
+    El sistema operativo libera el bloqueo si el proceso termina de forma inesperada, de modo
+    que un archivo de bloqueo que quedó de una ejecución anterior no impide volver a iniciar.
+    """
+
+    def __init__(self, ruta: str = ARCHIVO_BLOQUEO):
+        self.ruta = ruta
+        self._archivo = None
+
+    def adquirir(self) -> bool:
+        archivo = open(self.ruta, 'a+')
+        try:
+            if sys.platform == 'win32':
+                import msvcrt
+                archivo.seek(0)
+                msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            archivo.close()
+            return False
+
+        # Se deja el PID en el archivo como referencia para saber qué proceso tiene el bloqueo
+        archivo.seek(0)
+        archivo.truncate()
+        archivo.write(str(os.getpid()))
+        archivo.flush()
+        self._archivo = archivo
+        return True
+
+    def liberar(self):
+        if self._archivo is None:
+            return
+        try:
+            if sys.platform == 'win32':
+                import msvcrt
+                self._archivo.seek(0)
+                msvcrt.locking(self._archivo.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._archivo.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._archivo.close()
+            self._archivo = None
+
+
+class Programador:
+    """
+    Ejecuta trabajos recurrentes en un proceso de larga duración.
+
+    Los trabajos se ejecutan uno a la vez en el hilo del programador, por lo que nunca se
+    superponen: si una ejecución dura más que su intervalo, la siguiente inicia apenas termina
+    y las ejecuciones perdidas no se acumulan. Los módulos importados y los recursos
+    compartidos (conexión a la BDD, sesión y caché HTTP) se conservan entre ejecuciones.
+
+    Ejemplo:
+        programador = Programador([Trabajo('sincronizar', main, intervalo=300)])
+        programador.ejecutar()
+    """
+
+    def __init__(self, trabajos: list, ruta_bloqueo: str = ARCHIVO_BLOQUEO):
+        if not trabajos:
+            raise ValueError("El programador necesita al menos un trabajo.")
+        self.trabajos = trabajos
+        self.recursos = RecursosCompartidos()
+        self.bloqueo = BloqueoInstancia(ruta_bloqueo)
+        self._detener = threading.Event()
+
+    def detener(self, *args):
+        """
+        Solicita detener el programador; la ejecución en curso termina antes de salir.
+        """
+        logger.info("Se solicitó detener el programador.")
+        self._detener.set()
+
+    def ejecutar(self, max_ejecuciones: int = None) -> bool:
+        """
+        Ejecuta los trabajos hasta que se llame a detener() o se reciba SIGINT/SIGTERM.
+
+        Args:
+            max_ejecuciones (int, opcional): Detiene el programador después de esta cantidad de ejecuciones (para pruebas).
+
+        Returns:
+            bool: False si ya hay otra instancia en ejecución.
+        """
+        if not self.bloqueo.adquirir():
+            logger.warning(f"Ya hay una instancia del programador en ejecución (archivo de bloqueo {self.bloqueo.ruta}).")
+            return False
+
+        self._registrar_senales()
+        ejecuciones = 0
+        try:
+            ahora = datetime.now()
+            for trabajo in self.trabajos:
+                trabajo.programar(ahora, primera_vez=True)
+                logger.info("Trabajo %s programado, primera ejecución: %s.", trabajo.nombre, trabajo.proxima_ejecucion)
+
+            while not self._detener.is_set():
+                trabajo = min(self.trabajos, key=lambda trabajo: trabajo.proxima_ejecucion)
+                espera = (trabajo.proxima_ejecucion - datetime.now()).total_seconds()
+                if espera > 0 and self._detener.wait(espera):
+                    break
+
+                inicio = datetime.now()
+                self._ejecutar_trabajo(trabajo)
+                trabajo.programar(datetime.now(), inicio=inicio)
+                ejecuciones += 1
+                if max_ejecuciones is not None and ejecuciones >= max_ejecuciones:
+                    break
+        finally:
+            self.recursos.cerrar()
+            self.bloqueo.liberar()
+            logger.info("Programador detenido después de %s ejecuciones.", ejecuciones)
+        return True
+
+    def _ejecutar_trabajo(self, trabajo: Trabajo):
+        eventos = obtener_registro_eventos()
+        eventos.nueva_ejecucion()
+        logger.info("Inicia el trabajo %s (ejecución %s).", trabajo.nombre, eventos.id_ejecucion)
+        inicio = time.perf_counter()
+        estado = 'ok'
+        try:
+            # Una función que maneja sus propios errores (como main) informa la falla devolviendo False
+            if trabajo.funcion(self.recursos) is False:
+                estado = 'error'
+        except Exception as e:
+            # Un error en un trabajo no detiene el programador
+            estado = 'error'
+            logger.exception(f"Error en el trabajo {trabajo.nombre}: {e}")
+        duracion = time.perf_counter() - inicio
+        eventos.registrar(ETAPA_TRABAJO, duracion, estado=estado, trabajo=trabajo.nombre)
+        logger.info("Finaliza el trabajo %s en %.1fs con estado %s.", trabajo.nombre, duracion, estado)
+
+    def _registrar_senales(self):
+        # Las señales solo se pueden registrar desde el hilo principal
+        if threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(signal.SIGINT, self.detener)
+        if hasattr(signal, 'SIGTERM'):
+            signal.signal(signal.SIGTERM, self.detener)
@@ -0,0 +1,206 @@
+# Importaciones de la biblioteca estándar de Python
+from dataclasses import dataclass
+from typing import Iterable, Union
+
+# Importaciones de terceros
+import numpy as np
+import pandas as pd
+
+# Importaciones propias
+from utils.logger import logger
+
+# Columna con los nombres de las columnas que cambiaron en los registros a actualizar
+COLUMNA_CAMBIOS = 'columnas_cambiadas'
+
+
+@dataclass
+class ResultadoConciliacion:
+    """
+    Cambios que se deben aplicar en el destino para que coincida con el origen.
+
+    Atributos:
+        crear (pd.DataFrame): Registros activos del origen que no existen en el destino (llaves y columnas comparadas del origen).
+        actualizar (pd.DataFrame): Registros de ambos lados con alguna columna comparada distinta: llaves, valores del origen,
+            columnas indicadas del destino (por ejemplo su id) y `columnas_cambiadas`.
+        inactivar (pd.DataFrame): Registros activos del destino que están inactivos en el origen (o no existen, con inactivar_ausentes).
+        activar (pd.DataFrame): Registros inactivos del destino que están activos en el origen.
+    """
+    crear: pd.DataFrame
+    actualizar: pd.DataFrame
+    inactivar: pd.DataFrame
+    activar: pd.DataFrame
+
+    def resumen(self) -> dict:
+        return {'crear': len(self.crear), 'actualizar': len(self.actualizar),
+                'inactivar': len(self.inactivar), 'activar': len(self.activar)}
+
+
+def _como_mapeo(columnas: Union[str, Iterable, dict]) -> dict:
+    # Acepta una columna, una lista (mismo nombre en ambos lados) o un diccionario {columna_origen: columna_destino}
+    if isinstance(columnas, str):
+        return {columnas: columnas}
+    if isinstance(columnas, dict):
+        return dict(columnas)
+    return {columna: columna for columna in columnas}
+
+
+def normalizar_columna(serie: pd.Series, minusculas: bool = False) -> pd.Series:
+    """
+    Convierte una columna en texto comparable entre el origen y el destino.
+
+    Los nulos se convierten en '', se quitan los espacios de los extremos (por ejemplo de las columnas
+    CHAR de SQL Server) y los números decimales sin parte decimal se escriben como enteros, para que
+    10, 10.0 y '10' se consideren iguales.
+    """
+    if pd.api.types.is_float_dtype(serie):
+        valores = serie.dropna()
+        if (valores == np.floor(valores)).all():
+            serie = serie.astype('Int64')
+    texto = serie.astype('string').str.strip()
+    if minusculas:
+        texto = texto.str.lower()
+    return texto.fillna('')
+
+
+def _es_numerica(serie: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie)
+
+
+def _comparables(serie_origen: pd.Series, serie_destino: pd.Series, minusculas: bool = False) -> tuple:
+    """
+    Devuelve las dos columnas en un mismo tipo: float64 si ambas son numéricas (no se convierten a texto) o texto normalizado.
+    """
+    if _es_numerica(serie_origen) and _es_numerica(serie_destino):
+        return serie_origen.astype('float64'), serie_destino.astype('float64')
+    return normalizar_columna(serie_origen, minusculas), normalizar_columna(serie_destino, minusculas)
+
+
+def _preparar(origen: pd.DataFrame, destino: pd.DataFrame, columnas: dict, minusculas: set) -> tuple:
+    # columnas: {columna_origen: columna_destino}; ambos resultados usan los nombres del origen en el mismo orden
+    preparado_origen, preparado_destino = {}, {}
+    for columna_origen, columna_destino in columnas.items():
+        preparado_origen[columna_origen], preparado_destino[columna_origen] = _comparables(
+            origen[columna_origen], destino[columna_destino], columna_origen in minusculas)
+    return pd.DataFrame(preparado_origen), pd.DataFrame(preparado_destino)
+
+
+def _indexar(llave: pd.DataFrame, comparadas: pd.DataFrame, activo: pd.Series, lado: str) -> pd.DataFrame:
+    """
+    Reduce un lado a su llave, el hash de las columnas comparadas, el estado activo y la posición de la fila.
+    """
+    indice = pd.Index(llave.iloc[:, 0]) if llave.shape[1] == 1 else pd.MultiIndex.from_frame(llave)
+
+    compacto = pd.DataFrame({
+        # categorize=False: con valores casi todos distintos (correos, documentos) es más rápido no factorizar antes de calcular el hash
+        'hash': pd.util.hash_pandas_object(comparadas, index=False, categorize=False).to_numpy(),
+        'activo': activo.fillna(False).astype(bool).to_numpy() if activo is not None else True,
+        'posicion': np.arange(len(llave)),
+    }, index=indice)
+
+    duplicados = compacto.index.duplicated(keep='last')
+    if duplicados.any():
+        logger.warning("El %s tiene %s llaves duplicadas; se conserva el último registro de cada una.", lado, int(duplicados.sum()))
+        compacto = compacto[~duplicados]
+    return compacto
+
+
+def conciliar(origen: pd.DataFrame, destino: pd.DataFrame, llaves, columnas_comparadas, activo_origen: str = None,
+              activo_destino: str = None, columnas_destino: Iterable = (), inactivar_ausentes: bool = False,
+              sin_mayusculas: Iterable = ()) -> ResultadoConciliacion:
+    """
+    Compara el origen (por ejemplo los usuarios de la BDD) con el destino (los de la API) y devuelve los cambios por aplicar.
+
+    En lugar de unir ambos DataFrames con todas sus columnas, cada lado se reduce a su llave, un hash
+    de 64 bits de las columnas comparadas y su estado activo; los registros se cruzan por la llave con
+    un índice y solo los registros que cambian se copian en los DataFrames del resultado, por lo que
+    la memoria y el tiempo crecen con la cantidad de registros y no con el ancho de las tablas.
+
+    Args:
+        origen (pd.DataFrame): Registros de referencia.
+        destino (pd.DataFrame): Registros actuales del sistema que se va a actualizar.
+        llaves (str, list o dict): Columnas que identifican un registro; un diccionario {columna_origen: columna_destino}
+            si tienen nombres distintos.
+        columnas_comparadas (list o dict): Columnas que determinan si un registro se debe actualizar, con el mismo formato.
+        activo_origen (str, opcional): Columna booleana del origen que indica si el registro está activo (por defecto todos lo están).
+        activo_destino (str, opcional): Columna booleana del destino que indica si el registro está activo.
+        columnas_destino (Iterable, opcional): Columnas del destino que se agregan a actualizar, inactivar y activar (por ejemplo el id).
+        inactivar_ausentes (bool): Inactivar también los registros activos del destino que no existen en el origen.
+        sin_mayusculas (Iterable, opcional): Columnas comparadas sin distinguir mayúsculas (por ejemplo el correo), con los nombres del origen.
+
+    Returns:
+        ResultadoConciliacion: DataFrames crear, actualizar, inactivar y activar.
+
+    Ejemplo:
+        resultado = conciliar(usuarios_edm, usuarios_intrena, llaves='identification_number',
+                              columnas_comparadas=['email', 'mobile', 'location', 'area_id', 'position_id'],
+                              activo_destino='activo', columnas_destino=['id'], sin_mayusculas=['email'])
+    """
+    llaves = _como_mapeo(llaves)
+    columnas = _como_mapeo(columnas_comparadas)
+    columnas_destino = list(columnas_destino)
+    minusculas = set(sin_mayusculas)
+
+    llave_origen, llave_destino = _preparar(origen, destino, llaves, minusculas)
+    comparadas_origen, comparadas_destino = _preparar(origen, destino, columnas, minusculas)
+    compacto_origen = _indexar(llave_origen, comparadas_origen, origen[activo_origen] if activo_origen else None, 'origen')
+    compacto_destino = _indexar(llave_destino, comparadas_destino, destino[activo_destino] if activo_destino else None, 'destino')
+
+    # Posición en el destino de cada llave del origen (-1 si no existe)
+    posiciones = compacto_destino.index.get_indexer(compacto_origen.index)
+    existe = posiciones >= 0
+    activo_o = compacto_origen['activo'].to_numpy()
+    hash_o = compacto_origen['hash'].to_numpy()
+    fila_o = compacto_origen['posicion'].to_numpy()
+
+    en_destino = posiciones[existe]
+    activo_d = compacto_destino['activo'].to_numpy()
+    hash_d = compacto_destino['hash'].to_numpy()
+    fila_d = compacto_destino['posicion'].to_numpy()
+
+    comunes_activo_o = activo_o[existe]
+    comunes_activo_d = activo_d[en_destino]
+    cambiados = (hash_o[existe] != hash_d[en_destino]) & comunes_activo_o
+
+    # Registros del destino que no aparecen en el origen
+    ausentes = np.ones(len(compacto_destino), dtype=bool)
+    ausentes[en_destino] = False
+
+    columnas_origen = list(dict.fromkeys(list(llaves) + list(columnas)))
+    crear = origen.iloc[fila_o[~existe & activo_o]][columnas_origen].reset_index(drop=True)
+
+    actualizar = _registros_a_actualizar(origen, destino, comparadas_origen, comparadas_destino, fila_o[existe][cambiados],
+                                         fila_d[en_destino][cambiados], columnas_origen, columnas_destino)
+
+    posiciones_inactivar = fila_d[en_destino][~comunes_activo_o & comunes_activo_d]
+    if inactivar_ausentes:
+        posiciones_inactivar = np.concatenate([posiciones_inactivar, fila_d[ausentes & activo_d]])
+    columnas_salida_destino = list(dict.fromkeys(list(llaves.values()) + columnas_destino))
+    inactivar = destino.iloc[np.sort(posiciones_inactivar)][columnas_salida_destino].reset_index(drop=True)
+    activar = destino.iloc[fila_d[en_destino][comunes_activo_o & ~comunes_activo_d]][columnas_salida_destino].reset_index(drop=True)
+
+    resultado = ResultadoConciliacion(crear, actualizar, inactivar, activar)
+    logger.info("Conciliación de %s registros del origen con %s del destino: %s", len(origen), len(destino), resultado.resumen())
+    return resultado
+
+
+def _registros_a_actualizar(origen: pd.DataFrame, destino: pd.DataFrame, comparadas_origen: pd.DataFrame,
+                            comparadas_destino: pd.DataFrame, filas_origen: np.ndarray, filas_destino: np.ndarray,
+                            columnas_origen: list, columnas_destino: list) -> pd.DataFrame:
+    actualizar = origen.iloc[filas_origen][columnas_origen].reset_index(drop=True)
+
+    for columna in columnas_destino:
+        nombre = columna if columna not in actualizar.columns else f'{columna}_destino'
+        actualizar[nombre] = destino[columna].to_numpy()[filas_destino]
+
+    # Las columnas que cambiaron se calculan solo sobre los registros a actualizar
+    valores_origen = comparadas_origen.iloc[filas_origen]
+    valores_destino = comparadas_destino.iloc[filas_destino]
+    diferencias = pd.DataFrame(
+        {columna: ~(valores_origen[columna].to_numpy() == valores_destino[columna].to_numpy())
+                  & ~(valores_origen[columna].isna().to_numpy() & valores_destino[columna].isna().to_numpy())
+         for columna in comparadas_origen.columns})
+    if len(diferencias):
+        actualizar[COLUMNA_CAMBIOS] = diferencias.dot(diferencias.columns + ',').str.rstrip(',')
+    else:
+        actualizar[COLUMNA_CAMBIOS] = pd.Series(dtype='string')
+    return actualizar
@@ -0,0 +1,60 @@
+import os
+
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+
+from utils.almacen_datos import AlmacenIntermedio
+
+
+def test_almacen_guarda_reabre_sin_copiar_y_mantiene_el_catalogo(tmp_path):
+    almacen = AlmacenIntermedio(str(tmp_path))
+    df = pd.DataFrame({'sku': ['a', 'b', 'c'], 'cantidad': [1, 2, 3], 'precio': [1.5, 2.5, None]})
+    entrada = almacen.guardar('inventario', df, metadatos={'origen': 'prueba'})
+    almacen.guardar('inventario_parquet', df, formato='parquet')
+    assert entrada['filas'] == 3
+    assert [columna['nombre'] for columna in entrada['columnas']] == ['sku', 'cantidad', 'precio']
+
+    asignados = pa.total_allocated_bytes()
+    tabla = almacen.cargar_tabla('inventario', columnas=['cantidad'])
+    # La tabla apunta al archivo con memory map, no se reserva memoria para los datos
+    assert pa.total_allocated_bytes() == asignados
+    assert tabla.column('cantidad').to_pylist() == [1, 2, 3]
+    pd.testing.assert_frame_equal(almacen.cargar('inventario'), df, check_dtype=False)
+    pd.testing.assert_frame_equal(almacen.cargar('inventario_parquet', columnas=['sku']), df[['sku']], check_dtype=False)
+
+    # Otra instancia (una nueva ejecución) lee el catálogo y descarta los archivos eliminados
+    os.remove(tmp_path / 'inventario_parquet.parquet')
+    catalogo = AlmacenIntermedio(str(tmp_path)).catalogo()
+    assert catalogo['nombre'].tolist() == ['inventario'] and catalogo['filas'].tolist() == [3]
+    with pytest.raises(KeyError):
+        almacen.cargar('inventario_parquet')
+    with pytest.raises(ValueError):
+        almacen.guardar('../fuera', df)
+
+
+def test_obtener_o_generar_reutiliza_el_resultado_guardado(tmp_path):
+    almacen = AlmacenIntermedio(str(tmp_path))
+    consultas = []
+
+    def consultar():
+        consultas.append(1)
+        return pd.DataFrame({'id': [1, 2]})
+
+    almacen.obtener_o_generar('consulta', consultar)
+    assert almacen.obtener_o_generar('consulta', consultar, max_antiguedad=3600)['id'].tolist() == [1, 2]
+    assert len(consultas) == 1
+    almacen.obtener_o_generar('consulta', consultar, max_antiguedad=0)
+    assert len(consultas) == 2
+    assert almacen.eliminar('consulta') and not almacen.existe('consulta')
+
+
+def test_obtener_o_generar_devuelve_el_resultado_aunque_no_se_pueda_guardar(tmp_path):
+    almacen = AlmacenIntermedio(str(tmp_path))
+    # Arrow no convierte una columna con números y textos mezclados
+    df = pd.DataFrame({'codigo': [1, 'A-2']})
+
+    assert almacen.obtener_o_generar('mixto', lambda: df, max_antiguedad=3600) is df
+    assert not almacen.existe('mixto')
+    assert not [archivo for archivo in os.listdir(tmp_path) if archivo.endswith('.tmp')]
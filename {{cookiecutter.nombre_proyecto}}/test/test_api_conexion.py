@@ -0,0 +1,188 @@
+import json
+import threading
+
+import pytest
+from urllib.parse import urlparse, parse_qs
+
+from utils.api_conexion import CacheHTTP, PaginadorDesplazamiento
+
+
+class RespuestaFalsa:
+    def __init__(self, status_code, datos=None, headers=None):
+        self.status_code = status_code
+        self._datos = datos
+        self.headers = headers or {}
+        self.text = ''
+        self.decodificaciones = 0
+
+    def json(self):
+        self.decodificaciones += 1
+        return self._datos
+
+
+class SesionFalsa:
+    """Simula un servidor que responde 304 cuando el ETag enviado coincide."""
+
+    def __init__(self, datos, etag='"v1"'):
+        self.datos = datos
+        self.etag = etag
+        self.solicitudes = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.solicitudes.append(dict(headers or {}))
+        if (headers or {}).get('If-None-Match') == self.etag:
+            return RespuestaFalsa(304)
+        self.ultima = RespuestaFalsa(200, self.datos, {'etag': self.etag, 'link': '<https://x/p2>; rel="next"'})
+        return self.ultima
+
+
+def test_revalida_con_etag_y_devuelve_datos_en_cache(tmp_path):
+    sesion = SesionFalsa({'products': [1, 2, 3]})
+    cache = CacheHTTP(str(tmp_path), session=sesion)
+
+    primera = cache.get('https://x/products.json', headers={'X-Shopify-Access-Token': 't'})
+    segunda = cache.get('https://x/products.json', headers={'X-Shopify-Access-Token': 't'})
+
+    assert primera.json() == segunda.json() == {'products': [1, 2, 3]}
+    assert sesion.solicitudes[1]['If-None-Match'] == '"v1"'
+    assert segunda.revalidada
+    assert segunda.headers['Link'] == '<https://x/p2>; rel="next"'
+
+
+def test_las_respuestas_se_guardan_como_json_y_no_con_pickle(tmp_path):
+    sesion = SesionFalsa({'products': [1, 2, 3]})
+    cache = CacheHTTP(str(tmp_path), session=sesion)
+
+    cache.get('https://x/products.json')
+
+    archivos = [ruta for ruta in tmp_path.iterdir() if ruta.name != 'indice.json']
+    assert len(archivos) == 1 and archivos[0].suffix == '.json'
+    assert json.loads(archivos[0].read_bytes()) == {'products': [1, 2, 3]}
+
+    # Un archivo de datos corrupto se descarta y se vuelve a descargar
+    archivos[0].write_bytes(b'no es json')
+    assert cache.get('https://x/products.json').json() == {'products': [1, 2, 3]}
+    assert 'If-None-Match' not in sesion.solicitudes[-1]
+
+
+def test_revalidar_una_entrada_eliminada_por_otro_hilo_devuelve_none(tmp_path, monkeypatch):
+    sesion = SesionFalsa({'products': [1]})
+    cache = CacheHTTP(str(tmp_path), session=sesion)
+    cache.get('https://x/products.json')
+    clave = cache.generar_clave('https://x/products.json', {})
+    leer_datos = cache._leer_datos
+
+    def leer_y_desalojar(clave_leida):
+        datos = leer_datos(clave_leida)
+        # Otro hilo guarda una respuesta y el límite de tamaño desaloja la entrada
+        with cache._lock:
+            cache._eliminar_entrada(clave_leida)
+        return datos
+
+    monkeypatch.setattr(cache, '_leer_datos', leer_y_desalojar)
+    assert cache.revalidar(clave, 'https://x/products.json') is None
+
+
+def test_ttl_por_endpoint_evita_la_solicitud(tmp_path):
+    sesion = SesionFalsa({'balance': []})
+    cache = CacheHTTP(str(tmp_path), session=sesion, ttl_por_endpoint={r'/inventory/': 60})
+
+    cache.get('https://x/inventory/sku1')
+    respuesta = cache.get('https://x/inventory/sku1')
+
+    assert len(sesion.solicitudes) == 1
+    assert respuesta.desde_cache and not respuesta.revalidada
+
+
+def test_indice_persistente_y_limite_de_tamano(tmp_path):
+    sesion = SesionFalsa({'datos': 'x' * 1000})
+    cache = CacheHTTP(str(tmp_path), tamano_maximo=2500, session=sesion)
+
+    for numero in range(5):
+        cache.get(f'https://x/recurso/{numero}')
+
+    assert cache._tamano_actual <= 2500
+    assert 'https://x/recurso/4' in [entrada['url'] for entrada in cache._indice.values()]
+    assert 'https://x/recurso/0' not in [entrada['url'] for entrada in cache._indice.values()]
+    # El índice no se reescribe en cada solicitud, se guarda al cerrar la caché
+    assert not (tmp_path / 'indice.json').exists()
+    cache.cerrar()
+
+    recargada = CacheHTTP(str(tmp_path), tamano_maximo=2500, session=sesion)
+    assert list(recargada._indice) == list(cache._indice)
+
+
+def test_pagina_descargada_con_la_cache_se_decodifica_una_vez(tmp_path):
+    sesion = SesionFalsa({'results': [1, 2], 'pagination': {'total': 2}})
+    cache = CacheHTTP(str(tmp_path), session=sesion)
+    paginador = PaginadorDesplazamiento(registros_por_pagina=2, session=sesion, cache=cache)
+
+    assert paginador.obtener_todos('https://x/users') == [1, 2]
+    assert sesion.ultima.decodificaciones == 1
+    assert (cache.fallos, cache.aciertos) == (1, 0)
+
+
+def test_decodificar_json_sin_orjson_usa_la_biblioteca_estandar(monkeypatch):
+    from utils import api_conexion
+
+    monkeypatch.setattr(api_conexion, 'orjson', None)
+
+    assert api_conexion.decodificar_json(b'{"products": [{"id": 1}]}') == {'products': [{'id': 1}]}
+
+
+class SesionPaginada:
+    """Simula un endpoint limit/skip en el que se crea un registro al inicio después de la segunda solicitud."""
+
+    def __init__(self, registros):
+        self.registros = list(registros)
+        self.solicitudes = []
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        parametros = parse_qs(urlparse(url).query)
+        limite, desplazamiento = int(parametros['limit'][0]), int(parametros['skip'][0])
+        with self._lock:
+            self.solicitudes.append(desplazamiento)
+            datos = {'results': self.registros[desplazamiento:desplazamiento + limite], 'pagination': {'total': len(self.registros)}}
+            if len(self.solicitudes) == 2:
+                self.registros.insert(0, 'nuevo')
+        return RespuestaFalsa(200, datos)
+
+
+def test_paginador_descarga_en_paralelo_y_corrige_el_cambio_de_total():
+    sesion = SesionPaginada(range(10))
+    paginador = PaginadorDesplazamiento(registros_por_pagina=3, max_concurrencia=1, session=sesion, espera_inicial=0)
+
+    registros = paginador.obtener_todos('https://x/users', params={'active': 'true'})
+
+    assert registros == ['nuevo'] + list(range(10))
+    # Se descargan de nuevo solo las páginas obtenidas con el total anterior (0 y 3)
+    assert sesion.solicitudes[:4] == [0, 3, 6, 9]
+    assert sorted(sesion.solicitudes[4:]) == [0, 3]
+
+
+class SesionPrimeraPaginaVacia:
+    """Simula un endpoint que reporta el total pero devuelve vacías las primeras solicitudes de la página 0."""
+
+    def __init__(self, registros, paginas_vacias):
+        self.registros = list(registros)
+        self.paginas_vacias = paginas_vacias
+
+    def get(self, url, headers=None, timeout=None):
+        parametros = parse_qs(urlparse(url).query)
+        limite, desplazamiento = int(parametros['limit'][0]), int(parametros['skip'][0])
+        pagina = self.registros[desplazamiento:desplazamiento + limite]
+        if desplazamiento == 0 and self.paginas_vacias:
+            self.paginas_vacias -= 1
+            pagina = []
+        return RespuestaFalsa(200, {'results': pagina, 'pagination': {'total': len(self.registros)}})
+
+
+def test_paginador_reintenta_la_primera_pagina_vacia_y_luego_falla():
+    paginador = PaginadorDesplazamiento(registros_por_pagina=3, session=SesionPrimeraPaginaVacia(range(5), 1),
+                                        reintentos=1, espera_inicial=0)
+    assert paginador.obtener_todos('https://x/users') == list(range(5))
+
+    paginador.session = SesionPrimeraPaginaVacia(range(5), 2)
+    with pytest.raises(ValueError):
+        paginador.obtener_todos('https://x/users')
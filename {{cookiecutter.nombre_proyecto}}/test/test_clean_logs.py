@@ -0,0 +1,67 @@
+import os
+import gzip
+import time
+import threading
+from datetime import datetime, timedelta
+
+from utils import clean_logs
+from utils.clean_logs import aplicar_retencion, fecha_en_nombre, iniciar_limpieza_en_segundo_plano
+
+
+def crear_archivo(carpeta, nombre, contenido=b'x' * 1000, dias_atras=0):
+    ruta = carpeta / nombre
+    ruta.write_bytes(contenido)
+    momento = time.time() - dias_atras * 86400
+    os.utime(ruta, (momento, momento))
+    return ruta
+
+
+def fecha(dias_atras):
+    return (datetime.now() - timedelta(days=dias_atras)).strftime('%Y-%m-%d')
+
+
+def test_elimina_por_fecha_y_comprime_los_dias_anteriores(tmp_path):
+    crear_archivo(tmp_path, f'debug_{fecha(40)}.log', dias_atras=1)
+    crear_archivo(tmp_path, f'debug_{fecha(1)}.log.1', dias_atras=1)
+    crear_archivo(tmp_path, f'debug_{fecha(0)}.log')
+    crear_archivo(tmp_path, 'sin_fecha.csv', dias_atras=45)
+    # Archivo de ayer que un proceso iniciado antes de la medianoche sigue escribiendo
+    crear_archivo(tmp_path, f'eventos_{fecha(1)}.jsonl')
+
+    resumen = aplicar_retencion(str(tmp_path), max_dias=30)
+
+    assert sorted(os.listdir(tmp_path)) == sorted([f'debug_{fecha(0)}.log', f'debug_{fecha(1)}.log.1.gz', f'eventos_{fecha(1)}.jsonl'])
+    assert resumen['eliminados'] == 2 and resumen['comprimidos'] == 1
+    with gzip.open(tmp_path / f'debug_{fecha(1)}.log.1.gz') as archivo:
+        assert archivo.read() == b'x' * 1000
+
+
+def test_limite_de_tamano_elimina_los_mas_antiguos_y_conserva_los_de_hoy(tmp_path):
+    for dias in (3, 2, 1):
+        crear_archivo(tmp_path, f'reporte_{fecha(dias).replace("-", "")}_101010.bin', dias_atras=dias)
+    crear_archivo(tmp_path, f'info_{fecha(0)}.log', contenido=b'x' * 5000)
+
+    aplicar_retencion(str(tmp_path), max_tamano_bytes=1500, comprimir=False)
+
+    assert sorted(os.listdir(tmp_path)) == [f'info_{fecha(0)}.log']
+
+
+def test_fecha_en_nombre():
+    assert fecha_en_nombre('eventos_2024-01-31.jsonl').isoformat() == '2024-01-31'
+    assert fecha_en_nombre('archivo_20240131_103000.csv').isoformat() == '2024-01-31'
+    assert fecha_en_nombre('lote_1234567890123.parquet') is None
+
+
+def test_no_inicia_otra_limpieza_mientras_la_anterior_sigue_en_curso(monkeypatch):
+    liberar = threading.Event()
+    limpiezas = []
+    monkeypatch.setattr(clean_logs, 'limpiar_carpetas', lambda **parametros: (limpiezas.append(1), liberar.wait(10)))
+
+    primera = iniciar_limpieza_en_segundo_plano()
+    assert iniciar_limpieza_en_segundo_plano() is primera
+    liberar.set()
+    primera.join(10)
+
+    segunda = iniciar_limpieza_en_segundo_plano()
+    segunda.join(10)
+    assert segunda is not primera and len(limpiezas) == 2
@@ -0,0 +1,52 @@
+import pickle
+
+import pytest
+from decouple import UndefinedValueError
+
+from utils.configuracion import Configuracion, cargar_configuracion
+
+
+def crear_env(tmp_path, contenido):
+    ruta = tmp_path / '.env'
+    ruta.write_text(contenido, encoding='utf-8')
+    return str(ruta)
+
+
+ENV_BASICO = """USUARIO_DB=usuario
+CONTRASENA_DB=secreta
+SERVIDOR_DB=127.0.0.1
+NOMBRE_DB=base
+INSTANCIA_DB=Sqlexpress
+NOMBRE_CARPETA_LOGS=logs
+"""
+
+
+def test_variables_de_entorno_tienen_prioridad_sobre_el_archivo(tmp_path, monkeypatch):
+    monkeypatch.setenv('SERVIDOR_DB', '10.0.0.1')
+    monkeypatch.setenv('NIVEL_LOG', 'info')
+
+    configuracion = cargar_configuracion(crear_env(tmp_path, ENV_BASICO))
+
+    assert configuracion.SERVIDOR_DB == '10.0.0.1'
+    assert configuracion.USUARIO_DB == 'usuario'
+    assert configuracion.NIVEL_LOG == 'INFO'
+    assert configuracion.SHOPIFY_ACCESS_TOKEN is None
+    assert 'secreta' not in repr(configuracion)
+    assert pickle.loads(pickle.dumps(configuracion)) == configuracion
+
+
+def test_valida_todas_las_variables_faltantes(tmp_path, monkeypatch):
+    monkeypatch.delenv('NOMBRE_DB', raising=False)
+    monkeypatch.delenv('INSTANCIA_DB', raising=False)
+    contenido = '\n'.join(linea for linea in ENV_BASICO.splitlines() if not linea.startswith(('NOMBRE_DB', 'INSTANCIA_DB')))
+
+    with pytest.raises(UndefinedValueError, match='INSTANCIA_DB, NOMBRE_DB'):
+        cargar_configuracion(crear_env(tmp_path, contenido))
+
+
+def test_configuracion_es_inmutable(tmp_path):
+    configuracion = cargar_configuracion(crear_env(tmp_path, ENV_BASICO))
+
+    with pytest.raises(AttributeError):
+        configuracion.USUARIO_DB = 'otro'
+    assert isinstance(configuracion, Configuracion)
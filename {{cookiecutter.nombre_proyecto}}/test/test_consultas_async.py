@@ -0,0 +1,51 @@
+import asyncio
+import sqlite3
+import threading
+
+from database.consultas_async import BaseDatosAsync
+
+
+class ConsultaBloqueada:
+    """Consulta que no termina hasta que el event loop la libera; cuenta las consultas en curso."""
+
+    def __init__(self):
+        self.liberar = threading.Event()
+        self.en_curso = 0
+        self.maximo = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, conexion, valor):
+        with self._lock:
+            self.en_curso += 1
+            self.maximo = max(self.maximo, self.en_curso)
+        try:
+            if not self.liberar.wait(5):
+                raise TimeoutError('el event loop no liberó la consulta')
+            return conexion.execute('SELECT ?', (valor,)).fetchone()[0], threading.get_ident()
+        finally:
+            with self._lock:
+                self.en_curso -= 1
+
+
+def test_consultas_no_bloquean_el_event_loop_y_usan_una_conexion_por_hilo():
+    bd = BaseDatosAsync(lambda: sqlite3.connect(':memory:', check_same_thread=False), max_hilos=2)
+    consulta = ConsultaBloqueada()
+
+    async def ejecutar():
+        async with bd:
+            consultas = asyncio.gather(*(bd.ejecutar(consulta, numero) for numero in range(4)))
+            # Mientras las consultas esperan en los hilos el event loop sigue ejecutando esta corrutina;
+            # si las consultas lo bloquearan nunca se liberarían
+            for _ in range(500):
+                if consulta.en_curso == 2:
+                    break
+                await asyncio.sleep(0.01)
+            en_curso = consulta.en_curso
+            consulta.liberar.set()
+            return en_curso, await consultas
+
+    en_curso, resultados = asyncio.run(ejecutar())
+
+    assert en_curso == 2 and consulta.maximo == 2
+    assert [valor for valor, _ in resultados] == [0, 1, 2, 3]
+    assert len({hilo for _, hilo in resultados}) == 2
@@ -0,0 +1,37 @@
+import json
+
+from services.data_organization import transformar_en_paralelo, concatenar_tablas, aplanar_balances_vtex
+from utils.utilidades import convert_list_to_data_frame
+
+
+PRODUCTOS = [
+    {'id': numero, 'title': f'Producto {numero}', 'variants': [{'sku': f'SKU{numero}{variante}', 'inventory_item_id': numero * 10 + variante} for variante in range(numero % 3)]}
+    for numero in range(1, 30)
+]
+
+
+def test_paginas_en_disco_se_transforman_en_procesos_y_conservan_el_orden(tmp_path):
+    rutas = []
+    for inicio in range(0, len(PRODUCTOS), 10):
+        ruta = tmp_path / f'pagina_{inicio}.json'
+        ruta.write_text(json.dumps({'products': PRODUCTOS[inicio:inicio + 10]}), encoding='utf-8')
+        rutas.append(str(ruta))
+
+    resultados = transformar_en_paralelo(rutas, procesos=2, carpeta_salida=str(tmp_path / 'parquet'))
+    df = concatenar_tablas(resultados).to_pandas()
+
+    esperado = convert_list_to_data_frame(PRODUCTOS)
+    assert df['sku'].tolist() == esperado['sku'].tolist()
+    assert df['inventory_item_id'].tolist() == esperado['inventory_item_id'].tolist()
+
+
+def test_balances_vtex_una_fila_por_bodega():
+    inventarios = [
+        {'skuId': '1', 'balance': [{'warehouseId': 'b1', 'totalQuantity': 5}, {'warehouseId': 'b2', 'totalQuantity': 0}]},
+        {'skuId': '2', 'balance': []},
+    ]
+
+    tabla = transformar_en_paralelo([inventarios], aplanar_balances_vtex, procesos=1)[0]
+
+    assert tabla.column('warehouseId').to_pylist() == ['b1', 'b2']
+    assert tabla.column('totalQuantity').to_pylist() == [5, 0]
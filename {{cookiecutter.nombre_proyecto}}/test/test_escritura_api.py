@@ -0,0 +1,102 @@
+import json
+import threading
+from urllib.parse import unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pandas as pd
+
+from utils.escritura_api import EscritorAPI, OperacionMasiva, dividir_en_lotes
+
+
+class _ManejadorAPI(BaseHTTPRequestHandler):
+    solicitudes = []
+
+    def _responder(self):
+        cuerpo = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        _ManejadorAPI.solicitudes.append((self.command, self.path, self.headers.get('Idempotency-Key'), cuerpo))
+        intentos = sum(1 for solicitud in _ManejadorAPI.solicitudes if solicitud[1] == self.path)
+
+        # El usuario 2 recibe un 429 en el primer intento, el 3 siempre falla con 400
+        # y los endpoints masivos rechazan más de 4 ids por solicitud con 414
+        if unquote(self.path).count(',') >= 4:
+            codigo, respuesta = 414, {}
+        elif self.path == '/users' and json.loads(cuerpo)['id'] == 3:
+            codigo, respuesta = 400, {'error': 'email inválido'}
+        elif self.path == '/users' and json.loads(cuerpo)['id'] == 2 and not getattr(self.server, 'reintentado', False):
+            self.server.reintentado = True
+            codigo, respuesta = 429, {}
+        else:
+            codigo, respuesta = 200, {'ok': True, 'intentos': intentos}
+
+        contenido = json.dumps(respuesta).encode()
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', str(len(contenido)))
+        self.end_headers()
+        self.wfile.write(contenido)
+
+    do_POST = do_PUT = _responder
+
+    def log_message(self, *args):
+        pass
+
+
+def test_escritura_con_reintentos_idempotencia_y_endpoint_masivo():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _ManejadorAPI)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    _ManejadorAPI.solicitudes = []
+    try:
+        escritor = EscritorAPI(f'http://127.0.0.1:{servidor.server_port}/', {'x-api-key': 'clave'},
+                               max_concurrencia=4, espera_inicial=0.01)
+        usuarios = pd.DataFrame({'id': [1, 2, 3, 4], 'email': ['a@x.com', 'b@x.com', None, 'd@x.com']}, index=[10, 11, 12, 13])
+
+        resultado = escritor.escribir(usuarios, 'POST', 'users')
+        assert resultado['estado'].tolist() == ['ok', 'ok', 'error', 'ok']
+        assert resultado.index.tolist() == [10, 11, 12, 13]
+        assert resultado.loc[11, 'intentos'] == 2 and resultado.loc[12, 'codigo_http'] == 400
+        # El reintento se envía con la misma llave de idempotencia y los nulos se envían como null
+        llaves_usuario_2 = {llave for _, _, llave, cuerpo in _ManejadorAPI.solicitudes if json.loads(cuerpo)['id'] == 2}
+        assert llaves_usuario_2 == {resultado.loc[11, 'llave_idempotencia']}
+        assert {'id': 3, 'email': None} in [json.loads(cuerpo) for *_, cuerpo in _ManejadorAPI.solicitudes]
+
+        _ManejadorAPI.solicitudes = []
+        masiva = OperacionMasiva(url=lambda filas: 'users/disable/[' + ','.join(str(fila['id']) for fila in filas) + ']', tamano_lote=3)
+        resultado = escritor.escribir(usuarios, masiva=masiva)
+        assert sorted(unquote(path) for _, path, _, _ in _ManejadorAPI.solicitudes) == ['/users/disable/[1,2,3]', '/users/disable/[4]']
+        assert (resultado['estado'] == 'ok').all()
+
+        # Repetir la operación es una operación nueva: no reutiliza las llaves de la anterior
+        llaves = {llave for _, _, llave, _ in _ManejadorAPI.solicitudes}
+        _ManejadorAPI.solicitudes = []
+        escritor.escribir(usuarios, masiva=masiva)
+        assert len(llaves) == 2 and llaves.isdisjoint(llave for _, _, llave, _ in _ManejadorAPI.solicitudes)
+        escritor.cerrar()
+    finally:
+        servidor.shutdown()
+
+
+def test_dividir_en_lotes_por_longitud_y_maximo_del_servidor():
+    # '1,22,3' ocupa 6 caracteres; un valor que no cabe queda solo en su lote
+    assert dividir_en_lotes([1, 2, 1, 1], 6) == [range(0, 3), range(3, 4)]
+    assert dividir_en_lotes([1, 1, 1, 1, 1], 100, max_por_lote=2) == [range(0, 2), range(2, 4), range(4, 5)]
+    assert dividir_en_lotes([10, 1], 5) == [range(0, 1), range(1, 2)]
+
+
+def test_escribir_ids_divide_los_lotes_rechazados_por_tamano():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _ManejadorAPI)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    _ManejadorAPI.solicitudes = []
+    try:
+        escritor = EscritorAPI(f'http://127.0.0.1:{servidor.server_port}/', max_concurrencia=4, espera_inicial=0.01)
+        resultado = escritor.escribir_ids(range(1, 13), 'users/disable/[{ids}]', max_por_lote=8)
+
+        assert (resultado['estado'] == 'ok').all() and resultado['id'].tolist() == list(range(1, 13))
+        # Lotes de 8 y 4 ids; el de 8 se rechaza con 414 y se divide en dos de 4
+        rutas = sorted(unquote(path) for _, path, _, _ in _ManejadorAPI.solicitudes)
+        assert rutas == ['/users/disable/[1,2,3,4,5,6,7,8]', '/users/disable/[1,2,3,4]',
+                         '/users/disable/[5,6,7,8]', '/users/disable/[9,10,11,12]']
+        assert resultado['lote'].tolist() == [0] * 4 + [1] * 4 + [2] * 4
+        escritor.cerrar()
+    finally:
+        servidor.shutdown()
@@ -0,0 +1,41 @@
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from utils import eventos_ejecucion
+from utils.eventos_ejecucion import RegistroEventos, leer_eventos, obtener_registro_eventos
+
+
+def _registrar_en_proceso(numero: int) -> int:
+    obtener_registro_eventos().registrar('proceso', 0.01, filas=numero)
+    return numero
+
+
+def test_eventos_de_varios_hilos_y_procesos_se_escriben_completos(tmp_path, monkeypatch):
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        pytest.skip('los procesos de trabajo heredan el registro solo con fork')
+    registro = RegistroEventos(str(tmp_path), id_ejecucion='prueba')
+    monkeypatch.setattr(eventos_ejecucion, '_registro_eventos', registro)
+
+    def registrar(hilo):
+        for numero in range(200):
+            registro.registrar('hilo', 0.001, filas=numero, hilo=hilo)
+
+    hilos = [threading.Thread(target=registrar, args=(hilo,)) for hilo in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert registro.esperar(timeout=10)
+    assert len(leer_eventos(str(registro.ruta), 'prueba')) == 800
+
+    # Los procesos de trabajo escriben sus eventos antes de terminar
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('fork')) as ejecutor:
+        assert sorted(ejecutor.map(_registrar_en_proceso, range(3))) == [0, 1, 2]
+    registro.cerrar()
+
+    eventos = leer_eventos(str(registro.ruta), 'prueba')
+    assert len(eventos) == 803
+    assert sorted(evento['filas'] for evento in eventos if evento['etapa'] == 'proceso') == [0, 1, 2]
@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import subprocess
+import logging
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.logger import ArchivoLogDiarioHandler, logger, argumentos_proceso_trabajo
+
+
+def crear_registro(mensaje, momento=None, nivel=logging.INFO):
+    registro = logging.LogRecord('prueba', nivel, __file__, 1, mensaje, None, None)
+    if momento is not None:
+        registro.created = momento
+    return registro
+
+
+def test_cambia_de_archivo_despues_de_la_medianoche(tmp_path):
+    handler = ArchivoLogDiarioHandler(tmp_path / 'info.log')
+    manana = datetime.now() + timedelta(days=1)
+
+    handler.handle(crear_registro('hoy'))
+    handler.handle(crear_registro('mañana', manana.timestamp()))
+    handler.close()
+
+    archivo_hoy = tmp_path / f"info_{datetime.now().strftime('%Y-%m-%d')}.log"
+    archivo_manana = tmp_path / f"info_{manana.strftime('%Y-%m-%d')}.log"
+    assert archivo_hoy.read_text(encoding='utf-8') == 'hoy\n'
+    assert archivo_manana.read_text(encoding='utf-8') == 'mañana\n'
+
+
+def test_rota_por_tamano_verificando_por_lotes(tmp_path):
+    handler = ArchivoLogDiarioHandler(tmp_path / 'debug.log', max_bytes=1000, backup_count=2, registros_por_verificacion=5)
+
+    for numero in range(100):
+        handler.handle(crear_registro(f'{numero:03d}' + 'x' * 46))
+    handler.close()
+
+    nombres = sorted(os.listdir(tmp_path))
+    assert len(nombres) == 3 and nombres[1].endswith('.log.1') and nombres[2].endswith('.log.2')
+    assert all(os.path.getsize(tmp_path / nombre) <= 1000 for nombre in nombres)
+
+
+def test_buffer_se_escribe_por_intervalo_y_con_errores(tmp_path):
+    handler = ArchivoLogDiarioHandler(tmp_path / 'info.log', intervalo_flush=0.05)
+    ruta = handler.baseFilename
+
+    handler.handle(crear_registro('info'))
+    handler.handle(crear_registro('error', nivel=logging.ERROR))
+    assert open(ruta, encoding='utf-8').read() == 'info\nerror\n'
+
+    handler.handle(crear_registro('pendiente'))
+    time.sleep(0.2)
+    assert open(ruta, encoding='utf-8').read().endswith('pendiente\n')
+    handler.close()
+
+
+def _registrar_en_proceso(mensaje):
+    logger.warning(mensaje)
+    return os.getpid()
+
+
+def test_procesos_de_trabajo_envian_sus_registros_al_proceso_principal():
+    recibidos = []
+
+    class _Captura(logging.Handler):
+        def emit(self, record):
+            recibidos.append((record.process, record.getMessage()))
+
+    captura = _Captura()
+    logger.addHandler(captura)
+    try:
+        with ProcessPoolExecutor(max_workers=1, **argumentos_proceso_trabajo()) as ejecutor:
+            pid = ejecutor.submit(_registrar_en_proceso, 'desde el proceso de trabajo').result()
+        esperado = (pid, 'desde el proceso de trabajo')
+        limite = time.monotonic() + 5
+        while esperado not in recibidos and time.monotonic() < limite:
+            time.sleep(0.05)
+    finally:
+        logger.removeHandler(captura)
+
+    assert esperado in recibidos
+
+
+def test_sin_env_valido_el_logger_escribe_en_consola_sin_lanzar_excepciones():
+    # Se ejecuta en otro proceso porque el logger de este proceso ya está configurado
+    codigo = (
+        "from decouple import UndefinedValueError\n"
+        "import utils.configuracion as configuracion\n"
+        "def sin_env(ruta_env=None):\n"
+        "    raise UndefinedValueError('Faltan las variables de entorno NOMBRE_CARPETA_LOGS')\n"
+        "configuracion.cargar_configuracion = sin_env\n"
+        "from utils.logger import logger\n"
+        "logger.info('primer mensaje')\n"
+        "logger.error('segundo mensaje')\n"
+        "print('terminado')\n"
+    )
+    proyecto = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    resultado = subprocess.run([sys.executable, '-c', codigo], cwd=proyecto, capture_output=True, text=True, timeout=30)
+
+    assert resultado.returncode == 0
+    assert resultado.stdout.strip() == 'terminado'
+    assert 'Faltan las variables de entorno' in resultado.stderr
+    assert 'INFO - primer mensaje' in resultado.stderr and 'ERROR - segundo mensaje' in resultado.stderr
+    # El error de configuración se informa una sola vez
+    assert resultado.stderr.count('--- Logging error ---') == 1
@@ -0,0 +1,50 @@
+import queue
+import socket
+import urllib.request
+
+from utils import metricas
+from utils.eventos_ejecucion import RegistroEventos
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as conexion:
+        conexion.bind(('127.0.0.1', 0))
+        return conexion.getsockname()[1]
+
+
+def test_metricas_se_alimentan_de_los_eventos_y_se_exponen(tmp_path):
+    puerto = _puerto_libre()
+    assert metricas.iniciar_metricas(puerto)
+    try:
+        eventos = RegistroEventos(str(tmp_path))
+        with eventos.medir('prueba_api', endpoint='https://x/api/skus/123?a=1') as evento:
+            assert metricas.EN_CURSO.valor(etapa='prueba_api') == 1
+            evento['codigo_http'] = 429
+        with eventos.medir('prueba_api', endpoint='https://x/api/skus/456') as evento:
+            evento['codigo_http'] = 200
+            evento['bytes'] = 2048
+        eventos.registrar('prueba_fetch', 0.2, filas=1500)
+        cola = queue.Queue()
+        cola.put(1)
+        metricas.registrar_cola('prueba.etapa', cola)
+
+        with urllib.request.urlopen(f'http://127.0.0.1:{puerto}/metrics', timeout=5) as respuesta:
+            texto = respuesta.read().decode('utf-8')
+
+        assert 'proceso_respuestas_http_total{etapa="prueba_api",codigo="429"} 1' in texto
+        assert 'proceso_filas_total{etapa="prueba_fetch"} 1500' in texto
+        assert 'proceso_bytes_total{etapa="prueba_api"} 2048' in texto
+        assert 'proceso_en_curso{etapa="prueba_api"} 0' in texto
+        assert 'proceso_profundidad_cola{cola="prueba.etapa"} 1' in texto
+        # Las dos solicitudes se agrupan en el mismo endpoint sin el id
+        assert 'proceso_duracion_segundos_count{etapa="prueba_api",endpoint="/api/skus/:id"} 2' in texto
+        assert 'proceso_duracion_segundos_bucket{etapa="prueba_fetch",endpoint="",le="0.25"} 1' in texto
+        assert 'proceso_duracion_segundos_bucket{etapa="prueba_fetch",endpoint="",le="0.1"} 0' in texto
+        eventos.cerrar()
+    finally:
+        metricas.quitar_cola('prueba.etapa')
+        ruta = metricas.finalizar_metricas(str(tmp_path))
+
+    assert not metricas.esta_activo()
+    with open(ruta, encoding='utf-8') as archivo:
+        assert '# TYPE proceso_duracion_segundos histogram' in archivo.read()
@@ -0,0 +1,93 @@
+import email
+import socket
+import logging
+from email import policy
+
+import pandas as pd
+# Servidor SMTP local de las pruebas, se instala con requirements-dev.txt
+from aiosmtpd import controller
+
+from utils.notificaciones import NotificadorCorreo, CacheDestinatarios, Destinatarios
+
+
+class _BuzonSMTP:
+    def __init__(self, rechazados=()):
+        self.mensajes = []
+        self.rechazados = rechazados
+        self.destinatarios_recibidos = 0
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        self.destinatarios_recibidos += 1
+        if address in self.rechazados:
+            return '550 5.1.1 Destinatario desconocido'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.mensajes.append((session.peer, envelope.rcpt_tos, email.message_from_bytes(envelope.content, policy=policy.default)))
+        return '250 OK'
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as conexion:
+        conexion.bind(('127.0.0.1', 0))
+        return conexion.getsockname()[1]
+
+
+def test_notificador_reutiliza_la_conexion_y_agrupa_los_errores():
+    buzon = _BuzonSMTP()
+    servidor = controller.Controller(buzon, hostname='127.0.0.1', port=_puerto_libre())
+    servidor.start()
+    try:
+        consulta = pd.DataFrame({'Destinatarios': ['a@x.com;b@x.com'], 'DestinatariosCopia': [None],
+                                 'DestinatariosCopiaOculta': ['oculto@x.com']})
+        destinatarios = CacheDestinatarios(lambda: consulta)
+        notificador = NotificadorCorreo('127.0.0.1', servidor.port, 'procesos@x.com', destinatarios, timeout=5)
+
+        logger_prueba = logging.getLogger('prueba_notificaciones')
+        logger_prueba.propagate = False
+        logger_prueba.addHandler(notificador.manejador_log())
+        logger_prueba.error('Error HTTP 500 en users')
+        logger_prueba.error('Error HTTP 500 en users')
+        logger_prueba.error('Timeout en la base de datos')
+        logger_prueba.warning('No se agrega al resumen')
+
+        notificador.enviar('Proceso iniciado', 'uno')
+        notificador.enviar('Proceso en curso', 'dos')
+        assert notificador.enviar_resumen_errores('Errores de la sincronización')
+        assert not notificador.enviar_resumen_errores()
+        assert notificador.esperar(10)
+
+        assert len(buzon.mensajes) == 3 and notificador.conexiones == 1
+        assert len({peer for peer, _, _ in buzon.mensajes}) == 1
+        assert destinatarios.consultas == 1
+        assert buzon.mensajes[0][1] == ['a@x.com', 'b@x.com', 'oculto@x.com']
+        resumen = buzon.mensajes[2][2]
+        assert resumen['Subject'] == 'Errores de la sincronización (3)' and 'Bcc' not in resumen
+        cuerpo = resumen.get_content()
+        assert '(x2' in cuerpo and 'Timeout en la base de datos' in cuerpo and 'No se agrega' not in cuerpo
+
+        # Si el servidor cerró la conexión se abre una nueva y el correo se envía
+        notificador._smtp.close()
+        notificador.enviar('Proceso finalizado', 'tres')
+        notificador.cerrar()
+        assert len(buzon.mensajes) == 4 and notificador.conexiones == 2 and notificador.fallidos == 0
+    finally:
+        servidor.stop()
+
+
+def test_destinatario_rechazado_no_se_reintenta():
+    buzon = _BuzonSMTP(rechazados=('nadie@x.com',))
+    servidor = controller.Controller(buzon, hostname='127.0.0.1', port=_puerto_libre())
+    servidor.start()
+    try:
+        notificador = NotificadorCorreo('127.0.0.1', servidor.port, 'procesos@x.com', timeout=5, reintentos=3)
+        notificador.enviar('Sin destinatario válido', 'uno', Destinatarios.desde_texto('nadie@x.com'))
+        notificador.enviar('Proceso finalizado', 'dos', Destinatarios.desde_texto('a@x.com'))
+        notificador.cerrar()
+
+        # El rechazo es permanente: un solo intento y la misma conexión para el siguiente correo
+        assert notificador.fallidos == 1 and notificador.enviados == 1 and notificador.conexiones == 1
+        assert buzon.destinatarios_recibidos == 2 and len(buzon.mensajes) == 1
+    finally:
+        servidor.stop()
@@ -0,0 +1,69 @@
+import os
+import json
+import asyncio
+
+import pytest
+
+from utils import perfilado
+from utils.perfilado import perfilar, medir, agregar_bytes
+
+
+@perfilar(nombre='descargar')
+def _descargar(tamano, fallar=False):
+    agregar_bytes(tamano)
+    if fallar:
+        raise ValueError('falla')
+    return tamano
+
+
+@perfilar(nombre='consultar_async', bytes_resultado=len)
+async def _consultar_async(filas):
+    await asyncio.sleep(0)
+    return list(range(filas))
+
+
+def test_perfilado_registra_llamadas_bytes_y_errores_solo_si_esta_activo(tmp_path):
+    perfilado.reiniciar()
+    _descargar(10)
+    with medir('bloque') as medicion:
+        medicion.agregar_bytes(5)
+    assert perfilado.resumen() == []
+
+    assert perfilado.iniciar_perfilado('tiempos,cprofile,tracemalloc') == ('tiempos', 'cprofile', 'tracemalloc')
+    try:
+        for tamano in (100, 200, 300):
+            _descargar(tamano)
+        with pytest.raises(ValueError):
+            _descargar(1, fallar=True)
+
+        async def consultas():
+            await asyncio.gather(*(_consultar_async(filas) for filas in (2, 3)))
+        asyncio.run(consultas())
+
+        with medir('bloque') as medicion:
+            medicion.agregar_bytes(5)
+
+        filas = {fila['nombre']: fila for fila in perfilado.resumen()}
+        assert filas['descargar']['llamadas'] == 4 and filas['descargar']['errores'] == 1
+        assert filas['descargar']['bytes'] == 601
+        assert filas['consultar_async']['llamadas'] == 2 and filas['consultar_async']['bytes'] == 5
+        assert filas['bloque']['bytes'] == 5
+        assert filas['descargar']['p95_ms'] <= filas['descargar']['maximo_ms']
+    finally:
+        archivos = perfilado.finalizar_perfilado(tmp_path)
+        perfilado.reiniciar()
+
+    assert not perfilado.esta_activo()
+    nombres = sorted(os.path.basename(archivo).split('_')[0] for archivo in archivos)
+    assert nombres == ['memoria', 'perfil', 'perfil', 'perfilado']
+    with open([archivo for archivo in archivos if archivo.endswith('.json')][0], encoding='utf-8') as archivo:
+        assert {fila['nombre'] for fila in json.load(archivo)} == {'descargar', 'consultar_async', 'bloque'}
+
+
+def test_interpretar_modos():
+    assert perfilado.interpretar_modos(None) == ()
+    assert perfilado.interpretar_modos('false') == ()
+    assert perfilado.interpretar_modos('1') == ('tiempos',)
+    assert perfilado.interpretar_modos(' Tiempos , cprofile ') == ('tiempos', 'cprofile')
+    with pytest.raises(ValueError):
+        perfilado.interpretar_modos('tiempos,otro')
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from services import pipeline as modulo_pipeline
+from services.pipeline import Pipeline, Etapa, ErrorPipeline
+
+
+class Concurrencia:
+    """Cuenta las llamadas en curso de una etapa y guarda el máximo."""
+
+    def __init__(self):
+        self.en_curso = 0
+        self.maximo = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.en_curso += 1
+            self.maximo = max(self.maximo, self.en_curso)
+
+    def __exit__(self, *error):
+        with self._lock:
+            self.en_curso -= 1
+
+
+def generar_partes(numero):
+    # Nivel de módulo para que la etapa se pueda ejecutar en procesos
+    for parte in range(3):
+        yield numero * 10 + parte
+
+
+def test_etapa_en_procesos_que_devuelve_un_generador():
+    pipeline = Pipeline('prueba_procesos', [
+        Etapa('generar', generar_partes, concurrencia=2, en_procesos=True, genera=True),
+        Etapa('cargar', lambda valor: valor),
+    ])
+
+    assert sorted(pipeline.ejecutar(range(3), recolectar=True)) == [0, 1, 2, 10, 11, 12, 20, 21, 22]
+    assert pipeline.estadisticas['cargar']['elementos'] == 9
+
+
+def test_etapas_se_ejecutan_en_paralelo_y_entregan_todos_los_elementos():
+    # Cada llamada espera a otra de su etapa: si la etapa no procesa dos elementos a la vez la barrera
+    # vence y el pipeline falla, sin depender de la velocidad de la máquina
+    barrera_extraer, barrera_cargar = threading.Barrier(2, timeout=5), threading.Barrier(2, timeout=5)
+    concurrencia_extraer, concurrencia_cargar = Concurrencia(), Concurrencia()
+
+    def extraer(numero):
+        with concurrencia_extraer:
+            barrera_extraer.wait()
+            return [numero * 10 + parte for parte in range(2)]
+
+    def cargar(valor):
+        with concurrencia_cargar:
+            barrera_cargar.wait()
+            return valor
+
+    pipeline = Pipeline('prueba', [
+        Etapa('extraer', extraer, concurrencia=2, genera=True),
+        Etapa('cargar', cargar, concurrencia=4, tamano_cola=2),
+    ])
+
+    resultados = pipeline.ejecutar(range(4), recolectar=True)
+
+    assert sorted(resultados) == [0, 1, 10, 11, 20, 21, 30, 31]
+    assert concurrencia_extraer.maximo == 2
+    assert 2 <= concurrencia_cargar.maximo <= 4
+    assert pipeline.estadisticas['cargar']['elementos'] == 8
+
+
+def test_error_en_una_etapa_detiene_el_pipeline():
+    def fallar(numero):
+        if numero == 3:
+            raise ValueError('registro inválido')
+        return numero
+
+    pipeline = Pipeline('prueba_error', [Etapa('validar', fallar), Etapa('cargar', lambda numero: numero)])
+
+    with pytest.raises(ErrorPipeline, match="validar") as error:
+        pipeline.ejecutar(range(1000))
+
+    assert isinstance(error.value.__cause__, ValueError)
+    assert pipeline.estadisticas['validar']['elementos'] < 1000
+
+
+
+# El hilo del trabajador termina con la excepción del log después de cancelar el pipeline
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_error_al_registrar_el_log_no_deja_el_pipeline_esperando(monkeypatch):
+    def log_con_error(*args, **kwargs):
+        raise RuntimeError('no se pudo escribir el log')
+
+    def fallar(numero):
+        raise ValueError('registro inválido')
+
+    monkeypatch.setattr(modulo_pipeline.logger, 'error', log_con_error)
+    pipeline = Pipeline('prueba_log', [Etapa('validar', fallar, tamano_cola=1), Etapa('cargar', lambda numero: numero, tamano_cola=1)])
+    errores = []
+
+    def ejecutar():
+        try:
+            pipeline.ejecutar(range(1000))
+        except ErrorPipeline as e:
+            errores.append(e)
+
+    hilo = threading.Thread(target=ejecutar, daemon=True)
+    hilo.start()
+    hilo.join(10)
+
+    assert not hilo.is_alive()
+    assert isinstance(errores[0].__cause__, ValueError)
@@ -0,0 +1,69 @@
+from datetime import datetime
+
+from services.programador import ExpresionCron, Programador, Trabajo, BloqueoInstancia
+from utils import eventos_ejecucion
+from utils.eventos_ejecucion import RegistroEventos, leer_eventos
+
+
+def test_expresion_cron_calcula_la_siguiente_ejecucion():
+    cada_15_en_horario = ExpresionCron('*/15 8-18 * * 1-5')
+
+    # Viernes 17:50 -> viernes 18:00
+    assert cada_15_en_horario.siguiente(datetime(2024, 5, 31, 17, 50, 30)) == datetime(2024, 5, 31, 18, 0)
+    # Viernes 18:45 -> lunes 8:00
+    assert cada_15_en_horario.siguiente(datetime(2024, 5, 31, 18, 45)) == datetime(2024, 6, 3, 8, 0)
+    # Día 1 del mes o domingos (basta con que se cumpla uno de los dos)
+    assert ExpresionCron('0 6 1 * 0').siguiente(datetime(2024, 6, 1, 7, 0)) == datetime(2024, 6, 2, 6, 0)
+    # 7 también es domingo
+    assert ExpresionCron('0 6 * * 7').siguiente(datetime(2024, 6, 1, 7, 0)) == datetime(2024, 6, 2, 6, 0)
+    assert ExpresionCron('0 6 * * 5-7').dias_semana == {5, 6, 0}
+
+
+def test_intervalo_se_cuenta_desde_el_inicio_de_la_ejecucion():
+    trabajo = Trabajo('a', print, intervalo=300)
+
+    # Una ejecución de 2 minutos: la siguiente inicia 5 minutos después del inicio
+    trabajo.programar(datetime(2024, 6, 1, 8, 2), inicio=datetime(2024, 6, 1, 8, 0))
+    assert trabajo.proxima_ejecucion == datetime(2024, 6, 1, 8, 5)
+    # Una ejecución de 12 minutos: la siguiente inicia apenas termina, sin repetir las perdidas
+    trabajo.programar(datetime(2024, 6, 1, 8, 17), inicio=datetime(2024, 6, 1, 8, 5))
+    assert trabajo.proxima_ejecucion == datetime(2024, 6, 1, 8, 17)
+
+
+def test_trabajos_no_se_superponen_y_el_bloqueo_es_exclusivo(tmp_path):
+    ruta_bloqueo = str(tmp_path / 'programador.lock')
+    en_curso = []
+    maximo = []
+    recursos = []
+
+    def trabajo(recursos_compartidos):
+        en_curso.append(1)
+        maximo.append(len(en_curso))
+        recursos.append(recursos_compartidos)
+        # Se mantiene el bloqueo mientras el programador está en ejecución
+        assert not BloqueoInstancia(ruta_bloqueo).adquirir()
+        en_curso.pop()
+
+    programador = Programador([Trabajo('a', trabajo, intervalo=0), Trabajo('b', trabajo, intervalo=0)], ruta_bloqueo)
+    assert programador.ejecutar(max_ejecuciones=4)
+
+    assert max(maximo) == 1
+    assert len(recursos) == 4 and all(recurso is recursos[0] for recurso in recursos)
+
+    # Al detenerse el programador se libera el bloqueo
+    bloqueo = BloqueoInstancia(ruta_bloqueo)
+    assert bloqueo.adquirir()
+    assert not Programador([Trabajo('a', trabajo, intervalo=0)], ruta_bloqueo).ejecutar(max_ejecuciones=1)
+    bloqueo.liberar()
+
+
+def test_trabajo_que_devuelve_false_se_registra_como_error(tmp_path, monkeypatch):
+    registro = RegistroEventos(str(tmp_path / 'logs'))
+    monkeypatch.setattr(eventos_ejecucion, '_registro_eventos', registro)
+    resultados = iter([True, False, None])
+
+    programador = Programador([Trabajo('main', lambda recursos: next(resultados), intervalo=0)], str(tmp_path / 'programador.lock'))
+    assert programador.ejecutar(max_ejecuciones=3)
+    registro.cerrar()
+
+    assert [evento['estado'] for evento in leer_eventos(str(registro.ruta))] == ['ok', 'error', 'ok']
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from services.reconciliacion import conciliar
+
+
+def test_conciliar_genera_los_cambios_por_tipo():
+    origen = pd.DataFrame({
+        'identification_number': [1, 2, 3, 4, 5],
+        'email': ['A@X.COM', 'b@x.com', 'c@x.com', 'd@x.com', 'e@x.com'],
+        'area_code': [10.0, 20.0, 30.0, 40.0, 50.0],
+        'activo': [True, True, True, False, True],
+    })
+    destino = pd.DataFrame({
+        'id': [101, 102, 103, 104, 106],
+        'identification_number': ['1', '2', '3', '4', '6'],
+        'email': ['a@x.com', 'b@x.com', 'otro@x.com', 'd@x.com', 'f@x.com'],
+        'area': ['10', '20', '30', '40', '60'],
+        'disabled': [False, True, False, False, False],
+        'columna_ancha': ['x' * 50] * 5,
+    })
+    destino['activo'] = ~destino['disabled']
+
+    resultado = conciliar(origen, destino, llaves='identification_number', columnas_comparadas={'email': 'email', 'area_code': 'area'},
+                          activo_origen='activo', activo_destino='activo', columnas_destino=['id'], sin_mayusculas=['email'])
+
+    assert resultado.resumen() == {'crear': 1, 'actualizar': 1, 'inactivar': 1, 'activar': 1}
+    assert resultado.crear['identification_number'].tolist() == [5]
+    assert resultado.actualizar[['identification_number', 'email', 'id', 'columnas_cambiadas']].values.tolist() == [[3, 'c@x.com', 103, 'email']]
+    assert resultado.inactivar['id'].tolist() == [104]
+    assert resultado.activar['id'].tolist() == [102]
+    assert 'columna_ancha' not in resultado.inactivar.columns
+
+    # Con inactivar_ausentes también se inactivan los registros del destino que no están en el origen
+    resultado = conciliar(origen, destino, 'identification_number', {'email': 'email', 'area_code': 'area'},
+                          activo_origen='activo', activo_destino='activo', columnas_destino=['id'], inactivar_ausentes=True,
+                          sin_mayusculas=['email'])
+    assert resultado.inactivar['id'].tolist() == [104, 106]
@@ -0,0 +1,10 @@
+from external_services.shopify_integration import agregar_campos_url
+
+
+def test_agregar_campos_url_conserva_los_parametros_y_no_duplica_fields():
+    url = 'https://tienda.myshopify.com/admin/api/2023-07/products.json?limit=250&page_info=abc'
+
+    con_campos = agregar_campos_url(url, 'id,title,variants')
+
+    assert con_campos.endswith('?limit=250&page_info=abc&fields=id,title,variants')
+    assert agregar_campos_url(con_campos, 'id') == con_campos
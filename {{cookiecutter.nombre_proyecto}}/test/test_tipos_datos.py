@@ -0,0 +1,53 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from utils import tipos_datos
+from utils.tipos_datos import aplicar_esquema, sugerir_esquema
+
+
+def _resultado_consulta(filas: int = 1000) -> pd.DataFrame:
+    # Como lo construye ejecutar_consulta_pyodbc: textos y Decimal de SQL Server como objetos de Python
+    return pd.DataFrame({
+        'Id': np.arange(filas, dtype='int64'),
+        'Sku': pd.Series([f'SKU-{numero:06d}' for numero in range(filas)], dtype=object),
+        'Bodega': pd.Series(['Bodega 1', 'Bodega 2'] * (filas // 2), dtype=object),
+        'Precio': pd.Series([Decimal('10.50')] * filas, dtype=object),
+        'Cantidad': pd.Series([numero if numero % 10 else None for numero in range(filas)], dtype=object),
+    })
+
+
+def test_esquema_automatico_reduce_la_memoria_y_conserva_los_valores():
+    tipos_datos.reporte_memoria(reiniciar=True)
+    df = _resultado_consulta()
+
+    # Los Decimal no se convierten para no perder precisión
+    assert sugerir_esquema(df) == {'Id': 'int32', 'Sku': 'string[pyarrow]', 'Bodega': 'category', 'Cantidad': 'Int32'}
+    compacto = aplicar_esquema(df, 'auto', nombre='consulta_prueba')
+
+    assert compacto['Sku'].tolist() == df['Sku'].tolist()
+    assert compacto['Precio'].tolist() == [Decimal('10.50')] * len(df)
+    assert compacto['Cantidad'].isna().sum() == 100 and compacto['Cantidad'].dtype == 'Int32'
+    reporte = tipos_datos.reporte_memoria(reiniciar=True)
+    assert set(reporte['columna']) == {'Id', 'Sku', 'Bodega', 'Cantidad'}
+    assert reporte['bytes_despues'].sum() * 3 < reporte['bytes_antes'].sum()
+    assert tipos_datos.reporte_memoria().empty
+
+
+def test_enteros_fuera_de_int64_no_se_convierten():
+    df = pd.DataFrame({'Grande': pd.Series([2 ** 70, None, 1], dtype=object)})
+
+    assert sugerir_esquema(df) == {}
+    assert aplicar_esquema(df, 'auto')['Grande'].tolist() == [2 ** 70, None, 1]
+
+
+def test_tipo_mal_declarado_conserva_la_columna():
+    df = _resultado_consulta(10)
+    esquema = {'Id': 'int8', 'Sku': 'Int32', 'Cantidad': 'int32', 'Bodega': 'category', 'NoExiste': 'category'}
+
+    compacto = aplicar_esquema(df.assign(Id=df['Id'] + 1000), esquema, reporte=False)
+
+    # int8 no alcanza, los SKU no son números y Cantidad tiene nulos: solo se convierte Bodega
+    assert compacto['Id'].dtype == 'int64' and compacto['Sku'].dtype == object and compacto['Cantidad'].dtype == object
+    assert compacto['Bodega'].dtype == 'category'
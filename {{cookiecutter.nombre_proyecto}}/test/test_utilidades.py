@@ -0,0 +1,36 @@
+import json
+
+import pandas as pd
+import pytest
+
+from utils.utilidades import convert_list_to_data_frame, TIPOS_VARIANTES_SHOPIFY
+
+
+PRODUCTOS = [
+    {'id': 1, 'title': 'Producto 1', 'variants': [{'sku': 'A', 'inventory_item_id': 11}, {'sku': None, 'inventory_item_id': 12}]},
+    {'id': 2, 'title': 'Producto 2', 'variants': []},
+    {'id': 3, 'title': 'Producto 3', 'variants': [{'sku': 'C', 'inventory_item_id': 31}]},
+]
+
+
+def test_vectorizado_genera_el_mismo_data_frame_que_el_recorrido():
+    vectorizado = convert_list_to_data_frame(PRODUCTOS)
+    iterativo = convert_list_to_data_frame(PRODUCTOS, vectorizado=False)
+
+    pd.testing.assert_frame_equal(vectorizado, iterativo)
+    assert vectorizado['id'].tolist() == [1, 1, 3]
+
+
+def test_variante_incompleta_identifica_el_registro():
+    productos = PRODUCTOS + [{'id': 4, 'title': 'Producto 4', 'variants': [{'sku': 'D'}]}]
+
+    with pytest.raises(ValueError, match="Variante sin la estructura esperada: {'sku': 'D'}"):
+        convert_list_to_data_frame(productos)
+
+
+def test_tipos_por_defecto_se_serializan_con_json():
+    fila = next(convert_list_to_data_frame(PRODUCTOS).itertuples(index=False))
+    assert json.loads(json.dumps(fila._asdict())) == {'id': 1, 'title': 'Producto 1', 'sku': 'A', 'inventory_item_id': 11}
+
+    compacto = convert_list_to_data_frame(PRODUCTOS, esquema=TIPOS_VARIANTES_SHOPIFY)
+    assert compacto['title'].dtype == 'category' and compacto['inventory_item_id'].dtype == 'Int64'
@@ -0,0 +1,45 @@
+import os
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web
+
+from external_services.vtex_integration import fetch_inventory_async
+from utils.api_conexion import CacheHTTP
+
+
+def test_304_sin_entrada_en_cache_descarga_de_nuevo_el_inventario(tmp_path):
+    solicitudes = []
+
+    async def inventario(request):
+        solicitudes.append(request.headers.get('If-None-Match'))
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304)
+        return web.json_response({'balance': [{'warehouseId': 'w1', 'totalQuantity': 7}]}, headers={'ETag': '"v1"'})
+
+    async def ejecutar():
+        aplicacion = web.Application()
+        aplicacion.router.add_get('/inventory/sku1', inventario)
+        servidor = web.AppRunner(aplicacion)
+        await servidor.setup()
+        sitio = web.TCPSite(servidor, '127.0.0.1', 0)
+        await sitio.start()
+        url = f'http://127.0.0.1:{servidor.addresses[0][1]}/inventory/sku1'
+        cache = CacheHTTP(str(tmp_path))
+        try:
+            async with aiohttp.ClientSession() as session:
+                primera = await fetch_inventory_async(session, url, {}, 'w1', cache)
+                # Los datos de la entrada se eliminan, pero el índice conserva el ETag
+                for archivo in os.listdir(tmp_path):
+                    if archivo != 'indice.json':
+                        os.remove(tmp_path / archivo)
+                segunda = await fetch_inventory_async(session, url, {}, 'w1', cache)
+        finally:
+            cache.cerrar()
+            await servidor.cleanup()
+        return primera, segunda
+
+    assert asyncio.run(ejecutar()) == (7, 7)
+    assert solicitudes == [None, '"v1"', None]
@@ -0,0 +1,286 @@
+# Importaciones de la biblioteca estándar de Python
+import os
+import re
+import json
+import time
+import threading
+from typing import Callable
+from datetime import datetime
+
+# Importaciones de terceros
+import pandas as pd
+try:
+    # pyarrow es opcional, solo se necesita para guardar resultados intermedios
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    ipc = None
+    pq = None
+
+# Importaciones propias
+from utils.logger import logger
+from utils.eventos_ejecucion import obtener_registro_eventos, ETAPA_EXPORTACION
+
+# Carpeta por defecto de los resultados intermedios; es una subcarpeta de Exportar, por lo que
+# la limpieza de utils/clean_logs.py (que no recorre subcarpetas) no la modifica
+CARPETA_ALMACEN = os.path.join('Exportar', 'intermedios')
+
+# Archivo con el nombre, el formato, el esquema y la cantidad de filas de cada resultado guardado
+ARCHIVO_CATALOGO = 'catalogo.json'
+
+# Extensión de cada formato: Arrow IPC sin comprimir se lee con memory map sin copiar los datos,
+# Parquet ocupa menos espacio en disco pero se descomprime al leerlo
+FORMATOS = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+# Etapa con la que se registran las lecturas del almacén en el registro de eventos
+ETAPA_ALMACEN_LECTURA = 'almacen_lectura'
+
+# Los nombres se usan como nombre de archivo
+PATRON_NOMBRE = re.compile(r'^[\w.-]+$')
+
+
+def _validar_pyarrow():
+    if pa is None:
+        raise ImportError("El almacén de resultados intermedios requiere pyarrow: pip install pyarrow")
+
+
+class AlmacenIntermedio:
+    """
+    Almacén en disco de los resultados intermedios de cada etapa del proceso (consultas, descargas de las APIs...).
+
+    Cada resultado se guarda con un nombre en un archivo Arrow IPC (o Parquet) y se vuelve a abrir con
+    memory map: las etapas siguientes y las nuevas ejecuciones lo leen desde el archivo sin copiarlo a
+    memoria ni repetir la consulta, y si el proceso falla los resultados de las etapas que terminaron
+    quedan disponibles para revisarlos o continuar desde ahí.
+
+    El catálogo (catalogo.json) guarda el archivo, el esquema, la cantidad de filas, el tamaño y la fecha
+    de cada resultado. Las entradas cuyo archivo ya no existe se descartan al leerlo.
+
+    Ejemplo:
+        almacen = AlmacenIntermedio()
+        almacen.guardar('productos_shopify', df_productos)
+        df_productos = almacen.cargar('productos_shopify', columnas=['sku', 'inventory_item_id'])
+    """
+
+    def __init__(self, carpeta: str = CARPETA_ALMACEN, formato: str = 'arrow'):
+        """
+        Args:
+            carpeta (str): Carpeta donde se guardan los archivos y el catálogo.
+            formato (str): Formato por defecto, 'arrow' (lectura sin copia) o 'parquet' (comprimido).
+        """
+        _validar_pyarrow()
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato {formato} no válido, use uno de {', '.join(FORMATOS)}.")
+        self.carpeta = carpeta
+        self.formato = formato
+        self.ruta_catalogo = os.path.join(carpeta, ARCHIVO_CATALOGO)
+        self._lock = threading.Lock()
+        os.makedirs(carpeta, exist_ok=True)
+        self._catalogo = self._leer_catalogo()
+
+    def guardar(self, nombre: str, datos, formato: str = None, metadatos: dict = None) -> dict:
+        """
+        Guarda un resultado y lo registra en el catálogo; si ya existe un resultado con el mismo nombre se reemplaza.
+
+        El archivo se escribe primero con otro nombre y luego se reemplaza, para que una falla a mitad
+        de la escritura no deje un archivo incompleto.
+
+        Args:
+            nombre (str): Nombre del resultado (letras, números, guiones, puntos y guiones bajos).
+            datos (pd.DataFrame o pa.Table): Datos a guardar.
+            formato (str, opcional): 'arrow' o 'parquet', por defecto el formato del almacén.
+            metadatos (dict, opcional): Información adicional que se guarda en el catálogo (por ejemplo la consulta).
+
+        Returns:
+            dict: Entrada del catálogo del resultado.
+        """
+        self._validar_nombre(nombre)
+        formato = formato or self.formato
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato {formato} no válido, use uno de {', '.join(FORMATOS)}.")
+
+        archivo = nombre + FORMATOS[formato]
+        ruta = os.path.join(self.carpeta, archivo)
+        ruta_temporal = f'{ruta}.{os.getpid()}.tmp'
+        eventos = obtener_registro_eventos()
+        with eventos.medir(ETAPA_EXPORTACION, archivo=ruta) as evento:
+            tabla = pa.Table.from_pandas(datos) if isinstance(datos, pd.DataFrame) else datos
+            try:
+                if formato == 'arrow':
+                    with pa.OSFile(ruta_temporal, 'wb') as salida, ipc.new_file(salida, tabla.schema) as escritor:
+                        escritor.write_table(tabla)
+                else:
+                    pq.write_table(tabla, ruta_temporal)
+                os.replace(ruta_temporal, ruta)
+            except Exception as e:
+                logger.error(f"No se pudo guardar el resultado intermedio {nombre} en {ruta}: {e}")
+                if os.path.exists(ruta_temporal):
+                    os.remove(ruta_temporal)
+                raise
+            evento['filas'] = tabla.num_rows
+            evento['bytes'] = os.path.getsize(ruta)
+
+        entrada = {
+            'archivo': archivo,
+            'formato': formato,
+            'filas': tabla.num_rows,
+            'columnas': [{'nombre': campo.name, 'tipo': str(campo.type)} for campo in tabla.schema],
+            'bytes': evento['bytes'],
+            'creado': datetime.now().isoformat(timespec='seconds'),
+            'id_ejecucion': eventos.id_ejecucion,
+            'metadatos': metadatos or {},
+        }
+        with self._lock:
+            self._catalogo[nombre] = entrada
+            self._escribir_catalogo()
+        logger.info("Resultado intermedio %s guardado en %s (%s filas, %.1f MB).", nombre, ruta,
+                    entrada['filas'], entrada['bytes'] / (1024 * 1024))
+        return entrada
+
+    def cargar_tabla(self, nombre: str, columnas: list = None) -> 'pa.Table':
+        """
+        Abre un resultado como tabla de Arrow.
+
+        Los archivos Arrow se leen con memory map y sin copiar los datos: la tabla apunta a las páginas
+        del archivo, que el sistema operativo carga solo cuando se leen y comparte entre procesos.
+
+        Args:
+            nombre (str): Nombre del resultado.
+            columnas (list, opcional): Columnas a leer, por defecto todas.
+
+        Returns:
+            pa.Table: Datos del resultado.
+
+        Raises:
+            KeyError: Si el resultado no está en el catálogo o su archivo no existe.
+        """
+        entrada = self.obtener_entrada(nombre)
+        if entrada is None:
+            raise KeyError(f"El resultado intermedio {nombre} no existe en {self.carpeta}.")
+        ruta = os.path.join(self.carpeta, entrada['archivo'])
+
+        with obtener_registro_eventos().medir(ETAPA_ALMACEN_LECTURA, archivo=ruta) as evento:
+            if entrada['formato'] == 'arrow':
+                # El archivo queda abierto mientras exista la tabla, que apunta a sus páginas
+                tabla = ipc.open_file(pa.memory_map(ruta, 'r')).read_all()
+                if columnas is not None:
+                    tabla = tabla.select(columnas)
+            else:
+                tabla = pq.read_table(ruta, columns=columnas, memory_map=True)
+            evento['filas'] = tabla.num_rows
+            evento['bytes'] = tabla.nbytes
+        return tabla
+
+    def cargar(self, nombre: str, columnas: list = None) -> pd.DataFrame:
+        """
+        Abre un resultado como DataFrame de pandas (ver `cargar_tabla`).
+
+        Las columnas se convierten por separado (split_blocks) para no copiarlas en un solo bloque;
+        las columnas numéricas sin nulos no se copian.
+        """
+        return self.cargar_tabla(nombre, columnas).to_pandas(split_blocks=True)
+
+    def obtener_o_generar(self, nombre: str, generar: Callable, max_antiguedad: float = None, **parametros_guardar):
+        """
+        Devuelve un resultado guardado o, si no existe o es muy antiguo, lo genera y lo guarda.
+
+        Permite que una nueva ejecución continúe desde los resultados de la anterior sin repetir
+        consultas o descargas. El almacén no detiene el proceso: si el resultado guardado no se puede
+        leer se genera de nuevo, y si el resultado generado no se puede guardar (por ejemplo una
+        columna que Arrow no puede convertir o el disco lleno) se registra una advertencia y se
+        devuelve igual.
+
+        Args:
+            nombre (str): Nombre del resultado.
+            generar (Callable): Función sin argumentos que devuelve el DataFrame (por ejemplo la consulta).
+            max_antiguedad (float, opcional): Segundos que se reutiliza un resultado guardado;
+                None = sin límite, 0 = siempre se genera de nuevo.
+            **parametros_guardar: Argumentos para `guardar` (formato, metadatos).
+
+        Returns:
+            pd.DataFrame: Datos guardados o recién generados.
+        """
+        self._validar_nombre(nombre)
+        entrada = self.obtener_entrada(nombre)
+        if entrada is not None and max_antiguedad != 0:
+            antiguedad = time.time() - datetime.fromisoformat(entrada['creado']).timestamp()
+            if max_antiguedad is None or antiguedad <= max_antiguedad:
+                try:
+                    datos = self.cargar(nombre)
+                    logger.info("Se reutiliza el resultado intermedio %s de %s.", nombre, entrada['creado'])
+                    return datos
+                except (OSError, KeyError, pa.ArrowException) as e:
+                    logger.warning("No se pudo leer el resultado intermedio %s, se genera de nuevo: %s", nombre, e)
+
+        datos = generar()
+        try:
+            self.guardar(nombre, datos, **parametros_guardar)
+        except (OSError, ValueError, TypeError, pa.ArrowException) as e:
+            logger.warning("El resultado intermedio %s no se guardó, la siguiente ejecución lo generará de nuevo: %s", nombre, e)
+        return datos
+
+    def obtener_entrada(self, nombre: str) -> dict:
+        """
+        Devuelve la entrada del catálogo de un resultado o None si no existe o su archivo fue eliminado.
+        """
+        with self._lock:
+            entrada = self._catalogo.get(nombre)
+            if entrada is not None and not os.path.exists(os.path.join(self.carpeta, entrada['archivo'])):
+                del self._catalogo[nombre]
+                self._escribir_catalogo()
+                entrada = None
+        return entrada
+
+    def existe(self, nombre: str) -> bool:
+        return self.obtener_entrada(nombre) is not None
+
+    def catalogo(self) -> pd.DataFrame:
+        """
+        Devuelve el catálogo como DataFrame, con una fila por resultado (nombre, formato, filas, columnas, bytes y creado).
+        """
+        with self._lock:
+            filas = [{'nombre': nombre, **entrada, 'columnas': len(entrada['columnas'])}
+                     for nombre, entrada in self._catalogo.items()
+                     if os.path.exists(os.path.join(self.carpeta, entrada['archivo']))]
+        return pd.DataFrame(filas, columns=['nombre', 'archivo', 'formato', 'filas', 'columnas', 'bytes', 'creado'])
+
+    def eliminar(self, nombre: str) -> bool:
+        """
+        Elimina un resultado y su entrada del catálogo. Devuelve False si no existía.
+        """
+        with self._lock:
+            entrada = self._catalogo.pop(nombre, None)
+            if entrada is None:
+                return False
+            self._escribir_catalogo()
+        try:
+            os.remove(os.path.join(self.carpeta, entrada['archivo']))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _validar_nombre(self, nombre: str):
+        if not PATRON_NOMBRE.match(nombre or ''):
+            raise ValueError(f"El nombre {nombre!r} no es válido: use letras, números, guiones, puntos y guiones bajos.")
+
+    def _leer_catalogo(self) -> dict:
+        if not os.path.exists(self.ruta_catalogo):
+            return {}
+        try:
+            with open(self.ruta_catalogo, encoding='utf-8') as archivo:
+                catalogo = json.load(archivo)
+        except (OSError, ValueError) as e:
+            # Un catálogo dañado no impide ejecutar el proceso: los resultados se vuelven a generar
+            logger.warning("No se pudo leer el catálogo %s, se inicia vacío: %s", self.ruta_catalogo, e)
+            return {}
+        return {nombre: entrada for nombre, entrada in catalogo.items()
+                if os.path.exists(os.path.join(self.carpeta, entrada['archivo']))}
+
+    def _escribir_catalogo(self):
+        # Se llama con el lock tomado; el catálogo se reemplaza completo para que nunca quede a medio escribir
+        ruta_temporal = f'{self.ruta_catalogo}.{os.getpid()}.tmp'
+        with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(self._catalogo, archivo, ensure_ascii=False, indent=2)
+        os.replace(ruta_temporal, self.ruta_catalogo)
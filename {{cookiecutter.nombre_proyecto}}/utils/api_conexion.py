@@ -0,0 +1,578 @@
+# Importaciones de la biblioteca estándar de Python
+import os
+import re
+import time
+import json
+import atexit
+import hashlib
+import threading
+from urllib.parse import urlencode
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Importaciones de terceros
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+try:
+    # orjson es opcional: decodifica JSON varias veces más rápido que el módulo json de la biblioteca estándar
+    import orjson
+except ImportError:
+    orjson = None
+
+# Importaciones propias
+from utils.logger import logger
+from utils.eventos_ejecucion import obtener_registro_eventos, ETAPA_API_PAGINA
+
+# Tamaño máximo por defecto de la caché HTTP en disco (en bytes)
+MAX_CACHE_HTTP_SIZE = 200 * 1024 * 1024  # 200 MB por defecto
+
+# El índice de la caché se escribe en disco cada tantos cambios o segundos, y al cerrarla
+GUARDAR_INDICE_CADA_CAMBIOS = 200
+GUARDAR_INDICE_CADA_SEGUNDOS = 30
+
+# Encabezados de la respuesta que se conservan junto con los datos en caché
+CABECERAS_CONSERVADAS = ('etag', 'last-modified', 'link', 'content-type')
+
+# Códigos HTTP con los que se reintenta la descarga de una página
+CODIGOS_REINTENTO_PAGINA = (429, 500, 502, 503, 504)
+
+# Atributo con el que CacheHTTP deja en la respuesta los datos que ya decodificó para guardarlos
+_ATRIBUTO_DATOS = '_datos_decodificados'
+
+
+def decodificar_json(contenido):
+    """
+    Decodifica un JSON con orjson si está instalado o con el módulo json de la biblioteca estándar.
+
+    Args:
+        contenido (bytes o str): Cuerpo de la respuesta.
+
+    Returns:
+        Los datos decodificados (dict, list, etc.).
+
+    Raises:
+        ValueError: Si el contenido no es un JSON válido (orjson.JSONDecodeError y json.JSONDecodeError heredan de ValueError).
+    """
+    if orjson is not None:
+        return orjson.loads(contenido)
+    return json.loads(contenido)
+
+
+def codificar_json(datos) -> bytes:
+    """
+    Codifica datos a JSON en bytes con orjson si está instalado o con el módulo json de la biblioteca estándar.
+    """
+    if orjson is not None:
+        return orjson.dumps(datos)
+    return json.dumps(datos, ensure_ascii=False).encode('utf-8')
+
+
+def decodificar_respuesta(response):
+    """
+    Devuelve el JSON de una respuesta de requests decodificándolo desde los bytes del cuerpo.
+
+    Las respuestas de la caché, y las respuestas 200 que CacheHTTP ya decodificó para guardarlas,
+    contienen los datos decodificados y se devuelven sin volver a parsearlos.
+    """
+    if isinstance(response, RespuestaCache):
+        return response.json()
+    if hasattr(response, _ATRIBUTO_DATOS):
+        return getattr(response, _ATRIBUTO_DATOS)
+    contenido = getattr(response, 'content', None)
+    if contenido is None:
+        return response.json()
+    return decodificar_json(contenido)
+
+
+class RespuestaCache:
+    """
+    Respuesta HTTP servida desde la caché con la misma interfaz básica de requests.Response.
+
+    Permite que las funciones que hoy usan `response.status_code`, `response.headers` y
+    `response.json()` funcionen igual cuando el recurso no ha cambiado en el servidor.
+    """
+
+    def __init__(self, url: str, datos, cabeceras: dict, revalidada: bool):
+        self.url = url
+        self.status_code = 200
+        self.headers = CaseInsensitiveDict(cabeceras)
+        self.desde_cache = True
+        self.revalidada = revalidada  # True cuando el servidor respondió 304
+        self._datos = datos
+
+    @property
+    def text(self) -> str:
+        return json.dumps(self._datos)
+
+    def json(self):
+        return self._datos
+
+
+class CacheHTTP:
+    """
+    Caché HTTP en disco para recursos que cambian poco (productos de Shopify, inventarios de VTEX, etc.).
+
+    Usa los encabezados ETag/Last-Modified para enviar solicitudes condicionales
+    (If-None-Match/If-Modified-Since): si el servidor responde 304 se devuelven los datos
+    guardados en disco, sin volver a descargarlos. Cada respuesta se guarda como el JSON que
+    envió el servidor (no con pickle), para que leer la carpeta de la caché nunca ejecute código.
+    El almacenamiento es un LRU limitado por tamaño y se puede definir un TTL por endpoint
+    durante el cual ni siquiera se consulta al servidor.
+
+    El índice (indice.json) no se reescribe en cada solicitud: se guarda cada
+    GUARDAR_INDICE_CADA_CAMBIOS cambios o GUARDAR_INDICE_CADA_SEGUNDOS segundos, y al llamar a
+    `cerrar` o al terminar el proceso. Si el proceso se interrumpe se pierden solo los últimos
+    cambios del índice y esas respuestas se descargan de nuevo.
+
+    Ejemplo:
+        cache = CacheHTTP('cache_http', ttl_por_endpoint={r'/products\\.json': 600})
+        response = cache.get(url, headers=headers)
+        data = response.json()
+    """
+
+    def __init__(self, carpeta: str = 'cache_http', tamano_maximo: int = MAX_CACHE_HTTP_SIZE,
+                 ttl_por_defecto: int = 0, ttl_por_endpoint: dict = None, session: requests.Session = None):
+        """
+        Args:
+            carpeta (str): Carpeta donde se guardan los datos y el índice de la caché.
+            tamano_maximo (int): Tamaño máximo en bytes de la caché; al superarlo se eliminan las entradas menos usadas.
+            ttl_por_defecto (int): Segundos en los que una entrada se considera vigente sin consultar al servidor (0 = siempre revalidar).
+            ttl_por_endpoint (dict, opcional): Expresiones regulares sobre la URL y su TTL en segundos, la primera que coincida se aplica.
+            session (requests.Session, opcional): Sesión HTTP a reutilizar para las solicitudes.
+        """
+        self.carpeta = carpeta
+        self.tamano_maximo = tamano_maximo
+        self.ttl_por_defecto = ttl_por_defecto
+        self.ttl_por_endpoint = [(re.compile(patron), ttl) for patron, ttl in (ttl_por_endpoint or {}).items()]
+        self.session = session or requests.Session()
+        self.aciertos = 0
+        self.revalidaciones = 0
+        self.fallos = 0
+
+        self._lock = threading.Lock()
+        self._lock_archivo_indice = threading.Lock()
+        self._ruta_indice = os.path.join(carpeta, 'indice.json')
+        os.makedirs(carpeta, exist_ok=True)
+        self._indice = self._cargar_indice()
+        self._tamano_actual = sum(entrada['tamano'] for entrada in self._indice.values())
+        self._cambios_indice = 0
+        self._ultimo_guardado_indice = time.monotonic()
+        atexit.register(self.cerrar)
+
+    def get(self, url: str, headers: dict = None, timeout: float = None):
+        """
+        Realiza una solicitud GET usando la caché.
+
+        Args:
+            url (str): URL del recurso.
+            headers (dict, opcional): Encabezados de la solicitud (autenticación, etc.).
+            timeout (float, opcional): Tiempo máximo de espera de la solicitud.
+
+        Returns:
+            RespuestaCache or requests.Response: Respuesta desde caché si el recurso está vigente o no ha cambiado,
+            de lo contrario la respuesta original del servidor.
+        """
+        headers = headers or {}
+        clave = self.generar_clave(url, headers)
+
+        entrada = self.obtener_vigente(clave, url)
+        if entrada is not None:
+            return entrada
+
+        response = self.session.get(url, headers=self.cabeceras_condicionales(clave, headers), timeout=timeout)
+
+        if response.status_code == 304:
+            respuesta_cache = self.revalidar(clave, url)
+            if respuesta_cache is not None:
+                return respuesta_cache
+            # La entrada desapareció del disco, se descarga nuevamente el recurso completo
+            response = self.session.get(url, headers=headers, timeout=timeout)
+
+        if response.status_code == 200:
+            self._contar('fallos')
+            datos = decodificar_respuesta(response)
+            # Quien recibe la respuesta la decodifica con decodificar_respuesta, que reutiliza estos datos
+            setattr(response, _ATRIBUTO_DATOS, datos)
+            self.guardar(clave, url, response.headers, datos, contenido=getattr(response, 'content', None))
+
+        return response
+
+    def generar_clave(self, url: str, headers: dict) -> str:
+        """
+        Genera la clave de la entrada a partir de la URL y los encabezados, para no mezclar datos de distintas credenciales.
+        """
+        cabeceras_ordenadas = sorted((str(k).lower(), str(v)) for k, v in headers.items())
+        return hashlib.sha256(f'{url}|{cabeceras_ordenadas}'.encode('utf-8')).hexdigest()
+
+    def obtener_ttl(self, url: str) -> int:
+        """
+        Devuelve el TTL en segundos que aplica para la URL según las reglas por endpoint.
+        """
+        for patron, ttl in self.ttl_por_endpoint:
+            if patron.search(url):
+                return ttl
+        return self.ttl_por_defecto
+
+    def obtener_vigente(self, clave: str, url: str):
+        """
+        Devuelve la entrada en caché si todavía está dentro de su TTL, sin consultar al servidor.
+        """
+        with self._lock:
+            entrada = self._indice.get(clave)
+            if entrada is None or time.time() - entrada['fecha_validacion'] >= self.obtener_ttl(url):
+                return None
+            self._indice.move_to_end(clave)
+
+        datos = self._leer_datos(clave)
+        if datos is None:
+            return None
+        self._contar('aciertos')
+        return RespuestaCache(url, datos, entrada['cabeceras'], revalidada=False)
+
+    def cabeceras_condicionales(self, clave: str, headers: dict) -> dict:
+        """
+        Agrega If-None-Match/If-Modified-Since a los encabezados si existe una entrada previa para la clave.
+        """
+        cabeceras = dict(headers)
+        with self._lock:
+            entrada = self._indice.get(clave)
+        if entrada:
+            if entrada['cabeceras'].get('etag'):
+                cabeceras['If-None-Match'] = entrada['cabeceras']['etag']
+            if entrada['cabeceras'].get('last-modified'):
+                cabeceras['If-Modified-Since'] = entrada['cabeceras']['last-modified']
+        return cabeceras
+
+    def revalidar(self, clave: str, url: str):
+        """
+        Marca la entrada como validada por el servidor (respuesta 304) y devuelve los datos guardados.
+        """
+        datos = self._leer_datos(clave)
+        if datos is None:
+            return None
+
+        with self._lock:
+            # Otro hilo pudo eliminar la entrada por el límite de tamaño después de leer los datos
+            entrada = self._indice.get(clave)
+            if entrada is None:
+                return None
+            entrada['fecha_validacion'] = time.time()
+            self._indice.move_to_end(clave)
+            guardar_indice = self._marcar_cambio_indice()
+        if guardar_indice:
+            self.guardar_indice()
+
+        self._contar('revalidaciones')
+        logger.debug('Recurso sin cambios (304), se usa la caché: %s', url)
+        return RespuestaCache(url, datos, entrada['cabeceras'], revalidada=True)
+
+    def guardar(self, clave: str, url: str, cabeceras_respuesta, datos, contenido: bytes = None):
+        """
+        Guarda en disco una respuesta 200 si el recurso es cacheable.
+
+        Solo se guardan los recursos que traen ETag/Last-Modified o que tienen un TTL configurado.
+
+        Args:
+            datos: JSON decodificado de la respuesta; se codifica de nuevo solo si no se indica `contenido`.
+            contenido (bytes, opcional): Cuerpo JSON de la respuesta tal como lo envió el servidor.
+        """
+        cabeceras = {nombre: cabeceras_respuesta[nombre] for nombre in CABECERAS_CONSERVADAS if nombre in cabeceras_respuesta}
+        if 'etag' not in cabeceras and 'last-modified' not in cabeceras and self.obtener_ttl(url) <= 0:
+            return
+
+        if not isinstance(contenido, bytes):
+            contenido = codificar_json(datos)
+        if len(contenido) > self.tamano_maximo:
+            return
+
+        try:
+            with open(self._ruta_datos(clave), 'wb') as archivo:
+                archivo.write(contenido)
+        except OSError as e:
+            logger.error(f'No se pudo escribir la entrada de caché para {url}: {e}')
+            return
+
+        with self._lock:
+            anterior = self._indice.pop(clave, None)
+            if anterior:
+                self._tamano_actual -= anterior['tamano']
+
+            self._indice[clave] = {
+                'url': url,
+                'cabeceras': cabeceras,
+                'tamano': len(contenido),
+                'fecha_validacion': time.time(),
+            }
+            self._tamano_actual += len(contenido)
+            self._aplicar_limite_tamano()
+            guardar_indice = self._marcar_cambio_indice()
+        if guardar_indice:
+            self.guardar_indice()
+
+    def limpiar(self):
+        """
+        Elimina todas las entradas de la caché.
+        """
+        with self._lock:
+            for clave in list(self._indice):
+                self._eliminar_entrada(clave)
+            self._marcar_cambio_indice()
+        self.guardar_indice()
+
+    def guardar_indice(self):
+        """
+        Escribe el índice en disco si cambió desde la última vez que se guardó.
+        """
+        with self._lock:
+            if not self._cambios_indice:
+                return
+            contenido = json.dumps(self._indice)
+            self._cambios_indice = 0
+            self._ultimo_guardado_indice = time.monotonic()
+
+        # La escritura se hace fuera del lock para no detener a los demás hilos que usan la caché
+        with self._lock_archivo_indice:
+            ruta_temporal = f'{self._ruta_indice}.tmp'
+            try:
+                # Escritura atómica para no dejar un índice corrupto si el proceso se interrumpe
+                with open(ruta_temporal, 'w', encoding='utf-8') as archivo:
+                    archivo.write(contenido)
+                os.replace(ruta_temporal, self._ruta_indice)
+            except OSError as e:
+                logger.error(f'No se pudo guardar el índice de la caché HTTP en {self._ruta_indice}: {e}')
+
+    def cerrar(self):
+        """
+        Guarda el índice pendiente; se llama también al terminar el proceso.
+        """
+        self.guardar_indice()
+        atexit.unregister(self.cerrar)
+
+    def _contar(self, contador: str):
+        # Los paginadores usan la misma caché desde varios hilos
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def _marcar_cambio_indice(self) -> bool:
+        # Se llama con el lock tomado; devuelve True cuando corresponde escribir el índice en disco
+        self._cambios_indice += 1
+        return (self._cambios_indice >= GUARDAR_INDICE_CADA_CAMBIOS
+                or time.monotonic() - self._ultimo_guardado_indice >= GUARDAR_INDICE_CADA_SEGUNDOS)
+
+    def _aplicar_limite_tamano(self):
+        # Eliminar las entradas menos usadas (al inicio del OrderedDict) hasta respetar el tamaño máximo
+        while self._tamano_actual > self.tamano_maximo and self._indice:
+            clave = next(iter(self._indice))
+            logger.debug('Eliminando de la caché HTTP por tamaño: %s', self._indice[clave]['url'])
+            self._eliminar_entrada(clave)
+
+    def _eliminar_entrada(self, clave: str):
+        entrada = self._indice.pop(clave)
+        self._tamano_actual -= entrada['tamano']
+        try:
+            os.remove(self._ruta_datos(clave))
+        except FileNotFoundError:
+            pass
+
+    def _leer_datos(self, clave: str):
+        try:
+            with open(self._ruta_datos(clave), 'rb') as archivo:
+                return decodificar_json(archivo.read())
+        except (OSError, ValueError):
+            with self._lock:
+                if clave in self._indice:
+                    self._eliminar_entrada(clave)
+                    self._marcar_cambio_indice()
+            return None
+
+    def _ruta_datos(self, clave: str) -> str:
+        return os.path.join(self.carpeta, f'{clave}.json')
+
+    def _cargar_indice(self) -> OrderedDict:
+        try:
+            with open(self._ruta_indice, 'r', encoding='utf-8') as archivo:
+                return OrderedDict(json.load(archivo))
+        except FileNotFoundError:
+            return OrderedDict()
+        except (OSError, ValueError) as e:
+            logger.error(f'El índice de la caché HTTP no es válido, se reinicia la caché: {e}')
+            return OrderedDict()
+
+
+def _registros_results(datos: dict) -> list:
+    return datos['results']
+
+
+def _total_pagination(datos: dict) -> int:
+    return datos['pagination']['total']
+
+
+class PaginadorDesplazamiento:
+    """
+    Descarga en paralelo todas las páginas de un endpoint paginado por desplazamiento (limit/skip).
+
+    A diferencia del ciclo que avanza `skip` una página a la vez, la primera página entrega el total
+    de registros, con el que se calculan todos los desplazamientos; las demás páginas se descargan
+    con una concurrencia máxima y se unen en orden. Cada página trae el total que reporta el servidor
+    en ese momento: si cambia durante la descarga (registros creados o eliminados que desplazan las
+    páginas), se vuelven a descargar solo las páginas obtenidas con el total anterior, más las
+    páginas nuevas o sin las sobrantes, hasta que todas coincidan.
+
+    Ejemplo:
+        paginador = PaginadorDesplazamiento({dot_env.API_KEY: dot_env.VALUE_API_KEY}, registros_por_pagina=100)
+        usuarios = paginador.obtener_todos(f'{dot_env.BASE_URL}users')
+    """
+
+    def __init__(self, headers: dict = None, registros_por_pagina: int = 100, max_concurrencia: int = 8,
+                 extraer_registros=_registros_results, extraer_total=_total_pagination, parametro_limite: str = 'limit',
+                 parametro_desplazamiento: str = 'skip', session: requests.Session = None, cache: CacheHTTP = None,
+                 timeout: float = 30, reintentos: int = 3, espera_inicial: float = 1.0, max_rondas: int = 3):
+        """
+        Args:
+            headers (dict, opcional): Encabezados de las solicitudes (autenticación, etc.).
+            registros_por_pagina (int): Registros por página; si el servidor devuelve menos en la primera página se ajusta a ese valor.
+            max_concurrencia (int): Cantidad máxima de páginas descargadas al mismo tiempo.
+            extraer_registros (Callable): Función que recibe el JSON de una página y devuelve su lista de registros.
+            extraer_total (Callable): Función que recibe el JSON de una página y devuelve el total de registros del servidor.
+            parametro_limite (str): Nombre del parámetro con la cantidad de registros por página.
+            parametro_desplazamiento (str): Nombre del parámetro con el desplazamiento de la página.
+            session (requests.Session, opcional): Sesión HTTP a reutilizar.
+            cache (CacheHTTP, opcional): Caché HTTP con la que se descargan las páginas.
+            timeout (float): Tiempo máximo de cada solicitud en segundos.
+            reintentos (int): Reintentos de una página ante un error 429/5xx o de conexión.
+            espera_inicial (float): Segundos de espera antes del primer reintento; se duplica en cada reintento.
+            max_rondas (int): Rondas máximas de nuevas descargas cuando el total cambia durante la descarga.
+        """
+        self.headers = {'Accept': 'application/json', 'Content-Type': 'application/json', **(headers or {})}
+        self.registros_por_pagina = registros_por_pagina
+        self.max_concurrencia = max_concurrencia
+        self.extraer_registros = extraer_registros
+        self.extraer_total = extraer_total
+        self.parametro_limite = parametro_limite
+        self.parametro_desplazamiento = parametro_desplazamiento
+        self.cache = cache
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.espera_inicial = espera_inicial
+        self.max_rondas = max_rondas
+
+        self.session = session
+        if self.session is None:
+            self.session = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=max_concurrencia, pool_maxsize=max_concurrencia)
+            self.session.mount('https://', adaptador)
+            self.session.mount('http://', adaptador)
+
+    def obtener_todos(self, url: str, params: dict = None) -> list:
+        """
+        Descarga todos los registros del endpoint.
+
+        Args:
+            url (str): URL del endpoint sin los parámetros de paginación.
+            params (dict, opcional): Parámetros adicionales de la consulta (filtros, orden, etc.).
+
+        Returns:
+            list: Registros de todas las páginas en el orden del servidor.
+
+        Raises:
+            requests.exceptions.RequestException: Si una página no se pudo descargar después de los reintentos.
+            ValueError: Si la primera página sigue sin registros después de los reintentos aunque el total sea mayor a 0.
+        """
+        inicio = time.perf_counter()
+        por_pagina = self.registros_por_pagina
+        registros, total, _ = self.obtener_pagina(url, 0, por_pagina, params)
+        for intento in range(self.reintentos):
+            if registros or not total:
+                break
+            # Sin registros en la primera página no se conoce el tamaño de página del servidor
+            logger.warning("%s reportó %s registros pero la primera página llegó vacía; se reintenta.", url, total)
+            time.sleep(self.espera_inicial * 2 ** intento)
+            registros, total, _ = self.obtener_pagina(url, 0, por_pagina, params)
+        if not registros and total:
+            logger.error("La primera página de %s siguió vacía con un total de %s registros.", url, total)
+            raise ValueError(f'La primera página de {url} no trajo registros aunque el total es {total}.')
+        if len(registros) < min(por_pagina, total):
+            # El servidor limita el tamaño de página por debajo del solicitado
+            logger.warning("%s devolvió %s registros por página en lugar de %s; se ajustan los desplazamientos.",
+                           url, len(registros), por_pagina)
+            por_pagina = len(registros)
+
+        # {desplazamiento: (registros, total reportado, momento en que terminó la descarga)}
+        paginas = {0: (registros, total, time.monotonic())}
+        pendientes = list(range(por_pagina, total, por_pagina))
+
+        for ronda in range(self.max_rondas + 1):
+            paginas.update(self._descargar(url, pendientes, por_pagina, params))
+
+            # El total más reciente es el de la última página descargada
+            total = max(paginas.values(), key=lambda pagina: pagina[2])[1]
+            desactualizadas = sorted(desplazamiento for desplazamiento, pagina in paginas.items() if pagina[1] != total)
+            if not desactualizadas:
+                break
+            if ronda == self.max_rondas:
+                logger.warning("El total de %s siguió cambiando después de %s rondas; los registros pueden tener duplicados o faltantes.",
+                               url, self.max_rondas)
+                break
+
+            logger.warning("El total de %s cambió durante la descarga (%s registros); se descargan de nuevo %s páginas.",
+                           url, total, len(desactualizadas))
+            for desplazamiento in [desplazamiento for desplazamiento in paginas if desplazamiento >= max(total, 1)]:
+                del paginas[desplazamiento]
+            nuevas = [desplazamiento for desplazamiento in range(0, total, por_pagina) if desplazamiento not in paginas]
+            pendientes = sorted(set(desplazamiento for desplazamiento in desactualizadas if desplazamiento in paginas) | set(nuevas))
+
+        todos = [registro for desplazamiento in sorted(paginas) for registro in paginas[desplazamiento][0]]
+        logger.info("Registros obtenidos de %s: %s / %s en %s páginas, %.1fs.",
+                    url, len(todos), total, len(paginas), time.perf_counter() - inicio)
+        return todos
+
+    def _descargar(self, url: str, desplazamientos: list, por_pagina: int, params: dict) -> dict:
+        if not desplazamientos:
+            return {}
+        paginas = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrencia, thread_name_prefix='paginador') as ejecutor:
+            futuros = {ejecutor.submit(self.obtener_pagina, url, desplazamiento, por_pagina, params): desplazamiento
+                       for desplazamiento in desplazamientos}
+            for futuro in as_completed(futuros):
+                paginas[futuros[futuro]] = futuro.result()
+        return paginas
+
+    def obtener_pagina(self, url: str, desplazamiento: int, por_pagina: int, params: dict = None) -> tuple:
+        """
+        Descarga una página con reintentos.
+
+        Returns:
+            tuple: Registros de la página, total reportado por el servidor y momento (time.monotonic) en que terminó la descarga.
+        """
+        consulta = urlencode({**(params or {}), self.parametro_limite: por_pagina, self.parametro_desplazamiento: desplazamiento})
+        url_pagina = f"{url}{'&' if '?' in url else '?'}{consulta}"
+
+        for intento in range(self.reintentos + 1):
+            try:
+                with obtener_registro_eventos().medir(ETAPA_API_PAGINA, endpoint=url, desplazamiento=desplazamiento) as evento:
+                    if self.cache:
+                        response = self.cache.get(url_pagina, headers=self.headers, timeout=self.timeout)
+                    else:
+                        response = self.session.get(url_pagina, headers=self.headers, timeout=self.timeout)
+                    evento['codigo_http'] = response.status_code
+                    evento['estado'] = 'ok' if response.status_code == 200 else 'error'
+
+                if response.status_code == 200:
+                    datos = decodificar_respuesta(response)
+                    return self.extraer_registros(datos), self.extraer_total(datos), time.monotonic()
+                if response.status_code not in CODIGOS_REINTENTO_PAGINA or intento == self.reintentos:
+                    logger.error(f"Error HTTP {response.status_code}: {response.text[:300]} | URL: {url_pagina}")
+                    response.raise_for_status()
+                    raise requests.exceptions.HTTPError(f'Respuesta {response.status_code} inesperada', response=response)
+            except requests.exceptions.HTTPError:
+                raise
+            except requests.exceptions.RequestException as e:
+                if intento == self.reintentos:
+                    logger.error(f"Error de conexión: {str(e)} | URL: {url_pagina}")
+                    raise
+            time.sleep(self.espera_inicial * 2 ** intento)
+
+    def cerrar(self):
+        self.session.close()
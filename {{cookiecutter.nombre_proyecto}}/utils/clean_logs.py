@@ -1,15 +1,32 @@
 # Importaciones de la biblioteca estándar de Python
 import os
+import re
+import gzip
 import time
-from pathlib import Path
+import shutil
+import threading
+from datetime import datetime, date, timedelta
 
 # Importaciones propias
-from utils.logger import logger_info, logger_debug, logger_error
+from utils.logger import logger
+
+# Fecha en el nombre de los archivos: debug_2024-01-31.log, eventos_2024-01-31.jsonl o reporte_20240131_103000.csv
+PATRON_FECHA_NOMBRE = re.compile(r'(?<!\d)(\d{4})(-?)(\d{2})\2(\d{2})(?!\d)')
+
+# Archivos de texto que se comprimen, incluidos los respaldos de la rotación por tamaño (debug_2024-01-31.log.1)
+PATRON_COMPRIMIBLE = re.compile(r'\.(log|jsonl|txt|csv)(\.\d+)?$')
+
+# Carpetas de exportación que se limpian junto con la carpeta de logs
+CARPETAS_EXPORTACION = ('Exportar', 'ArchivosExportados')
+
+# Hilo de la limpieza en curso, para no iniciar otra mientras no termine (ver iniciar_limpieza_en_segundo_plano)
+_hilo_limpieza = None
+_lock_limpieza = threading.Lock()
 
 def clean_old_logs(directory: str, max_age_minutes: int):
     """
     Elimina archivos en la carpeta de logs si la fecha de modificación supera un tiempo en minutos.
-    
+
     :param directory: Ruta de la carpeta donde se encuentran los archivos de log
     :param max_age_minutes: Tiempo máximo en minutos antes de eliminar un archivo (por defecto 5 minutos para pruebas)
     """
@@ -18,28 +35,219 @@ def clean_old_logs(directory: str, max_age_minutes: int):
         max_age_seconds = max_age_minutes * 60
         current_time = time.time()
 
-        # Crear el Path del directorio de logs
-        log_directory = Path(directory)
-        
         # Verificar si el directorio existe
-        if not log_directory.exists():
-            logger_info.info(f"La carpeta {directory} no existe. No se realizó ninguna limpieza.")
+        if not os.path.isdir(directory):
+            logger.info(f"La carpeta {directory} no existe. No se realizó ninguna limpieza.")
             return
-        
-        # Iterar sobre todos los archivos del directorio
-        for log_file in log_directory.iterdir():
-            if log_file.is_file():  # Asegurarse de que es un archivo y no un directorio
-                # Obtener el tiempo de la última modificación
-                last_modified_time = log_file.stat().st_mtime
-                file_age = current_time - last_modified_time
-                
-                # Si el archivo supera la edad máxima permitida, eliminarlo
-                if file_age > max_age_seconds:
-                    logger_info.info(f"Eliminando archivo antiguo: {log_file}. Con ultima fecha de modifiacción {last_modified_time}")
-                    log_file.unlink()  # Borrar el archivo
+
+        # Iterar sobre todos los archivos del directorio, os.scandir trae el tipo y los datos de cada archivo en el mismo recorrido
+        for archivo in barrer_carpeta(directory):
+            file_age = current_time - archivo['modificado']
+
+            # Si el archivo supera la edad máxima permitida, eliminarlo
+            if file_age > max_age_seconds:
+                logger.info(f"Eliminando archivo antiguo: {archivo['ruta']}. Con ultima fecha de modifiacción {archivo['modificado']}")
+                _eliminar(archivo)
 
     except FileNotFoundError as e:
-        logger_error.error(f"Error: {e}. No se encontró la carpeta de logs. El proceso continuará sin detenerse.")
+        logger.error(f"Error: {e}. No se encontró la carpeta de logs. El proceso continuará sin detenerse.")
     except Exception as e:
-        logger_error.error(f"Ocurrió un error inesperado: {e}. El proceso continuará.")
+        logger.error(f"Ocurrió un error inesperado: {e}. El proceso continuará.")
+
+def barrer_carpeta(directorio: str) -> list:
+    """
+    Lista los archivos de una carpeta (sin subcarpetas) con su tamaño, fecha de modificación y fecha en el nombre.
+
+    Usa os.scandir, que obtiene el tipo de cada entrada al listar la carpeta y en Windows también
+    su tamaño y fecha, en lugar de hacer una llamada a stat() adicional por archivo.
+
+    :param directorio: Ruta de la carpeta
+    :return: Lista de diccionarios con las llaves 'nombre', 'ruta', 'tamano', 'modificado' y 'fecha'
+    """
+    archivos = []
+    with os.scandir(directorio) as entradas:
+        for entrada in entradas:
+            if not entrada.is_file(follow_symlinks=False):
+                continue
+            try:
+                estado = entrada.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                # El archivo se eliminó mientras se recorría la carpeta
+                continue
+            archivos.append({
+                'nombre': entrada.name,
+                'ruta': entrada.path,
+                'tamano': estado.st_size,
+                'modificado': estado.st_mtime,
+                'fecha': fecha_en_nombre(entrada.name),
+            })
+    return archivos
+
+def fecha_en_nombre(nombre_archivo: str):
+    """
+    Devuelve la fecha incluida en el nombre del archivo (YYYY-MM-DD o YYYYMMDD) o None si no tiene.
+    """
+    coincidencia = PATRON_FECHA_NOMBRE.search(nombre_archivo)
+    if not coincidencia:
+        return None
+    try:
+        anio, _, mes, dia = coincidencia.groups()
+        return date(int(anio), int(mes), int(dia))
+    except ValueError:
+        return None
+
+def aplicar_retencion(directorio: str, max_dias: int = None, max_tamano_bytes: int = None, comprimir: bool = True) -> dict:
+    """
+    Aplica la política de retención a una carpeta de logs o de archivos exportados.
+
+    1. Elimina los archivos con más de `max_dias` días, según la fecha del nombre o, si no tiene, la fecha de modificación.
+    2. Comprime con gzip los archivos de texto de días anteriores.
+    3. Si la carpeta sigue ocupando más de `max_tamano_bytes`, elimina los archivos más antiguos hasta respetar el límite.
+
+    Los archivos del día actual, por la fecha del nombre o por la de modificación, no se eliminan ni se
+    comprimen: el logger y el registro de eventos los tienen abiertos (incluido el archivo del día
+    anterior en un proceso que sigue en ejecución después de la medianoche).
+
+    :param directorio: Ruta de la carpeta
+    :param max_dias: Días que se conservan los archivos (None = sin límite de días)
+    :param max_tamano_bytes: Tamaño máximo de la carpeta en bytes (None = sin límite de tamaño)
+    :param comprimir: Comprimir con gzip los archivos de días anteriores
+    :return: Resumen con la cantidad de archivos eliminados y comprimidos y los bytes liberados
+    """
+    resumen = {'carpeta': str(directorio), 'eliminados': 0, 'comprimidos': 0, 'bytes_liberados': 0}
+    if not os.path.isdir(directorio):
+        return resumen
+
+    hoy = datetime.now().date()
+    archivos = barrer_carpeta(directorio)
+
+    # 1. Eliminar por antigüedad
+    if max_dias is not None:
+        limite = hoy - timedelta(days=max_dias)
+        conservados = []
+        for archivo in archivos:
+            fecha = archivo['fecha'] or datetime.fromtimestamp(archivo['modificado']).date()
+            if fecha < limite and not _es_de_hoy(archivo, hoy) and _eliminar(archivo):
+                resumen['eliminados'] += 1
+                resumen['bytes_liberados'] += archivo['tamano']
+            else:
+                conservados.append(archivo)
+        archivos = conservados
+
+    # 2. Comprimir los archivos de días anteriores
+    if comprimir:
+        for archivo in archivos:
+            if archivo['fecha'] and not _es_de_hoy(archivo, hoy) and archivo['fecha'] < hoy and PATRON_COMPRIMIBLE.search(archivo['nombre']):
+                tamano_comprimido = comprimir_archivo(archivo['ruta'])
+                if tamano_comprimido is not None:
+                    resumen['comprimidos'] += 1
+                    resumen['bytes_liberados'] += archivo['tamano'] - tamano_comprimido
+                    archivo.update(ruta=archivo['ruta'] + '.gz', nombre=archivo['nombre'] + '.gz', tamano=tamano_comprimido)
+
+    # 3. Limitar el tamaño total eliminando primero los archivos más antiguos
+    if max_tamano_bytes is not None:
+        tamano_total = sum(archivo['tamano'] for archivo in archivos)
+        for archivo in sorted(archivos, key=lambda archivo: archivo['modificado']):
+            if tamano_total <= max_tamano_bytes:
+                break
+            if _es_de_hoy(archivo, hoy):
+                continue
+            if _eliminar(archivo):
+                tamano_total -= archivo['tamano']
+                resumen['eliminados'] += 1
+                resumen['bytes_liberados'] += archivo['tamano']
+
+    if resumen['eliminados'] or resumen['comprimidos']:
+        logger.info("Retención en %s: %s archivos eliminados, %s comprimidos, %.1f MB liberados.", directorio,
+                    resumen['eliminados'], resumen['comprimidos'], resumen['bytes_liberados'] / (1024 * 1024))
+    return resumen
+
+def comprimir_archivo(ruta: str):
+    """
+    Comprime un archivo con gzip (ruta + '.gz') y elimina el original.
+
+    Se escribe primero un archivo temporal para no dejar un .gz incompleto si el proceso se interrumpe.
+
+    :param ruta: Ruta del archivo a comprimir
+    :return: Tamaño del archivo comprimido en bytes, o None si no se pudo comprimir
+    """
+    ruta_gz = ruta + '.gz'
+    ruta_temporal = ruta_gz + '.tmp'
+    try:
+        with open(ruta, 'rb') as origen, gzip.open(ruta_temporal, 'wb', compresslevel=6) as destino:
+            shutil.copyfileobj(origen, destino, 1024 * 1024)
+        # Conservar la fecha de modificación del original para la retención por antigüedad
+        estado = os.stat(ruta)
+        os.utime(ruta_temporal, (estado.st_atime, estado.st_mtime))
+        os.replace(ruta_temporal, ruta_gz)
+        os.remove(ruta)
+        return os.path.getsize(ruta_gz)
+    except OSError as e:
+        logger.error(f"No se pudo comprimir el archivo {ruta}: {e}")
+        try:
+            os.remove(ruta_temporal)
+        except OSError:
+            pass
+        return None
+
+def _es_de_hoy(archivo: dict, hoy: date) -> bool:
+    return archivo['fecha'] == hoy or datetime.fromtimestamp(archivo['modificado']).date() == hoy
+
+def _eliminar(archivo: dict) -> bool:
+    try:
+        os.remove(archivo['ruta'])
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        # En Windows no se pueden eliminar los archivos que otro proceso tiene abiertos
+        logger.error(f"No se pudo eliminar el archivo {archivo['ruta']}: {e}")
+        return False
+
+def limpiar_carpetas(carpeta_logs: str = None, dias_logs: int = None, dias_exportaciones: int = None, max_tamano_logs_mb: int = None) -> list:
+    """
+    Aplica la retención a la carpeta de logs (con compresión y límite de tamaño) y a las carpetas de exportación.
+
+    Los valores que no se indican se toman de la configuración (DIAS_RETENCION_LOGS,
+    DIAS_RETENCION_EXPORTACIONES y TAMANO_MAXIMO_LOGS_MB en el .env).
+
+    :return: Lista con el resumen de cada carpeta
+    """
+    from utils.configuracion import obtener_configuracion
+
+    configuracion = obtener_configuracion()
+    carpeta_logs = carpeta_logs or configuracion.NOMBRE_CARPETA_LOGS
+    dias_logs = configuracion.DIAS_RETENCION_LOGS if dias_logs is None else dias_logs
+    dias_exportaciones = configuracion.DIAS_RETENCION_EXPORTACIONES if dias_exportaciones is None else dias_exportaciones
+    max_tamano_logs_mb = configuracion.TAMANO_MAXIMO_LOGS_MB if max_tamano_logs_mb is None else max_tamano_logs_mb
+
+    resumenes = [aplicar_retencion(carpeta_logs, dias_logs, max_tamano_logs_mb * 1024 * 1024, comprimir=True)]
+    for carpeta in CARPETAS_EXPORTACION:
+        resumenes.append(aplicar_retencion(carpeta, dias_exportaciones, comprimir=False))
+    return resumenes
+
+def iniciar_limpieza_en_segundo_plano(**parametros) -> threading.Thread:
+    """
+    Ejecuta limpiar_carpetas en un hilo, para que la compresión de los logs no retrase el proceso principal.
+
+    El hilo no es daemon: al finalizar el proceso se espera a que termine la compresión en curso.
+    Si la limpieza anterior sigue en curso (por ejemplo en el modo programador) no se inicia otra.
+
+    :param parametros: Parámetros de limpiar_carpetas
+    :return: El hilo iniciado o el de la limpieza que sigue en curso
+    """
+    global _hilo_limpieza
+
+    def limpiar():
+        try:
+            limpiar_carpetas(**parametros)
+        except Exception as e:
+            logger.error(f"Ocurrió un error en la limpieza de archivos: {e}. El proceso continuará.")
 
+    with _lock_limpieza:
+        if _hilo_limpieza is not None and _hilo_limpieza.is_alive():
+            logger.info("La limpieza de archivos anterior sigue en curso, no se inicia otra.")
+            return _hilo_limpieza
+        _hilo_limpieza = threading.Thread(target=limpiar, name='retencion_archivos')
+        _hilo_limpieza.start()
+        return _hilo_limpieza
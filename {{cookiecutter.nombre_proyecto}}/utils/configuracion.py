@@ -0,0 +1,165 @@
+# Importaciones de la biblioteca estándar de Python
+import os
+import sys
+import logging
+import threading
+from dataclasses import dataclass, field, fields
+
+# Importaciones de terceros
+from decouple import Config, RepositoryEnv, RepositoryEmpty, UndefinedValueError
+
+# Este módulo no importa utils.logger: el logger lee su configuración desde aquí
+
+# Variables que deben existir en el .env o en las variables de entorno del sistema
+VARIABLES_OBLIGATORIAS = ('USUARIO_DB', 'CONTRASENA_DB', 'SERVIDOR_DB', 'INSTANCIA_DB', 'NOMBRE_DB', 'NOMBRE_CARPETA_LOGS')
+
+# Niveles aceptados en NIVEL_LOG
+NIVELES_LOG = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+
+def ruta_recurso(nombre_archivo: str):
+    """
+    Devuelve la ruta de un archivo cuando se ejecuta desde el código fuente o desde el .exe creado con pyinstaller.
+
+    Args:
+        nombre_archivo (str): El nombre del archivo cuya ruta se quiere obtener.
+
+    Returns:
+        str: La ruta completa del archivo.
+    """
+    # Verificar si el script se está ejecutando desde un ejecutable de PyInstaller
+    if getattr(sys, 'frozen', False):
+        # En este caso, sys._MEIPASS contiene la ruta a la carpeta temporal
+        base_path = sys._MEIPASS
+    else:
+        # Si no es un ejecutable de PyInstaller, obtener la ruta de la carpeta actual
+        base_path = os.path.abspath(".")
+    # Unir la ruta base con el nombre del archivo y devolverla
+    return os.path.join(base_path, nombre_archivo)
+
+
+@dataclass(frozen=True)
+class Configuracion:
+    """
+    Variables de entorno del proyecto, leídas y validadas una sola vez por proceso.
+
+    Es inmutable y se puede serializar con pickle, por lo que se puede enviar tal cual a los
+    procesos de trabajo (ver `inicializar_configuracion`). Los secretos no se muestran en su repr.
+    """
+    USUARIO_DB: str
+    CONTRASENA_DB: str = field(repr=False)
+    SERVIDOR_DB: str
+    INSTANCIA_DB: str
+    NOMBRE_DB: str
+    NOMBRE_CARPETA_LOGS: str
+    NIVEL_LOG: str = 'DEBUG'
+
+    # Credenciales de Shopify, opcionales porque no todos los proyectos las usan
+    SHOPIFY_API_KEY: str = field(default=None, repr=False)
+    SHOPIFY_API_SECRET: str = field(default=None, repr=False)
+    SHOPIFY_ACCESS_TOKEN: str = field(default=None, repr=False)
+    SHOPIFY_STORE_NAME: str = None
+
+    # Retención de archivos (ver utils/clean_logs.py)
+    DIAS_RETENCION_LOGS: int = 30
+    DIAS_RETENCION_EXPORTACIONES: int = 30
+    TAMANO_MAXIMO_LOGS_MB: int = 1024
+
+    # Notificaciones por correo (ver utils/notificaciones.py), desactivadas si no se define SMTP_SERVIDOR
+    SMTP_SERVIDOR: str = None
+    SMTP_PUERTO: int = 587
+    SMTP_USUARIO: str = None
+    SMTP_CONTRASENA: str = field(default=None, repr=False)
+    SMTP_STARTTLS: bool = False
+    CORREO_REMITENTE: str = None
+    CORREO_DESTINATARIOS: str = None
+
+    # Perfilado opcional (ver utils/perfilado.py): tiempos, cprofile y/o tracemalloc separados por comas
+    PERFILADO: str = None
+
+    # Métricas en formato Prometheus (ver utils/metricas.py): puerto del endpoint /metrics, 0 = solo el archivo final
+    METRICAS_PUERTO: int = None
+
+    # Resultados intermedios (ver utils/almacen_datos.py): minutos que se reutiliza la consulta guardada, 0 = siempre se consulta
+    MINUTOS_REUTILIZAR_INTERMEDIOS: int = 0
+
+    @property
+    def nivel_log(self) -> int:
+        """Nivel de logging correspondiente a NIVEL_LOG."""
+        return logging.getLevelName(self.NIVEL_LOG)
+
+
+def cargar_configuracion(ruta_env: str = None) -> Configuracion:
+    """
+    Lee el archivo .env y las variables de entorno del sistema y valida la configuración.
+
+    Las variables de entorno del sistema tienen prioridad sobre las del archivo .env, lo que permite
+    sobrescribir un valor en un servidor sin modificar el archivo. Si el archivo no existe solo se
+    usan las variables de entorno del sistema.
+
+    Args:
+        ruta_env (str, opcional): Ruta del archivo .env, por defecto el .env junto al proyecto o al .exe.
+
+    Returns:
+        Configuracion: Configuración validada.
+
+    Raises:
+        UndefinedValueError: Si falta alguna de las variables obligatorias (se indican todas las faltantes).
+        ValueError: Si NIVEL_LOG no es un nivel válido o una variable numérica no es un número.
+    """
+    ruta_env = ruta_env or ruta_recurso('.env')
+    repositorio = RepositoryEnv(ruta_env) if os.path.exists(ruta_env) else RepositoryEmpty()
+    config = Config(repositorio)
+
+    faltantes = [nombre for nombre in VARIABLES_OBLIGATORIAS if config(nombre, default=None) is None]
+    if faltantes:
+        raise UndefinedValueError(f"Faltan las variables de entorno {', '.join(faltantes)} (archivo {ruta_env}).")
+
+    valores = {}
+    for campo in fields(Configuracion):
+        # Los valores del .env son texto, los campos numéricos y booleanos se convierten (un valor inválido lanza ValueError)
+        if campo.type in (int, bool):
+            # Los campos opcionales sin valor por defecto (None) se dejan en None si no están definidos
+            definido = config(campo.name, default=None) not in (None, '')
+            valores[campo.name] = config(campo.name, cast=campo.type) if definido else campo.default
+        else:
+            valores[campo.name] = config(campo.name, default=campo.default)
+    valores['NIVEL_LOG'] = str(valores['NIVEL_LOG']).upper()
+    if valores['NIVEL_LOG'] not in NIVELES_LOG:
+        raise ValueError(f"NIVEL_LOG={valores['NIVEL_LOG']} no es válido, use uno de {', '.join(NIVELES_LOG)}.")
+
+    return Configuracion(**valores)
+
+
+_configuracion = None
+_lock_configuracion = threading.Lock()
+
+
+def obtener_configuracion() -> Configuracion:
+    """
+    Devuelve la configuración del proceso; el .env se lee y se valida solo la primera vez.
+
+    Ejemplo:
+        configuracion = obtener_configuracion()
+        configuracion.USUARIO_DB
+    """
+    global _configuracion
+    if _configuracion is None:
+        with _lock_configuracion:
+            if _configuracion is None:
+                _configuracion = cargar_configuracion()
+    return _configuracion
+
+
+def inicializar_configuracion(configuracion: Configuracion):
+    """
+    Establece la configuración del proceso sin leer el .env.
+
+    Se usa al iniciar los procesos de trabajo, para que reciban la configuración ya validada por el
+    proceso principal en lugar de volver a leer el archivo (ver `argumentos_proceso_trabajo` en utils/logger.py):
+
+        ProcessPoolExecutor(max_workers=4, **argumentos_proceso_trabajo())
+    """
+    global _configuracion
+    with _lock_configuracion:
+        _configuracion = configuracion
@@ -0,0 +1,341 @@
+# Importaciones de la biblioteca estándar de Python
+import time
+import uuid
+import random
+from dataclasses import dataclass
+from typing import Callable, Union
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Importaciones de terceros
+import requests
+import pandas as pd
+from requests.utils import requote_uri
+from requests.adapters import HTTPAdapter
+
+# Importaciones propias
+from utils.logger import logger
+from utils.api_conexion import decodificar_respuesta
+from utils.eventos_ejecucion import obtener_registro_eventos, ETAPA_API_ACTUALIZACION
+
+# Solicitudes simultáneas por defecto
+MAX_CONCURRENCIA_ESCRITURA = 8
+
+# Códigos HTTP que se reintentan (límite de solicitudes y errores temporales del servidor)
+CODIGOS_REINTENTO = (429, 500, 502, 503, 504)
+
+# Encabezado con el que se envía la llave de idempotencia (None para no enviarla)
+ENCABEZADO_IDEMPOTENCIA = 'Idempotency-Key'
+
+# Longitud máxima de la URL de un lote de ids; 2000 caracteres es un límite aceptado por casi todos los servidores y proxies
+MAX_LONGITUD_URL = 2000
+
+# Códigos con los que el servidor rechaza un lote demasiado grande (cuerpo o URL); el lote se divide a la mitad y se reenvía
+CODIGOS_LOTE_DEMASIADO_GRANDE = (413, 414)
+
+
+def dividir_en_lotes(longitudes: list, longitud_disponible: int, max_por_lote: int = None, longitud_separador: int = 1) -> list:
+    """
+    Agrupa valores consecutivos en la menor cantidad de lotes cuya longitud total no supera la disponible.
+
+    Args:
+        longitudes (list): Longitud de cada valor tal como se escribe en la URL.
+        longitud_disponible (int): Caracteres disponibles para los valores del lote (URL máxima menos la parte fija).
+        max_por_lote (int, opcional): Cantidad máxima de valores por lote que acepta el servidor.
+        longitud_separador (int): Longitud del separador entre valores.
+
+    Returns:
+        list: Rangos de posiciones de cada lote. Un valor que no cabe solo queda en su propio lote.
+    """
+    lotes = []
+    inicio, longitud = 0, 0
+    for posicion, longitud_valor in enumerate(longitudes):
+        cantidad = posicion - inicio
+        nueva_longitud = longitud + longitud_valor + (longitud_separador if cantidad else 0)
+        if cantidad and (nueva_longitud > longitud_disponible or (max_por_lote and cantidad >= max_por_lote)):
+            lotes.append(range(inicio, posicion))
+            inicio, nueva_longitud = posicion, longitud_valor
+        longitud = nueva_longitud
+    if inicio < len(longitudes):
+        lotes.append(range(inicio, len(longitudes)))
+    return lotes
+
+
+@dataclass
+class OperacionMasiva:
+    """
+    Endpoint que recibe varios registros en una sola solicitud, por ejemplo PUT users/disable/[1,2,3].
+
+    Atributos:
+        url (Callable): Función que recibe las filas del lote (lista de diccionarios) y devuelve la URL.
+        tamano_lote (int): Cantidad máxima de registros por solicitud.
+        cuerpo (Callable, opcional): Función que recibe las filas del lote y devuelve el cuerpo JSON (None = sin cuerpo).
+        metodo (str): Método HTTP de la solicitud.
+    """
+    url: Callable
+    tamano_lote: int = 100
+    cuerpo: Callable = None
+    metodo: str = 'PUT'
+
+
+class EscritorAPI:
+    """
+    Envía solicitudes de creación y actualización (POST/PUT/PATCH) a una API REST en paralelo.
+
+    Reemplaza el patrón de recorrer un DataFrame con iterrows() y enviar una solicitud bloqueante por
+    fila: las filas se envían desde un pool de hilos con una concurrencia máxima, sobre una sesión
+    HTTP que reutiliza las conexiones, con reintentos con espera exponencial para los errores 429/5xx
+    y de conexión, y una llave de idempotencia por registro para que un reintento no cree duplicados
+    en las APIs que la soportan. El resultado de cada fila se devuelve en un DataFrame.
+
+    Ejemplo:
+        escritor = EscritorAPI('https://api.intrena.co/v1/', {'x-api-key': API_KEY}, max_concurrencia=10)
+        resultado = escritor.escribir(usuarios_a_crear, 'POST', 'users', cuerpo=lambda fila: {...})
+        resultado = escritor.escribir(usuarios_a_inactivar, masiva=OperacionMasiva(
+            url=lambda filas: 'users/disable/[' + ','.join(str(fila['id']) for fila in filas) + ']', tamano_lote=200))
+    """
+
+    def __init__(self, url_base: str = '', encabezados: dict = None, max_concurrencia: int = MAX_CONCURRENCIA_ESCRITURA,
+                 reintentos: int = 3, espera_inicial: float = 1.0, espera_maxima: float = 30.0, timeout: float = 30.0,
+                 codigos_reintento: tuple = CODIGOS_REINTENTO, encabezado_idempotencia: str = ENCABEZADO_IDEMPOTENCIA,
+                 session: requests.Session = None):
+        """
+        Args:
+            url_base (str): Prefijo de las URLs relativas.
+            encabezados (dict, opcional): Encabezados comunes (autenticación, Content-Type, etc.), se crean una sola vez.
+            max_concurrencia (int): Cantidad máxima de solicitudes simultáneas.
+            reintentos (int): Reintentos por solicitud ante un código de `codigos_reintento` o un error de conexión.
+            espera_inicial (float): Segundos de espera antes del primer reintento; se duplica en cada reintento (con variación aleatoria).
+            espera_maxima (float): Espera máxima entre reintentos en segundos.
+            timeout (float): Tiempo máximo de cada solicitud en segundos.
+            codigos_reintento (tuple): Códigos HTTP que se reintentan.
+            encabezado_idempotencia (str, opcional): Encabezado de la llave de idempotencia, None para no enviarla.
+            session (requests.Session, opcional): Sesión a reutilizar (por ejemplo la de RecursosCompartidos).
+        """
+        self.url_base = url_base
+        self.max_concurrencia = max_concurrencia
+        self.reintentos = reintentos
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.timeout = timeout
+        self.codigos_reintento = set(codigos_reintento)
+        self.encabezado_idempotencia = encabezado_idempotencia
+
+        # Los encabezados se envían en cada solicitud para no modificar una sesión compartida
+        self.encabezados = {'Accept': 'application/json', 'Content-Type': 'application/json', **(encabezados or {})}
+        self.session = session
+        if self.session is None:
+            self.session = requests.Session()
+            # Una conexión por hilo en el pool de la sesión, para que los hilos no esperen conexiones libres
+            adaptador = HTTPAdapter(pool_connections=max_concurrencia, pool_maxsize=max_concurrencia)
+            self.session.mount('https://', adaptador)
+            self.session.mount('http://', adaptador)
+
+    def escribir(self, data_frame: pd.DataFrame, metodo: str = 'POST', url: Union[str, Callable] = None,
+                 cuerpo: Union[list, Callable] = None, masiva: OperacionMasiva = None, guardar_respuesta: bool = False) -> pd.DataFrame:
+        """
+        Envía una solicitud por fila del DataFrame, o una por lote si se indica un endpoint masivo.
+
+        Args:
+            data_frame (pd.DataFrame): Registros a enviar.
+            metodo (str): Método HTTP (POST, PUT, PATCH).
+            url (str o Callable): URL de cada fila; un texto con campos de la fila (por ejemplo 'users/{id}') o una función que recibe la fila.
+            cuerpo (list o Callable, opcional): Columnas que se envían, o función que recibe la fila y devuelve el cuerpo;
+                por defecto se envía la fila completa.
+            masiva (OperacionMasiva, opcional): Endpoint masivo; si se indica se usa en lugar de una solicitud por fila.
+            guardar_respuesta (bool): Agrega al resultado la respuesta JSON de cada solicitud (por ejemplo el id creado).
+
+        Returns:
+            pd.DataFrame: Con el mismo índice de `data_frame` y las columnas estado ('ok' o 'error'), codigo_http,
+                intentos, duracion_s, error, llave_idempotencia y, si se solicitó, respuesta.
+        """
+        # Los nulos se envían como null; to_dict('records') es mucho más rápido que iterrows()
+        filas = data_frame.astype(object).where(data_frame.notna(), None).to_dict('records')
+
+        if masiva:
+            lotes = [list(range(inicio, min(inicio + masiva.tamano_lote, len(filas))))
+                     for inicio in range(0, len(filas), masiva.tamano_lote)]
+            solicitudes = [
+                (masiva.metodo, masiva.url([filas[posicion] for posicion in lote]),
+                 masiva.cuerpo([filas[posicion] for posicion in lote]) if masiva.cuerpo else None, lote)
+                for lote in lotes
+            ]
+        else:
+            solicitudes = [(metodo, self._construir_url(url, fila), self._construir_cuerpo(cuerpo, fila), [posicion])
+                           for posicion, fila in enumerate(filas)]
+
+        resultados = [None] * len(filas)
+        inicio = time.perf_counter()
+        for (*_, posiciones), resultado in self._ejecutar(solicitudes):
+            for posicion in posiciones:
+                resultados[posicion] = resultado
+
+        salida = pd.DataFrame(resultados, index=data_frame.index,
+                              columns=['estado', 'codigo_http', 'intentos', 'duracion_s', 'error', 'llave_idempotencia', 'respuesta'])
+        if not guardar_respuesta:
+            salida = salida.drop(columns='respuesta')
+
+        errores = int((salida['estado'] != 'ok').sum())
+        logger.info("Escritura en la API: %s registros en %s solicitudes, %s con error, %.1fs.",
+                    len(filas), len(solicitudes), errores, time.perf_counter() - inicio)
+        return salida
+
+    def escribir_ids(self, ids, plantilla: str, metodo: str = 'PUT', max_por_lote: int = None,
+                     max_longitud_url: int = MAX_LONGITUD_URL, separador: str = ',', cuerpo=None) -> pd.DataFrame:
+        """
+        Aplica una operación masiva a una lista de ids, por ejemplo inactivar usuarios con PUT users/disable/[ids].
+
+        Los ids se dividen en la menor cantidad de lotes que respetan la longitud máxima de la URL (ya
+        codificada) y el máximo de ids por lote del servidor; los lotes se envían en paralelo. Si el
+        servidor rechaza un lote por su tamaño (413/414) se divide a la mitad y se reenvía.
+
+        Args:
+            ids (Iterable): Ids a los que se aplica la operación.
+            plantilla (str): URL con el campo {ids} donde se escriben los ids del lote separados por `separador`,
+                por ejemplo 'users/disable/[{ids}]'.
+            metodo (str): Método HTTP.
+            max_por_lote (int, opcional): Cantidad máxima de ids por solicitud que acepta el servidor.
+            max_longitud_url (int): Longitud máxima de la URL completa.
+            separador (str): Separador de los ids en la URL.
+            cuerpo (opcional): Cuerpo JSON que se envía en cada solicitud.
+
+        Returns:
+            pd.DataFrame: Una fila por id con las columnas id, lote, estado, codigo_http, intentos, duracion_s, error y llave_idempotencia.
+        """
+        ids = list(ids)
+        textos = [str(id_registro) for id_registro in ids]
+        url_vacia = plantilla.format(ids='')
+        if not url_vacia.startswith(('http://', 'https://')):
+            url_vacia = self.url_base + url_vacia
+        lotes = dividir_en_lotes([len(requote_uri(texto)) for texto in textos], max_longitud_url - len(requote_uri(url_vacia)),
+                                 max_por_lote, len(requote_uri(separador)))
+
+        inicio = time.perf_counter()
+        resultados = [None] * len(ids)
+        numero_lote = [None] * len(ids)
+        divididos = 0
+        pendientes = lotes
+        while pendientes:
+            solicitudes = [(metodo, plantilla.format(ids=separador.join(textos[posicion] for posicion in lote)), cuerpo, lote)
+                           for lote in pendientes]
+            pendientes = []
+            for (*_, lote), resultado in self._ejecutar(solicitudes):
+                if resultado[1] in CODIGOS_LOTE_DEMASIADO_GRANDE and len(lote) > 1:
+                    divididos += 1
+                    mitad = len(lote) // 2
+                    pendientes += [lote[:mitad], lote[mitad:]]
+                    continue
+                for posicion in lote:
+                    resultados[posicion] = resultado
+                    numero_lote[posicion] = lote.start
+
+        salida = pd.DataFrame(resultados, columns=['estado', 'codigo_http', 'intentos', 'duracion_s', 'error',
+                                                   'llave_idempotencia', 'respuesta']).drop(columns='respuesta')
+        salida.insert(0, 'id', ids)
+        # Los lotes se numeran en el orden de los ids
+        salida.insert(1, 'lote', pd.factorize(pd.Series(numero_lote, dtype='int64'), sort=True)[0])
+
+        errores = int((salida['estado'] != 'ok').sum())
+        logger.info("Operación masiva %s %s: %s ids en %s lotes (%s divididos por tamaño), %s con error, %.1fs.",
+                    metodo, plantilla, len(ids), salida['lote'].nunique(), divididos, errores, time.perf_counter() - inicio)
+        return salida
+
+    @staticmethod
+    def _construir_url(url: Union[str, Callable], fila: dict) -> str:
+        return url(fila) if callable(url) else url.format(**fila)
+
+    @staticmethod
+    def _construir_cuerpo(cuerpo: Union[list, Callable], fila: dict):
+        if cuerpo is None:
+            return fila
+        if callable(cuerpo):
+            return cuerpo(fila)
+        return {columna: fila[columna] for columna in cuerpo}
+
+    def _ejecutar(self, solicitudes: list):
+        """
+        Ejecuta las solicitudes en el pool de hilos manteniendo como máximo el doble de la concurrencia en espera,
+        y entrega cada solicitud con su resultado a medida que terminan.
+        """
+        pendientes = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrencia, thread_name_prefix='escritura_api') as ejecutor:
+            for solicitud in solicitudes:
+                pendientes[ejecutor.submit(self._enviar, *solicitud[:3])] = solicitud
+                if len(pendientes) >= self.max_concurrencia * 2:
+                    terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                    for futuro in terminados:
+                        yield pendientes.pop(futuro), futuro.result()
+            for futuro in list(pendientes):
+                yield pendientes.pop(futuro), futuro.result()
+
+    def _enviar(self, metodo: str, url: str, cuerpo) -> tuple:
+        """
+        Envía una solicitud con reintentos. Nunca lanza excepciones: el error queda en el resultado.
+        """
+        url_completa = url if url.startswith(('http://', 'https://')) else self.url_base + url
+        # La llave identifica esta operación: se reutiliza solo en sus reintentos
+        llave = self.llave_idempotencia()
+        encabezados = dict(self.encabezados)
+        if self.encabezado_idempotencia:
+            encabezados[self.encabezado_idempotencia] = llave
+
+        inicio = time.perf_counter()
+        codigo, error, respuesta = None, None, None
+        for intento in range(1, self.reintentos + 2):
+            espera = None
+            try:
+                with obtener_registro_eventos().medir(ETAPA_API_ACTUALIZACION, endpoint=url_completa, intento=intento) as evento:
+                    response = self.session.request(metodo, url_completa, json=cuerpo, headers=encabezados, timeout=self.timeout)
+                    codigo = evento['codigo_http'] = response.status_code
+                    evento['estado'] = 'ok' if response.ok else 'error'
+                if response.ok:
+                    error = None
+                    respuesta = self._respuesta(response)
+                    break
+                error = f'HTTP {response.status_code}: {response.text[:300]}'
+                if response.status_code not in self.codigos_reintento:
+                    break
+                espera = self._retry_after(response)
+            except requests.exceptions.RequestException as e:
+                codigo, error = None, f'Error de conexión: {e}'
+
+            if intento <= self.reintentos:
+                time.sleep(espera if espera is not None else self._espera(intento))
+
+        if error:
+            logger.error(f'Error en {metodo} {url_completa} después de {intento} intentos: {error}')
+        estado = 'ok' if error is None else 'error'
+        return estado, codigo, intento, round(time.perf_counter() - inicio, 4), error, llave, respuesta
+
+    @staticmethod
+    def _respuesta(response):
+        # La escritura ya se aplicó: si la respuesta no es JSON se conserva como texto en lugar de marcarla como error
+        if not response.content:
+            return None
+        try:
+            return decodificar_respuesta(response)
+        except ValueError:
+            return response.text
+
+    def _espera(self, intento: int) -> float:
+        # Espera exponencial con variación aleatoria completa, para que los hilos no reintenten todos al mismo tiempo
+        return random.uniform(0, min(self.espera_maxima, self.espera_inicial * 2 ** (intento - 1)))
+
+    def _retry_after(self, response) -> float:
+        try:
+            return min(float(response.headers['Retry-After']), self.espera_maxima)
+        except (KeyError, ValueError):
+            return None
+
+    @staticmethod
+    def llave_idempotencia() -> str:
+        """
+        Genera la llave de una operación, que se envía igual en todos sus reintentos.
+
+        No se calcula a partir del método, la URL y el cuerpo: una operación que se repite a propósito
+        (por ejemplo inactivar, activar y volver a inactivar un usuario) debe llevar una llave nueva, o
+        la API la tomaría como un reintento y devolvería la respuesta guardada sin aplicarla.
+        """
+        return uuid.uuid4().hex
+
+    def cerrar(self):
+        self.session.close()
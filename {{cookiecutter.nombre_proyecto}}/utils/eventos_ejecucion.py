@@ -0,0 +1,362 @@
+# Importaciones de la biblioteca estándar de Python
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import queue
+import atexit
+import argparse
+import threading
+import multiprocessing
+import multiprocessing.util
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Importaciones propias
+from utils import metricas
+from utils.logger import logger, obtener_carpeta_logs
+
+# Etapas que se registran en el archivo de eventos
+ETAPA_CONEXION_BD = 'conexion_bd'
+ETAPA_CONSULTA = 'consulta'
+ETAPA_FETCH = 'fetch'
+ETAPA_EXPORTACION = 'exportacion'
+ETAPA_API_PAGINA = 'api_pagina'
+ETAPA_API_ACTUALIZACION = 'api_actualizacion'
+
+# Eventos máximos que el hilo de escritura escribe en el archivo antes de hacer flush
+MAX_EVENTOS_LOTE = 500
+
+# Segundos que el hilo de escritura espera nuevos eventos antes de revisar la cola otra vez
+INTERVALO_ESCRITURA = 1.0
+
+
+class RegistroEventos:
+    """
+    Registro estructurado de la ejecución en formato JSON lines (un evento JSON por línea).
+
+    Cada evento contiene el id de la ejecución, la etapa, la duración en segundos, el estado
+    y opcionalmente la cantidad de filas, los bytes transferidos y el endpoint consultado,
+    para poder analizar en qué etapas se consume el tiempo de cada ejecución.
+
+    `registrar` solo agrega el evento a una cola: un hilo lo escribe en el archivo junto con los
+    demás eventos pendientes y hace un solo flush por lote, para no escribir en disco en cada
+    página o consulta. `esperar` y `cerrar` escriben los eventos que quedan en la cola.
+    """
+
+    def __init__(self, carpeta: str, id_ejecucion: str = None):
+        """
+        Args:
+            carpeta (str): Carpeta donde se crea el archivo eventos_YYYY-MM-DD.jsonl (normalmente la carpeta de logs).
+            id_ejecucion (str, opcional): Identificador de la ejecución, si no se indica se genera uno nuevo.
+        """
+        self.id_ejecucion = id_ejecucion or uuid.uuid4().hex[:12]
+        self.carpeta = Path(carpeta)
+        self.fecha_archivo = datetime.now().strftime('%Y-%m-%d')
+        self.ruta = self.carpeta / f'eventos_{self.fecha_archivo}.jsonl'
+        self._lock = threading.Lock()
+        self._archivo = None
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._pid = os.getpid()
+
+    def registrar(self, etapa: str, duracion: float, estado: str = 'ok', filas: int = None, bytes: int = None, endpoint: str = None, **campos):
+        """
+        Agrega un evento a la cola de escritura del archivo de la ejecución.
+
+        Args:
+            etapa (str): Nombre de la etapa (conexion_bd, consulta, fetch, exportacion, api_pagina, api_actualizacion...).
+            duracion (float): Duración de la etapa en segundos.
+            estado (str): 'ok' o 'error'.
+            filas (int, opcional): Cantidad de filas procesadas.
+            bytes (int, opcional): Cantidad de bytes leídos o escritos.
+            endpoint (str, opcional): URL o ruta del endpoint consultado, se guarda solo la ruta sin parámetros.
+            **campos: Campos adicionales del evento (código HTTP, nombre de archivo, etc.).
+        """
+        ahora = datetime.now()
+        evento = {
+            'ejecucion': self.id_ejecucion,
+            'fecha': ahora.isoformat(timespec='milliseconds'),
+            'etapa': etapa,
+            'duracion_s': round(duracion, 6),
+            'estado': estado,
+        }
+        if filas is not None:
+            evento['filas'] = filas
+        if bytes is not None:
+            evento['bytes'] = bytes
+        if endpoint:
+            evento['endpoint'] = normalizar_endpoint(endpoint)
+        evento.update(campos)
+        metricas.observar_evento(etapa, duracion, estado, filas, bytes, evento.get('endpoint'), campos.get('codigo_http'))
+
+        self._iniciar_hilo()
+        self._cola.put((ahora.strftime('%Y-%m-%d'), json.dumps(evento, ensure_ascii=False, default=str) + '\n'))
+
+    @contextmanager
+    def medir(self, etapa: str, **campos):
+        """
+        Mide la duración de un bloque de código y registra el evento al finalizar.
+
+        El bloque recibe un diccionario en el que puede agregar o actualizar campos del evento
+        (por ejemplo filas, bytes o codigo_http). Si ocurre una excepción el evento se registra
+        con estado 'error' y la excepción se propaga.
+
+        Ejemplo:
+            with registro.medir(ETAPA_CONSULTA) as evento:
+                df = ejecutar_consulta_pyodbc(conexion, consulta)
+                evento['filas'] = len(df)
+        """
+        evento = dict(campos)
+        metricas.cambiar_en_curso(etapa, 1)
+        inicio = time.perf_counter()
+        try:
+            yield evento
+        except Exception as e:
+            evento['estado'] = 'error'
+            evento['error'] = str(e)[:300]
+            raise
+        finally:
+            metricas.cambiar_en_curso(etapa, -1)
+            self.registrar(etapa, time.perf_counter() - inicio, **evento)
+
+    def nueva_ejecucion(self, id_ejecucion: str = None) -> str:
+        """
+        Cambia el id de la ejecución, para los procesos que ejecutan el trabajo varias veces (ver services/programador.py).
+        """
+        with self._lock:
+            self.id_ejecucion = id_ejecucion or uuid.uuid4().hex[:12]
+        return self.id_ejecucion
+
+    def esperar(self, timeout: float = None) -> bool:
+        """
+        Espera a que se escriban los eventos de la cola.
+
+        Returns:
+            bool: True si la cola quedó vacía antes de `timeout`.
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        while self._cola.unfinished_tasks:
+            if limite is not None and time.monotonic() >= limite:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def cerrar(self, timeout: float = 30):
+        """
+        Escribe los eventos pendientes, detiene el hilo de escritura y cierra el archivo.
+        Si después se registran más eventos el hilo se inicia de nuevo.
+        """
+        with self._lock:
+            if self._hilo is None or self._pid != os.getpid():
+                return
+            self._cola.put(None)
+            self._hilo.join(timeout)
+            if self._hilo.is_alive():
+                logger.warning("Quedaron %s eventos sin escribir en %s al cerrar el registro.", self._cola.qsize(), self.ruta)
+            self._hilo = None
+
+    def _iniciar_hilo(self):
+        if self._hilo is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Proceso hijo creado con fork: el hilo, la cola y el archivo son copias del proceso padre
+                self._cola = queue.Queue()
+                self._hilo = None
+                self._archivo = None
+                self._pid = os.getpid()
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._trabajar, name='eventos_ejecucion', daemon=True)
+                self._hilo.start()
+                if multiprocessing.parent_process() is not None:
+                    # Los procesos de trabajo terminan sin ejecutar atexit, pero sí los finalizadores de multiprocessing
+                    multiprocessing.util.Finalize(self, self.cerrar, exitpriority=0)
+
+    def _trabajar(self):
+        cola = self._cola
+        terminar = False
+        while not terminar:
+            try:
+                lote = [cola.get(timeout=INTERVALO_ESCRITURA)]
+            except queue.Empty:
+                continue
+            # El lote termina en la marca de cierre (None) aunque queden eventos en la cola
+            while len(lote) < MAX_EVENTOS_LOTE and lote[-1] is not None:
+                try:
+                    lote.append(cola.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if lote[-1] is None:
+                    terminar = True
+                    lote.pop()
+                self._escribir(lote)
+            finally:
+                for _ in range(len(lote) + terminar):
+                    cola.task_done()
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+    def _escribir(self, lote: list):
+        # Solo el hilo de escritura usa el archivo; un lote se escribe con un solo flush
+        try:
+            for fecha_archivo, linea in lote:
+                # En los procesos que siguen en ejecución después de la medianoche se cambia al archivo del nuevo día
+                if fecha_archivo != self.fecha_archivo:
+                    if self._archivo is not None:
+                        self._archivo.close()
+                        self._archivo = None
+                    self.fecha_archivo = fecha_archivo
+                    self.ruta = self.carpeta / f'eventos_{fecha_archivo}.jsonl'
+                if self._archivo is None:
+                    self.ruta.parent.mkdir(parents=True, exist_ok=True)
+                    self._archivo = open(self.ruta, 'a', encoding='utf-8')
+                self._archivo.write(linea)
+            if self._archivo is not None:
+                self._archivo.flush()
+        except OSError as e:
+            logger.error(f'No se pudieron escribir {len(lote)} eventos en {self.ruta}: {e}')
+
+
+def normalizar_endpoint(url: str) -> str:
+    """
+    Devuelve la ruta de la URL sin parámetros, para agrupar las métricas de un mismo endpoint.
+    """
+    partes = urlsplit(url)
+    return partes.path or url
+
+
+_registro_eventos = None
+_lock_registro = threading.Lock()
+
+
+def obtener_registro_eventos() -> RegistroEventos:
+    """
+    Devuelve el registro de eventos de la ejecución actual, se crea la primera vez que se solicita.
+
+    Al terminar el proceso se cierra para escribir los eventos que queden en la cola.
+    """
+    global _registro_eventos
+    if _registro_eventos is None:
+        with _lock_registro:
+            if _registro_eventos is None:
+                registro = RegistroEventos(obtener_carpeta_logs())
+                atexit.register(registro.cerrar)
+                _registro_eventos = registro
+    return _registro_eventos
+
+
+def percentil(valores: list, porcentaje: float) -> float:
+    """
+    Calcula el percentil por el método del rango más cercano.
+    """
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicion = max(math.ceil(porcentaje / 100 * len(ordenados)) - 1, 0)
+    return ordenados[posicion]
+
+
+def leer_eventos(ruta_archivo: str, id_ejecucion: str = None) -> list:
+    """
+    Lee los eventos de un archivo JSON lines, opcionalmente filtrando por ejecución.
+    """
+    eventos = []
+    with open(ruta_archivo, 'r', encoding='utf-8') as archivo:
+        for linea in archivo:
+            if not linea.strip():
+                continue
+            try:
+                evento = json.loads(linea)
+            except ValueError:
+                continue
+            if id_ejecucion is None or evento.get('ejecucion') == id_ejecucion:
+                eventos.append(evento)
+    return eventos
+
+
+def resumir_eventos(ruta_archivo: str, id_ejecucion: str = None, cantidad_mas_lentas: int = 10) -> dict:
+    """
+    Resume un archivo de eventos: etapas más lentas, tiempo total por etapa y latencias p50/p95 por endpoint.
+
+    Args:
+        ruta_archivo (str): Ruta del archivo eventos_YYYY-MM-DD.jsonl.
+        id_ejecucion (str, opcional): Id de la ejecución a resumir, por defecto la última del archivo.
+        cantidad_mas_lentas (int): Cantidad de eventos más lentos a mostrar.
+
+    Returns:
+        dict: Resumen con las llaves 'ejecucion', 'mas_lentas', 'por_etapa' y 'por_endpoint'.
+    """
+    eventos = leer_eventos(ruta_archivo)
+    if id_ejecucion is None and eventos:
+        id_ejecucion = eventos[-1]['ejecucion']
+    eventos = [evento for evento in eventos if evento.get('ejecucion') == id_ejecucion]
+
+    por_etapa = {}
+    for evento in eventos:
+        etapa = por_etapa.setdefault(evento['etapa'], {'cantidad': 0, 'total_s': 0.0, 'errores': 0})
+        etapa['cantidad'] += 1
+        etapa['total_s'] += evento['duracion_s']
+        etapa['errores'] += evento.get('estado') != 'ok'
+
+    duraciones_endpoint = {}
+    for evento in eventos:
+        if evento.get('endpoint'):
+            duraciones_endpoint.setdefault(evento['endpoint'], []).append(evento['duracion_s'])
+
+    por_endpoint = {
+        endpoint: {
+            'cantidad': len(duraciones),
+            'p50_s': percentil(duraciones, 50),
+            'p95_s': percentil(duraciones, 95),
+        }
+        for endpoint, duraciones in duraciones_endpoint.items()
+    }
+
+    return {
+        'ejecucion': id_ejecucion,
+        'mas_lentas': sorted(eventos, key=lambda evento: evento['duracion_s'], reverse=True)[:cantidad_mas_lentas],
+        'por_etapa': por_etapa,
+        'por_endpoint': por_endpoint,
+    }
+
+
+def imprimir_resumen(resumen: dict):
+    """
+    Imprime en consola el resumen generado por resumir_eventos.
+    """
+    print(f"Ejecución: {resumen['ejecucion']}")
+
+    print('\nEtapas más lentas:')
+    for evento in resumen['mas_lentas']:
+        detalle = evento.get('endpoint') or evento.get('archivo') or ''
+        print(f"  {evento['duracion_s']:>10.3f}s  {evento['etapa']:<18} {evento['estado']:<6} {detalle}")
+
+    print('\nTiempo total por etapa:')
+    for etapa, datos in sorted(resumen['por_etapa'].items(), key=lambda item: item[1]['total_s'], reverse=True):
+        print(f"  {etapa:<18} {datos['cantidad']:>7} eventos {datos['total_s']:>10.3f}s  errores: {datos['errores']}")
+
+    print('\nLatencia por endpoint:')
+    for endpoint, datos in sorted(resumen['por_endpoint'].items(), key=lambda item: item[1]['p95_s'], reverse=True):
+        print(f"  p50 {datos['p50_s']:>8.3f}s  p95 {datos['p95_s']:>8.3f}s  ({datos['cantidad']} solicitudes)  {endpoint}")
+
+
+if __name__ == '__main__':
+    # Uso: python -m utils.eventos_ejecucion logs/eventos_2024-01-31.jsonl [--ejecucion ID]
+    parser = argparse.ArgumentParser(description='Resume el archivo de eventos de una ejecución.')
+    parser.add_argument('archivo', help='Ruta del archivo eventos_YYYY-MM-DD.jsonl')
+    parser.add_argument('--ejecucion', default=None, help='Id de la ejecución, por defecto la última del archivo')
+    parser.add_argument('--top', type=int, default=10, help='Cantidad de etapas más lentas a mostrar')
+    argumentos = parser.parse_args()
+
+    if not os.path.exists(argumentos.archivo):
+        print(f'No existe el archivo {argumentos.archivo}')
+        sys.exit(1)
+
+    imprimir_resumen(resumir_eventos(argumentos.archivo, argumentos.ejecucion, argumentos.top))
@@ -1,82 +1,458 @@
 import os
 import sys
+import copy
+import time
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
-from datetime import datetime
-from decouple import Config, UndefinedValueError, RepositoryEnv
+from datetime import datetime, timedelta
+
+from utils.configuracion import obtener_configuracion, inicializar_configuracion, ruta_recurso  # ruta_recurso se conserva para los imports existentes
 
 # Definir tamaño máximo de los archivos de log (en bytes) como variable global
 MAX_LOG_SIZE = 5 * 1024 * 1024  # 5 MB por defecto
 BACKUP_LOG_COUNT = 5  # Número máximo de archivos de respaldo que se mantendrán
 
-def ruta_recurso(nombre_archivo: str):
+# Los registros se encolan y un hilo en segundo plano los formatea y los escribe en archivo y consola
+MAX_LOG_QUEUE_SIZE = 10000  # Cantidad máxima de registros pendientes por escribir
+# Política cuando la cola está llena: 'descartar' omite los registros de nivel menor a ERROR,
+# 'bloquear' hace esperar a quien registra el mensaje hasta que haya espacio en la cola
+LOG_QUEUE_POLICY = 'descartar'
+
+# Los archivos diarios se escriben con buffer: se vacían a disco cada INTERVALO_FLUSH_LOG segundos
+# (y de inmediato con los errores), y el tamaño real del archivo se revisa cada REGISTROS_POR_VERIFICACION registros
+INTERVALO_FLUSH_LOG = 1.0
+REGISTROS_POR_VERIFICACION = 200
+
+# Listeners activos por logger, se detienen (vaciando la cola) al finalizar el proceso
+_listeners = {}
+
+
+class ColaLogHandler(QueueHandler):
+    """
+    QueueHandler con cola acotada y política de descarte o espera cuando la cola se llena.
+
+    En el hilo que registra el mensaje solo se resuelven los argumentos del mensaje y el traceback;
+    el formato final y la escritura se realizan en el hilo del QueueListener.
     """
-    Devuelve la ruta de un archivo cuando se ejecuta desde el código fuente o desde el .exe creado con pyinstaller.
 
-    Args:
-        nombre_archivo (str): El nombre del archivo cuya ruta se quiere obtener.
+    def __init__(self, cola: queue.Queue, politica: str = LOG_QUEUE_POLICY):
+        super().__init__(cola)
+        self.politica = politica
+        self.registros_descartados = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # El traceback se convierte a texto aquí porque no se puede usar después en otro hilo
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        # Los errores nunca se descartan: si la cola está llena se espera a que haya espacio
+        if self.politica == 'bloquear' or record.levelno >= logging.ERROR:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.registros_descartados += 1
 
-    Returns:
-        str: La ruta completa del archivo.
+
+def detener_logging():
     """
-    # Verificar si el script se está ejecutando desde un ejecutable de PyInstaller
-    if getattr(sys, 'frozen', False):
-        # En este caso, sys._MEIPASS contiene la ruta a la carpeta temporal
-        base_path = sys._MEIPASS
-    else:
-        # Si no es un ejecutable de PyInstaller, obtener la ruta de la carpeta actual
-        base_path = os.path.abspath(".")
-    # Unir la ruta base con el nombre del archivo y devolverla
-    return os.path.join(base_path, nombre_archivo)
+    Detiene los hilos de escritura de los loggers escribiendo todos los registros pendientes.
 
-def setup_rotating_logger(name: str, log_file: str, max_size: int = MAX_LOG_SIZE, backup_count: int = BACKUP_LOG_COUNT, level=logging.INFO):
+    Los handlers de archivo y consola quedan conectados directamente al logger, por lo que
+    los mensajes registrados después de detener el hilo se siguen escribiendo (de forma síncrona).
     """
-    Configura un logger con rotación de archivos basada en el tamaño y salida en consola.
+    global _listener_procesos, _cola_procesos
+    # Primero se escriben los registros que enviaron los procesos de trabajo
+    if _listener_procesos is not None:
+        _listener_procesos.stop()
+        _listener_procesos = _cola_procesos = None
+    
+    for name, (listener, cola_handler) in list(_listeners.items()):
+        listener.stop()
+        logger = logging.getLogger(name)
+        logger.removeHandler(cola_handler)
+        for handler in listener.handlers:
+            try:
+                handler.flush()
+            except (OSError, ValueError):
+                # La consola o el archivo ya fueron cerrados por el proceso
+                continue
+            logger.addHandler(handler)
+        if cola_handler.registros_descartados:
+            logger.warning(f'Se descartaron {cola_handler.registros_descartados} registros porque la cola de logs estaba llena.')
+        del _listeners[name]
+
+
+def profundidad_cola_logs() -> int:
+    """
+    Devuelve la cantidad de registros en espera de ser escritos por los hilos de los loggers.
+    """
+    return sum(cola_handler.queue.qsize() for _, cola_handler in list(_listeners.values()))
+
+
+class ArchivoLogDiarioHandler(logging.StreamHandler):
+    """
+    Handler de archivo que rota por fecha y por tamaño, pensado para procesos que se ejecutan por días.
+
+    Con la ruta base logs/debug.log escribe en logs/debug_YYYY-MM-DD.log según la fecha de cada registro,
+    de modo que un proceso que sigue en ejecución después de la medianoche empieza un archivo nuevo.
+    Si el archivo del día supera max_bytes se rota como RotatingFileHandler (debug_YYYY-MM-DD.log.1, .2...).
+
+    A diferencia de RotatingFileHandler, no formatea dos veces cada registro ni consulta la posición del
+    archivo en cada escritura: lleva la cuenta de los bytes escritos y revisa el tamaño real cada
+    `registros_por_verificacion` registros. Las escrituras quedan en un buffer que se vacía cada
+    `intervalo_flush` segundos desde un hilo propio, y de inmediato con los registros de nivel ERROR o mayor.
+    """
+
+    def __init__(self, ruta_base, max_bytes: int = MAX_LOG_SIZE, backup_count: int = BACKUP_LOG_COUNT,
+                 intervalo_flush: float = INTERVALO_FLUSH_LOG, registros_por_verificacion: int = REGISTROS_POR_VERIFICACION,
+                 encoding: str = 'utf-8', tamano_buffer: int = 64 * 1024):
+        """
+        :param ruta_base: Ruta sin fecha del archivo, por ejemplo logs/debug.log
+        :param max_bytes: Tamaño máximo del archivo de cada día antes de rotar (0 = sin rotación por tamaño)
+        :param backup_count: Cantidad de archivos de respaldo por día
+        :param intervalo_flush: Segundos máximos que un registro permanece en el buffer antes de escribirse en disco
+        :param registros_por_verificacion: Cada cuántos registros se revisa el tamaño real del archivo
+        :param encoding: Codificación del archivo
+        :param tamano_buffer: Tamaño en bytes del buffer de escritura
+        """
+        ruta_base = Path(ruta_base)
+        self.carpeta = ruta_base.parent
+        self.prefijo = ruta_base.stem
+        self.extension = ruta_base.suffix
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.intervalo_flush = intervalo_flush
+        self.registros_por_verificacion = registros_por_verificacion
+        self.encoding = encoding
+        self.tamano_buffer = tamano_buffer
+
+        super().__init__(self._abrir(time.time()))
+
+        self._ultimo_flush = time.monotonic()
+        self._detener = threading.Event()
+        self._hilo_flush = threading.Thread(target=self._flush_periodico, name=f'flush_{self.prefijo}', daemon=True)
+        self._hilo_flush.start()
+
+    def _abrir(self, momento: float):
+        # Abre el archivo del día del momento indicado y calcula la siguiente medianoche
+        fecha = datetime.fromtimestamp(momento).date()
+        self.baseFilename = str(self.carpeta / f"{self.prefijo}_{fecha.strftime('%Y-%m-%d')}{self.extension}")
+        self._siguiente_medianoche = datetime.combine(fecha + timedelta(days=1), datetime.min.time()).timestamp()
+        self._bytes_escritos = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+        self._registros_sin_verificar = 0
+        self.stream = open(self.baseFilename, 'a', encoding=self.encoding, buffering=self.tamano_buffer)
+        return self.stream
+
+    def _cerrar_archivo(self):
+        if self.stream:
+            self.stream.flush()
+            self.stream.close()
+            self.stream = None
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if record.created >= self._siguiente_medianoche:
+                self._cerrar_archivo()
+                self._abrir(record.created)
+
+            mensaje = self.format(record) + self.terminator
+            self.stream.write(mensaje)
+            self._bytes_escritos += len(mensaje)
+            self._registros_sin_verificar += 1
+
+            if self.max_bytes and (self._bytes_escritos >= self.max_bytes or self._registros_sin_verificar >= self.registros_por_verificacion):
+                self._verificar_tamano()
+
+            if record.levelno >= logging.ERROR or time.monotonic() - self._ultimo_flush >= self.intervalo_flush:
+                self.stream.flush()
+                self._ultimo_flush = time.monotonic()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def _verificar_tamano(self):
+        # El conteo de caracteres es aproximado (UTF-8), se corrige con el tamaño real del archivo
+        self.stream.flush()
+        self._ultimo_flush = time.monotonic()
+        self._bytes_escritos = os.fstat(self.stream.fileno()).st_size
+        self._registros_sin_verificar = 0
+        if self._bytes_escritos >= self.max_bytes:
+            self._rotar_por_tamano()
+
+    def _rotar_por_tamano(self):
+        self._cerrar_archivo()
+        if self.backup_count > 0:
+            for numero in range(self.backup_count - 1, 0, -1):
+                origen = f'{self.baseFilename}.{numero}'
+                if os.path.exists(origen):
+                    os.replace(origen, f'{self.baseFilename}.{numero + 1}')
+            os.replace(self.baseFilename, f'{self.baseFilename}.1')
+        else:
+            os.remove(self.baseFilename)
+        self._abrir(time.time())
+
+    def _flush_periodico(self):
+        while not self._detener.wait(self.intervalo_flush):
+            try:
+                self.flush()
+            except (OSError, ValueError):
+                continue
+
+    def close(self):
+        self._detener.set()
+        self.acquire()
+        try:
+            self._cerrar_archivo()
+        finally:
+            self.release()
+            logging.Handler.close(self)
+
+
+class FiltroNivelMinimo(logging.Filter):
+    """
+    Deja pasar los registros con nivel mayor o igual al indicado y los marcadores de la ejecución.
+
+    Los registros con `extra={'marcador': True}` (inicio/fin de la ejecución) se escriben en todos
+    los archivos sin importar su nivel, para poder delimitar cada ejecución en cada archivo.
+    """
+
+    def __init__(self, nivel_minimo: int):
+        super().__init__()
+        self.nivel_minimo = nivel_minimo
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.nivel_minimo or getattr(record, 'marcador', False)
+
+
+def setup_logger(name: str, log_files: dict, max_size: int = MAX_LOG_SIZE, backup_count: int = BACKUP_LOG_COUNT, level=logging.DEBUG,
+                 queue_size: int = MAX_LOG_QUEUE_SIZE, queue_policy: str = LOG_QUEUE_POLICY, diario: bool = False):
+    """
+    Configura un único logger que enruta cada registro a los archivos según su nivel, con rotación por tamaño y salida en consola.
+    
+    La escritura se hace en un hilo en segundo plano (QueueHandler/QueueListener), de modo que
+    los ciclos que registran cada registro no se bloquean esperando la escritura en disco o consola.
     
     :param name: Nombre del logger
-    :param log_file: Ruta del archivo de log
+    :param log_files: Diccionario {nivel mínimo: ruta del archivo}, por ejemplo {logging.ERROR: 'logs/error.log'}
     :param max_size: Tamaño máximo del archivo de log en bytes antes de rotar (por defecto 5 MB)
     :param backup_count: Número máximo de archivos de respaldo que se mantendrán
-    :param level: Nivel de logging
+    :param level: Nivel de logging del logger, los mensajes de menor nivel se descartan sin formatearse
+    :param queue_size: Cantidad máxima de registros pendientes en la cola
+    :param queue_policy: 'descartar' o 'bloquear' cuando la cola está llena
+    :param diario: Usa ArchivoLogDiarioHandler; las rutas de log_files son rutas base sin fecha (logs/debug.log)
     """
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     
-    # Rotating File Handler
-    file_handler = RotatingFileHandler(log_file, maxBytes=max_size, backupCount=backup_count)
-    file_handler.setFormatter(formatter)
+    # Handlers que se ejecutan en el hilo del listener
+    handlers = []
+    
+    # Rotating File Handler por cada nivel
+    for nivel_minimo, log_file in log_files.items():
+        if diario:
+            file_handler = ArchivoLogDiarioHandler(log_file, max_bytes=max_size, backup_count=backup_count)
+        else:
+            file_handler = RotatingFileHandler(log_file, maxBytes=max_size, backupCount=backup_count)
+        file_handler.setFormatter(formatter)
+        file_handler.addFilter(FiltroNivelMinimo(nivel_minimo))
+        handlers.append(file_handler)
     
     # Stream Handler (Consola)
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
     
+    # Habilitar o comentarear esta linea si se desea ver en consola cada mensaje del LOGGER
+    handlers.append(console_handler)
+    
     # Configuración del logger
     logger = logging.getLogger(name)
     logger.setLevel(level)
+    logger.propagate = False
     
-    # Agregar handlers al logger
-    logger.addHandler(file_handler)
-    
-    # Habilitar o comentarear esta linea si se desea ver en consola cada mensaje del LOGGER
-    logger.addHandler(console_handler)
+    # El logger solo encola los registros, el listener los formatea y escribe en segundo plano
+    cola_handler = ColaLogHandler(queue.Queue(maxsize=queue_size), queue_policy)
+    listener = QueueListener(cola_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    logger.addHandler(cola_handler)
+    _listeners[name] = (listener, cola_handler)
     
     return logger
 
-config = Config(RepositoryEnv(ruta_recurso('.env')))
+# Nombre del logger de la aplicación
+NOMBRE_LOGGER = 'logger_app'
+
+# El logger se crea al importar el módulo, pero los archivos y el hilo de escritura se configuran
+# la primera vez que se registra un mensaje, para no leer el .env ni abrir archivos al importar
+logger = logging.getLogger(NOMBRE_LOGGER)
+
+_lock_configuracion = threading.Lock()
+_logger_configurado = False
+_carpeta_logs = None
+# Handler de consola que se usa mientras el .env no permita configurar los archivos de log
+_handler_respaldo = None
+
+
+def obtener_carpeta_logs() -> Path:
+    """
+    Devuelve la carpeta de logs definida en NOMBRE_CARPETA_LOGS, creándola si no existe.
+    """
+    global _carpeta_logs
+    if _carpeta_logs is None:
+        # Crear el directorio de logs si no existe
+        carpeta_logs = Path(obtener_configuracion().NOMBRE_CARPETA_LOGS)
+        carpeta_logs.mkdir(exist_ok=True)
+        _carpeta_logs = carpeta_logs
+    return _carpeta_logs
+
+
+def configurar_logger():
+    """
+    Configura los archivos de log (debug, info y error) y el hilo de escritura del logger de la aplicación.
+
+    Se ejecuta automáticamente con el primer mensaje registrado; llamarla de nuevo no tiene efecto.
+    """
+    global _logger_configurado
+    with _lock_configuracion:
+        if _logger_configurado:
+            return
+        
+        log_directory = obtener_carpeta_logs()
+        
+        # Rutas base de los archivos de log, el handler agrega la fecha de cada registro (debug_YYYY-MM-DD.log)
+        # para que un proceso que sigue en ejecución después de la medianoche cambie de archivo
+        debug_log_path = log_directory / 'debug.log'
+        info_log_path = log_directory / 'info.log'
+        error_log_path = log_directory / 'error.log'
+        
+        # Nivel del logger, con NIVEL_LOG=INFO los mensajes de debug no se formatean ni se escriben
+        nivel_log = obtener_configuracion().nivel_log
+        
+        logger.removeHandler(_handler_configuracion_diferida)
+        if _handler_respaldo is not None:
+            logger.removeHandler(_handler_respaldo)
+        
+        # Configurar el logger con rotación de archivos, utilizando el tamaño máximo global (MAX_LOG_SIZE)
+        setup_logger(NOMBRE_LOGGER, {
+            logging.DEBUG: debug_log_path,
+            logging.INFO: info_log_path,
+            logging.ERROR: error_log_path,
+        }, max_size=MAX_LOG_SIZE, backup_count=BACKUP_LOG_COUNT, level=nivel_log, diario=True)
+        _logger_configurado = True
+
+
+class _HandlerConfiguracionDiferida(logging.Handler):
+    """
+    Handler temporal del logger: con el primer registro configura el logger y le reenvía ese registro.
+    """
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        try:
+            configurar_logger()
+        except Exception:
+            # Con el .env ausente o incompleto (UndefinedValueError/ValueError) registrar un mensaje no debe
+            # lanzar una excepción: se informa el error y los registros se escriben en la consola (stderr)
+            self.handleError(record)
+            _usar_handler_respaldo()
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        pass
 
-# Crear el directorio 'logs_diarios' si no existe
-log_directory = Path(config('NOMBRE_CARPETA_LOGS'))
-log_directory.mkdir(exist_ok=True)
 
-# Obtener la fecha actual en formato YYYY-MM-DD
-current_date = datetime.now().strftime('%Y-%m-%d')
+def _usar_handler_respaldo():
+    """
+    Reemplaza el handler de configuración diferida por un handler de consola (stderr).
+
+    Llamar a configurar_logger() cuando el .env ya es válido quita este handler y configura los archivos de log.
+    """
+    global _handler_respaldo
+    with _lock_configuracion:
+        if _logger_configurado or _handler_respaldo in logger.handlers:
+            return
+        _handler_respaldo = logging.StreamHandler(sys.stderr)
+        _handler_respaldo.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        logger.removeHandler(_handler_configuracion_diferida)
+        logger.addHandler(_handler_respaldo)
+
+
+_handler_configuracion_diferida = _HandlerConfiguracionDiferida()
+logger.setLevel(logging.DEBUG)
+logger.propagate = False
+logger.addHandler(_handler_configuracion_diferida)
+
+# Cola por la que los procesos de trabajo envían sus registros al proceso principal
+_cola_procesos = None
+_listener_procesos = None
+
+
+class _ReenvioLogger(logging.Handler):
+    """
+    Handler del proceso principal que registra en el logger los mensajes recibidos de los procesos de trabajo.
+    """
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        logger.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        pass
+
+
+def argumentos_proceso_trabajo() -> dict:
+    """
+    Devuelve los argumentos initializer e initargs para crear un ProcessPoolExecutor.
+
+    Los procesos de trabajo reciben la configuración ya validada, en lugar de volver a leer el .env,
+    y envían sus registros al proceso principal, que es el único que escribe los archivos de log:
+
+        ProcessPoolExecutor(max_workers=4, **argumentos_proceso_trabajo())
+    """
+    global _cola_procesos, _listener_procesos
+    configuracion = obtener_configuracion()
+    with _lock_configuracion:
+        if _cola_procesos is None:
+            # multiprocessing se importa solo si el proceso usa procesos de trabajo
+            import multiprocessing
+            _cola_procesos = multiprocessing.Queue()
+            _listener_procesos = QueueListener(_cola_procesos, _ReenvioLogger())
+            _listener_procesos.start()
+        return {'initializer': inicializar_proceso_trabajo, 'initargs': (configuracion, _cola_procesos)}
+
+
+def inicializar_proceso_trabajo(configuracion, cola_logs):
+    """
+    Inicializa un proceso de trabajo: establece la configuración y envía los registros del logger a `cola_logs`.
+    """
+    global _logger_configurado, _cola_procesos, _listener_procesos
+    inicializar_configuracion(configuracion)
+    with _lock_configuracion:
+        # Con fork el proceso hereda los handlers del proceso principal, pero no sus hilos de escritura
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        _listeners.clear()
+        _cola_procesos = _listener_procesos = None
+        logger.addHandler(QueueHandler(cola_logs))
+        logger.setLevel(configuracion.nivel_log)
+        _logger_configurado = True
 
-# Definir las rutas completas para los archivos de log, incluyendo la fecha
-debug_log_path = log_directory / f'debug_{current_date}.log'
-info_log_path = log_directory / f'info_{current_date}.log'
-error_log_path = log_directory / f'error_{current_date}.log'
+# Nombres anteriores, se conservan para el código que todavía los importa
+logger_debug = logger
+logger_info = logger
+logger_error = logger
 
-# Configurar los loggers con rotación de archivos, utilizando el tamaño máximo global (MAX_LOG_SIZE)
-logger_debug = setup_rotating_logger('logger_debug', debug_log_path, max_size=MAX_LOG_SIZE, backup_count=BACKUP_LOG_COUNT, level=logging.DEBUG)
-logger_info = setup_rotating_logger('logger_info', info_log_path, max_size=MAX_LOG_SIZE, backup_count=BACKUP_LOG_COUNT, level=logging.INFO)
-logger_error = setup_rotating_logger('logger_error', error_log_path, max_size=MAX_LOG_SIZE, backup_count=BACKUP_LOG_COUNT, level=logging.ERROR)
+# Escribir los registros pendientes antes de que finalice el proceso
+atexit.register(detener_logging)
@@ -0,0 +1,335 @@
+# Importaciones de la biblioteca estándar de Python
+import os
+import re
+import time
+import bisect
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Importaciones propias
+from utils.logger import logger, obtener_carpeta_logs, profundidad_cola_logs
+
+# Prefijo de todas las métricas del proceso
+PREFIJO = 'proceso'
+
+# Límites en segundos de los histogramas de duración (de consultas a la BDD y solicitudes HTTP)
+LIMITES_DURACION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Segmentos de la ruta que se reemplazan por :id para no crear una serie por registro (ids numéricos, uuid, listas [1,2,3])
+_SEGMENTO_ID = re.compile(r'^(\d+|[0-9a-fA-F-]{16,}|\[.*\])$')
+
+# Con las métricas desactivadas las funciones de registro solo consultan esta variable
+_activo = False
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatear_etiquetas(nombres: tuple, valores: tuple, extra: str = None) -> str:
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _formatear_numero(valor: float) -> str:
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) and not valor.is_integer() else str(int(valor))
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _clave(self, etiquetas: dict) -> tuple:
+        return tuple(str(etiquetas.get(nombre, '')) for nombre in self.etiquetas)
+
+    def lineas(self) -> list:
+        return [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} {self.tipo}'] + self._muestras()
+
+    def _muestras(self) -> list:
+        with self._lock:
+            valores = list(self._valores.items())
+        return [f'{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(valor)}' for clave, valor in valores]
+
+
+class Contador(_Metrica):
+    """Valor que solo aumenta (solicitudes, filas, bytes...)."""
+    tipo = 'counter'
+
+    def incrementar(self, valor: float = 1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def valor(self, **etiquetas) -> float:
+        return self._valores.get(self._clave(etiquetas), 0)
+
+
+class Medidor(_Metrica):
+    """
+    Valor que sube y baja (solicitudes en curso, tamaño de una cola...). Un valor también se puede
+    calcular al exponer las métricas con `registrar_funcion`.
+    """
+    tipo = 'gauge'
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._funciones = {}
+
+    def establecer(self, valor: float, **etiquetas):
+        with self._lock:
+            self._valores[self._clave(etiquetas)] = valor
+
+    def incrementar(self, valor: float = 1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def valor(self, **etiquetas) -> float:
+        return self._valores.get(self._clave(etiquetas), 0)
+
+    def registrar_funcion(self, funcion, **etiquetas):
+        with self._lock:
+            self._funciones[self._clave(etiquetas)] = funcion
+
+    def quitar_funcion(self, **etiquetas):
+        with self._lock:
+            self._funciones.pop(self._clave(etiquetas), None)
+
+    def _muestras(self) -> list:
+        with self._lock:
+            funciones = list(self._funciones.items())
+        lineas = super()._muestras()
+        for clave, funcion in funciones:
+            try:
+                valor = funcion()
+            except Exception as e:
+                logger.debug("No se pudo calcular la métrica %s%s: %s", self.nombre, clave, e)
+                continue
+            lineas.append(f'{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(valor)}')
+        return lineas
+
+
+class Histograma(_Metrica):
+    """Distribución de valores (duraciones) en intervalos acumulados, con su suma y cantidad."""
+    tipo = 'histogram'
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = (), limites: tuple = LIMITES_DURACION):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(sorted(limites))
+
+    def observar(self, valor: float, **etiquetas):
+        clave = self._clave(etiquetas)
+        posicion = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            datos = self._valores.get(clave)
+            if datos is None:
+                # Cantidad por intervalo (el último es +Inf), suma y cantidad total
+                datos = self._valores[clave] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            datos[0][posicion] += 1
+            datos[1] += valor
+            datos[2] += 1
+
+    def _muestras(self) -> list:
+        with self._lock:
+            valores = [(clave, list(datos[0]), datos[1], datos[2]) for clave, datos in self._valores.items()]
+        lineas = []
+        for clave, cantidades, suma, total in valores:
+            acumulado = 0
+            for limite, cantidad in zip(self.limites + (float('inf'),), cantidades):
+                acumulado += cantidad
+                etiquetas = _formatear_etiquetas(self.etiquetas, clave, f'le="{_formatear_numero(limite)}"')
+                lineas.append(f'{self.nombre}_bucket{etiquetas} {acumulado}')
+            etiquetas = _formatear_etiquetas(self.etiquetas, clave)
+            lineas.append(f'{self.nombre}_sum{etiquetas} {_formatear_numero(round(suma, 6))}')
+            lineas.append(f'{self.nombre}_count{etiquetas} {total}')
+        return lineas
+
+
+class RegistroMetricas:
+    """
+    Conjunto de métricas del proceso que se exponen en el formato de texto de Prometheus.
+
+    Ejemplo:
+        registro = RegistroMetricas()
+        procesados = registro.contador('proceso_productos_total', 'Productos procesados', ('tienda',))
+        procesados.incrementar(tienda='bogota')
+        print(registro.exponer())
+    """
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _obtener(self, clase, nombre: str, ayuda: str, etiquetas: tuple, **argumentos):
+        with self._lock:
+            metrica = self._metricas.get(nombre)
+            if metrica is None:
+                metrica = self._metricas[nombre] = clase(nombre, ayuda, etiquetas, **argumentos)
+            elif not isinstance(metrica, clase):
+                raise ValueError(f'La métrica {nombre} ya existe con el tipo {metrica.tipo}.')
+            return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: tuple = ()) -> Contador:
+        return self._obtener(Contador, nombre, ayuda, etiquetas)
+
+    def medidor(self, nombre: str, ayuda: str, etiquetas: tuple = ()) -> Medidor:
+        return self._obtener(Medidor, nombre, ayuda, etiquetas)
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: tuple = (), limites: tuple = LIMITES_DURACION) -> Histograma:
+        return self._obtener(Histograma, nombre, ayuda, etiquetas, limites=limites)
+
+    def exponer(self) -> str:
+        with self._lock:
+            metricas = list(self._metricas.values())
+        return '\n'.join(linea for metrica in metricas for linea in metrica.lineas()) + '\n'
+
+
+registro = RegistroMetricas()
+
+# Métricas alimentadas por el registro de eventos (utils/eventos_ejecucion.py), que usan las capas de BDD y HTTP
+EVENTOS = registro.contador(f'{PREFIJO}_eventos_total', 'Etapas finalizadas por etapa y estado', ('etapa', 'estado'))
+FILAS = registro.contador(f'{PREFIJO}_filas_total', 'Filas obtenidas o procesadas por etapa', ('etapa',))
+BYTES = registro.contador(f'{PREFIJO}_bytes_total', 'Bytes leídos o escritos por etapa', ('etapa',))
+RESPUESTAS_HTTP = registro.contador(f'{PREFIJO}_respuestas_http_total', 'Respuestas HTTP por etapa y código (429 = límite de solicitudes)',
+                                    ('etapa', 'codigo'))
+DURACION = registro.histograma(f'{PREFIJO}_duracion_segundos', 'Duración de las etapas por endpoint', ('etapa', 'endpoint'))
+EN_CURSO = registro.medidor(f'{PREFIJO}_en_curso', 'Etapas en ejecución (solicitudes HTTP y consultas en curso)', ('etapa',))
+PROFUNDIDAD_COLA = registro.medidor(f'{PREFIJO}_profundidad_cola', 'Elementos en espera en cada cola', ('cola',))
+ULTIMA_ACTIVIDAD = registro.medidor(f'{PREFIJO}_ultima_actividad_timestamp_segundos', 'Momento (epoch) del último evento registrado')
+INICIO = registro.medidor(f'{PREFIJO}_inicio_timestamp_segundos', 'Momento (epoch) en que se activaron las métricas')
+
+
+def plantilla_endpoint(ruta: str) -> str:
+    """
+    Reemplaza los ids de una ruta por :id (por ejemplo /skus/123 -> /skus/:id) para agrupar sus latencias.
+    """
+    return '/'.join(':id' if _SEGMENTO_ID.match(segmento) else segmento for segmento in ruta.split('/'))
+
+
+def esta_activo() -> bool:
+    return _activo
+
+
+def observar_evento(etapa: str, duracion: float, estado: str = 'ok', filas: int = None, bytes: int = None,
+                    endpoint: str = None, codigo_http: int = None):
+    """
+    Actualiza las métricas con un evento finalizado; se llama desde RegistroEventos.registrar.
+    """
+    if not _activo:
+        return
+    EVENTOS.incrementar(etapa=etapa, estado=estado)
+    DURACION.observar(duracion, etapa=etapa, endpoint=plantilla_endpoint(endpoint) if endpoint else '')
+    if filas:
+        FILAS.incrementar(filas, etapa=etapa)
+    if bytes:
+        BYTES.incrementar(bytes, etapa=etapa)
+    if codigo_http is not None:
+        RESPUESTAS_HTTP.incrementar(etapa=etapa, codigo=codigo_http)
+    ULTIMA_ACTIVIDAD.establecer(time.time())
+
+
+def cambiar_en_curso(etapa: str, cambio: int):
+    """Suma o resta una etapa en ejecución; se llama al iniciar y al terminar RegistroEventos.medir."""
+    if _activo:
+        EN_CURSO.incrementar(cambio, etapa=etapa)
+
+
+def registrar_cola(nombre: str, cola):
+    """Expone la cantidad de elementos de una cola (queue.Queue) mientras esté registrada."""
+    if _activo:
+        PROFUNDIDAD_COLA.registrar_funcion(cola.qsize, cola=nombre)
+
+
+def quitar_cola(nombre: str):
+    PROFUNDIDAD_COLA.quitar_funcion(cola=nombre)
+
+
+class _ManejadorMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        contenido = registro.exponer().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(contenido)))
+        self.end_headers()
+        self.wfile.write(contenido)
+
+    def log_message(self, *args):
+        # Las consultas de Prometheus no se escriben en los logs
+        pass
+
+
+_servidor = None
+
+
+def iniciar_metricas(puerto: int = None, host: str = '127.0.0.1') -> bool:
+    """
+    Activa las métricas y, si se indica un puerto distinto de 0, las expone en http://host:puerto/metrics.
+
+    Si no se indica el puerto se usa METRICAS_PUERTO del .env (sin definir = métricas desactivadas,
+    0 = solo el archivo final sin servidor HTTP).
+
+    Returns:
+        bool: True si las métricas quedaron activas.
+    """
+    global _activo, _servidor
+    if puerto is None:
+        try:
+            from utils.configuracion import obtener_configuracion
+            puerto = obtener_configuracion().METRICAS_PUERTO
+        except Exception:
+            # Los errores de configuración los informa main al iniciar la ejecución
+            return False
+        if puerto is None:
+            return False
+
+    _activo = True
+    INICIO.establecer(time.time())
+    PROFUNDIDAD_COLA.registrar_funcion(profundidad_cola_logs, cola='logs')
+
+    if puerto and _servidor is None:
+        try:
+            _servidor = ThreadingHTTPServer((host, puerto), _ManejadorMetricas)
+        except OSError as e:
+            logger.error(f'No se pudo iniciar el servidor de métricas en {host}:{puerto}: {e}')
+            return True
+        _servidor.daemon_threads = True
+        threading.Thread(target=_servidor.serve_forever, name='metricas', daemon=True).start()
+        logger.info("Métricas disponibles en http://%s:%s/metrics", host, _servidor.server_port)
+    return True
+
+
+def finalizar_metricas(carpeta: str = None) -> str:
+    """
+    Escribe las métricas finales en metricas_<fecha>.prom en la carpeta de logs, detiene el servidor y desactiva las métricas.
+
+    Returns:
+        str: Ruta del archivo escrito.
+    """
+    global _activo, _servidor
+    carpeta = str(carpeta or obtener_carpeta_logs())
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = os.path.join(carpeta, f"metricas_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}.prom")
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write(registro.exponer())
+
+    if _servidor is not None:
+        _servidor.shutdown()
+        _servidor.server_close()
+        _servidor = None
+    _activo = False
+    logger.info("Métricas finales guardadas en %s", ruta)
+    return ruta
@@ -0,0 +1,383 @@
+# Importaciones de la biblioteca estándar de Python
+import re
+import time
+import queue
+import atexit
+import smtplib
+import logging
+import threading
+from datetime import datetime
+from dataclasses import dataclass
+from typing import Callable, Union
+from email.message import EmailMessage
+
+# Importaciones propias
+from utils.logger import logger
+from utils.configuracion import obtener_configuracion
+
+# Segundos sin correos pendientes después de los cuales se cierra la conexión SMTP (los servidores cierran las conexiones inactivas)
+MAX_INACTIVIDAD_SMTP = 60
+
+# Mensajes de error distintos que se incluyen en el resumen de una ejecución
+MAX_ERRORES_RESUMEN = 200
+
+
+def _separar_correos(valor) -> tuple:
+    # Las columnas de CorreosNotificaciones separan los correos con ';' (se acepta también ',')
+    if not valor or not isinstance(valor, str):
+        return ()
+    return tuple(correo.strip() for correo in re.split(r'[;,]', valor) if correo.strip())
+
+
+@dataclass(frozen=True)
+class Destinatarios:
+    """
+    Destinatarios de una notificación.
+
+    Atributos:
+        para (tuple): Correos del campo To.
+        copia (tuple): Correos del campo Cc.
+        copia_oculta (tuple): Correos que reciben el mensaje sin aparecer en los encabezados.
+    """
+    para: tuple
+    copia: tuple = ()
+    copia_oculta: tuple = ()
+
+    @classmethod
+    def desde_texto(cls, para: str, copia: str = None, copia_oculta: str = None) -> 'Destinatarios':
+        return cls(_separar_correos(para), _separar_correos(copia), _separar_correos(copia_oculta))
+
+    @classmethod
+    def desde_data_frame(cls, data_frame) -> 'Destinatarios':
+        """
+        Crea los destinatarios desde el resultado de consultar_correos_notificaciones_en_BDD
+        (columnas Destinatarios, DestinatariosCopia y DestinatariosCopiaOculta).
+        """
+        registro = data_frame.iloc[0]
+        return cls.desde_texto(registro['Destinatarios'], registro.get('DestinatariosCopia'), registro.get('DestinatariosCopiaOculta'))
+
+    def todos(self) -> list:
+        return list(dict.fromkeys(self.para + self.copia + self.copia_oculta))
+
+
+class CacheDestinatarios:
+    """
+    Conserva los destinatarios consultados en la base de datos durante `ttl` segundos, en lugar de consultarlos en cada correo.
+
+    Ejemplo:
+        destinatarios = CacheDestinatarios(lambda: consultar_correos_notificaciones_en_BDD(conexion), ttl=3600)
+        notificador = NotificadorCorreo('10.10.20.4', 587, 'procesos@empresa.com', destinatarios)
+    """
+
+    def __init__(self, consultar: Callable, ttl: float = 3600):
+        """
+        Args:
+            consultar (Callable): Función sin argumentos que devuelve el DataFrame de CorreosNotificaciones.
+            ttl (float): Segundos durante los que se reutiliza la última consulta.
+        """
+        self.consultar = consultar
+        self.ttl = ttl
+        self.consultas = 0
+        self._destinatarios = None
+        self._vence = 0.0
+        self._lock = threading.Lock()
+
+    def obtener(self) -> Destinatarios:
+        with self._lock:
+            if self._destinatarios is None or time.monotonic() >= self._vence:
+                try:
+                    data_frame = self.consultar()
+                    self.consultas += 1
+                    if data_frame is None or data_frame.empty:
+                        raise ValueError('La consulta de destinatarios no devolvió registros')
+                    self._destinatarios = Destinatarios.desde_data_frame(data_frame)
+                    self._vence = time.monotonic() + self.ttl
+                except Exception as e:
+                    # Si ya hay destinatarios se siguen usando hasta la siguiente consulta
+                    if self._destinatarios is None:
+                        logger.error(f'No se pudieron consultar los destinatarios de las notificaciones: {e}')
+                        raise
+                    logger.warning("No se pudieron actualizar los destinatarios de las notificaciones, se usan los anteriores: %s", e)
+                    self._vence = time.monotonic() + min(self.ttl, 300)
+            return self._destinatarios
+
+    def invalidar(self):
+        with self._lock:
+            self._vence = 0.0
+
+
+class NotificadorCorreo:
+    """
+    Envía correos desde un hilo en segundo plano reutilizando una sola conexión SMTP.
+
+    `enviar` solo agrega el mensaje a una cola y regresa de inmediato, por lo que un servidor de
+    correo lento o caído no detiene el proceso. La conexión se abre con el primer correo, se
+    reutiliza para los siguientes, se restablece si el servidor la cerró y se cierra después de
+    `max_inactividad` segundos sin correos. Los errores de la ejecución se acumulan (por ejemplo
+    con el manejador de `manejador_log`) y se envían en un solo correo con `enviar_resumen_errores`.
+
+    Ejemplo:
+        notificador = NotificadorCorreo('10.10.20.4', 587, 'procesos@empresa.com', Destinatarios.desde_texto('ti@empresa.com'))
+        logger.addHandler(notificador.manejador_log())
+        ...
+        notificador.enviar_resumen_errores('Errores en la sincronización de usuarios')
+        notificador.cerrar()
+    """
+
+    def __init__(self, servidor: str, puerto: int = 587, remitente: str = None,
+                 destinatarios: Union[Destinatarios, CacheDestinatarios] = None, usuario: str = None, contrasena: str = None,
+                 starttls: bool = False, timeout: float = 30, reintentos: int = 2, max_inactividad: float = MAX_INACTIVIDAD_SMTP,
+                 max_errores_resumen: int = MAX_ERRORES_RESUMEN):
+        """
+        Args:
+            servidor (str): Servidor SMTP.
+            puerto (int): Puerto del servidor SMTP.
+            remitente (str): Correo del remitente.
+            destinatarios (Destinatarios o CacheDestinatarios, opcional): Destinatarios por defecto de los correos.
+            usuario (str, opcional): Usuario para autenticarse en el servidor.
+            contrasena (str, opcional): Contraseña del usuario.
+            starttls (bool): Cifrar la conexión con STARTTLS.
+            timeout (float): Tiempo máximo de las operaciones SMTP en segundos.
+            reintentos (int): Reintentos de un correo si la conexión falla (se vuelve a conectar en cada uno).
+            max_inactividad (float): Segundos sin correos después de los cuales se cierra la conexión.
+            max_errores_resumen (int): Cantidad máxima de mensajes de error distintos en el resumen.
+        """
+        self.servidor = servidor
+        self.puerto = puerto
+        self.remitente = remitente
+        self.destinatarios = destinatarios
+        self.usuario = usuario
+        self.contrasena = contrasena
+        self.starttls = starttls
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.max_inactividad = max_inactividad
+        self.max_errores_resumen = max_errores_resumen
+
+        self.enviados = 0
+        self.fallidos = 0
+        self.conexiones = 0
+
+        self._cola = queue.Queue()
+        self._smtp = None
+        self._hilo = None
+        self._lock = threading.Lock()
+        # {mensaje: [cantidad, primera vez, última vez]}, en el orden en que aparecieron
+        self._errores = {}
+        self._errores_omitidos = 0
+
+    def enviar(self, asunto: str, mensaje: str, destinatarios: Destinatarios = None):
+        """
+        Agrega un correo a la cola de envío y regresa sin esperar a que se envíe.
+
+        Args:
+            asunto (str): Asunto del correo.
+            mensaje (str): Cuerpo del correo en texto plano.
+            destinatarios (Destinatarios, opcional): Destinatarios de este correo, por defecto los del notificador.
+        """
+        destinatarios = destinatarios or self.destinatarios
+        if isinstance(destinatarios, CacheDestinatarios):
+            destinatarios = destinatarios.obtener()
+        if destinatarios is None or not destinatarios.todos():
+            logger.warning("El correo '%s' no tiene destinatarios y no se envía.", asunto)
+            return
+
+        correo = EmailMessage()
+        correo['From'] = self.remitente
+        correo['To'] = ', '.join(destinatarios.para)
+        if destinatarios.copia:
+            correo['Cc'] = ', '.join(destinatarios.copia)
+        correo['Subject'] = asunto
+        correo.set_content(mensaje)
+
+        self._iniciar_hilo()
+        self._cola.put((correo, destinatarios.todos()))
+
+    def registrar_error(self, mensaje: str):
+        """
+        Acumula un error para el resumen; los mensajes repetidos se agrupan con su cantidad.
+        """
+        ahora = datetime.now()
+        with self._lock:
+            if mensaje in self._errores:
+                self._errores[mensaje][0] += 1
+                self._errores[mensaje][2] = ahora
+            elif len(self._errores) < self.max_errores_resumen:
+                self._errores[mensaje] = [1, ahora, ahora]
+            else:
+                self._errores_omitidos += 1
+
+    def enviar_resumen_errores(self, asunto: str = 'Errores en la ejecución', destinatarios: Destinatarios = None) -> bool:
+        """
+        Envía en un solo correo los errores acumulados desde el resumen anterior y los reinicia.
+
+        Returns:
+            bool: True si había errores y el resumen se agregó a la cola de envío.
+        """
+        with self._lock:
+            errores, self._errores = self._errores, {}
+            omitidos, self._errores_omitidos = self._errores_omitidos, 0
+        if not errores:
+            return False
+
+        total = sum(cantidad for cantidad, _, _ in errores.values()) + omitidos
+        lineas = [f'Se registraron {total} errores ({len(errores)} distintos):', '']
+        for mensaje, (cantidad, primera, ultima) in errores.items():
+            repeticiones = f' (x{cantidad}, última {ultima:%H:%M:%S})' if cantidad > 1 else ''
+            lineas.append(f'[{primera:%Y-%m-%d %H:%M:%S}]{repeticiones} {mensaje}')
+        if omitidos:
+            lineas.append(f'... y {omitidos} errores más.')
+
+        self.enviar(f'{asunto} ({total})', '\n'.join(lineas), destinatarios)
+        return True
+
+    def manejador_log(self, nivel: int = logging.ERROR) -> logging.Handler:
+        """
+        Devuelve un manejador de logging que agrega al resumen los mensajes de `nivel` o superior.
+        """
+        return ManejadorResumenErrores(self, nivel)
+
+    def esperar(self, timeout: float = None) -> bool:
+        """
+        Espera a que se envíen los correos de la cola.
+
+        Returns:
+            bool: True si la cola quedó vacía antes de `timeout`.
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        while self._cola.unfinished_tasks:
+            if limite is not None and time.monotonic() >= limite:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def cerrar(self, timeout: float = 30):
+        """
+        Envía los correos pendientes, detiene el hilo y cierra la conexión SMTP.
+        """
+        if self._hilo is None:
+            return
+        self._cola.put(None)
+        self._hilo.join(timeout)
+        if self._hilo.is_alive():
+            logger.warning("Quedaron %s correos sin enviar al cerrar el notificador.", self._cola.qsize())
+        self._hilo = None
+
+    def _iniciar_hilo(self):
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._trabajar, name='notificaciones', daemon=True)
+                self._hilo.start()
+
+    def _trabajar(self):
+        while True:
+            try:
+                elemento = self._cola.get(timeout=self.max_inactividad)
+            except queue.Empty:
+                self._cerrar_conexion()
+                continue
+            try:
+                if elemento is None:
+                    break
+                self._entregar(*elemento)
+            finally:
+                self._cola.task_done()
+        self._cerrar_conexion()
+
+    def _entregar(self, correo: EmailMessage, destinatarios: list):
+        for intento in range(self.reintentos + 1):
+            try:
+                self._conectar().send_message(correo, from_addr=self.remitente, to_addrs=destinatarios)
+                self.enviados += 1
+                logger.info("Correo '%s' enviado a %s destinatarios.", correo['Subject'], len(destinatarios))
+                return
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError) as e:
+                # La conexión se perdió (por ejemplo el servidor la cerró por inactividad): se reintenta con una nueva
+                self._cerrar_conexion(forzar=True)
+                error = e
+            except smtplib.SMTPException as e:
+                # SMTPException hereda de OSError, por eso se revisa antes: los rechazos del servidor (autenticación,
+                # destinatarios o contenido) no cambian al reintentar
+                error = e
+                break
+            except OSError as e:
+                # Errores de red (tiempo de espera, conexión rechazada): se reintenta con una nueva conexión
+                self._cerrar_conexion(forzar=True)
+                error = e
+        self.fallidos += 1
+        logger.error(f"Se produjo un error al enviar el correo '{correo['Subject']}': {error}")
+
+    def _conectar(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.servidor, self.puerto, timeout=self.timeout)
+            try:
+                if self.starttls:
+                    smtp.starttls()
+                if self.usuario:
+                    smtp.login(self.usuario, self.contrasena)
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+                raise
+            self._smtp = smtp
+            self.conexiones += 1
+        return self._smtp
+
+    def _cerrar_conexion(self, forzar: bool = False):
+        if self._smtp is None:
+            return
+        try:
+            if forzar:
+                self._smtp.close()
+            else:
+                self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+
+class ManejadorResumenErrores(logging.Handler):
+    """
+    Manejador de logging que agrega los mensajes al resumen de errores de un NotificadorCorreo.
+    """
+
+    def __init__(self, notificador: NotificadorCorreo, nivel: int = logging.ERROR):
+        super().__init__(nivel)
+        self.notificador = notificador
+
+    def emit(self, record: logging.LogRecord):
+        # Los errores del propio envío de correos no se agregan, ya que el resumen no se podría enviar
+        if record.threadName == 'notificaciones':
+            return
+        try:
+            self.notificador.registrar_error(record.getMessage())
+        except Exception:
+            self.handleError(record)
+
+
+_notificador = None
+_lock_notificador = threading.Lock()
+
+
+def obtener_notificador() -> NotificadorCorreo:
+    """
+    Devuelve el notificador del proceso configurado con las variables SMTP_* y CORREO_* del .env,
+    o None si no hay servidor SMTP configurado.
+
+    La primera vez se crea, se agrega su manejador al logger para acumular los errores en el
+    resumen y se registra su cierre al terminar el proceso, para enviar los correos pendientes.
+    """
+    global _notificador
+    configuracion = obtener_configuracion()
+    if not configuracion.SMTP_SERVIDOR:
+        return None
+    if _notificador is None:
+        with _lock_notificador:
+            if _notificador is None:
+                notificador = NotificadorCorreo(
+                    configuracion.SMTP_SERVIDOR, configuracion.SMTP_PUERTO, configuracion.CORREO_REMITENTE,
+                    Destinatarios.desde_texto(configuracion.CORREO_DESTINATARIOS), configuracion.SMTP_USUARIO,
+                    configuracion.SMTP_CONTRASENA, configuracion.SMTP_STARTTLS)
+                logger.addHandler(notificador.manejador_log())
+                atexit.register(notificador.cerrar)
+                _notificador = notificador
+    return _notificador
@@ -0,0 +1,346 @@
+# Importaciones de la biblioteca estándar de Python
+import os
+import time
+import json
+import random
+import inspect
+import threading
+import functools
+import contextvars
+from datetime import datetime
+
+# Importaciones propias
+from utils.logger import logger, obtener_carpeta_logs
+from utils.eventos_ejecucion import percentil
+
+# Modos de PERFILADO / --perfilar: tiempos por función, cProfile del hilo principal y asignaciones de memoria con tracemalloc
+MODO_TIEMPOS = 'tiempos'
+MODO_CPROFILE = 'cprofile'
+MODO_TRACEMALLOC = 'tracemalloc'
+MODOS_PERFILADO = (MODO_TIEMPOS, MODO_CPROFILE, MODO_TRACEMALLOC)
+
+# Duraciones que se conservan por función para calcular el p95 (muestreo aleatorio uniforme a partir de este número)
+MAX_MUESTRAS = 10000
+
+# Funciones y líneas que se escriben en los reportes de cProfile y tracemalloc
+LINEAS_REPORTE = 40
+
+# Con el perfilado desactivado los decoradores solo consultan esta variable antes de llamar a la función
+_activo = False
+_medicion_actual = contextvars.ContextVar('medicion_perfilado', default=None)
+_estadisticas = {}
+_lock = threading.Lock()
+_perfil_cprofile = None
+_tracemalloc_iniciado = False
+
+
+class EstadisticasFuncion:
+    """
+    Llamadas, errores, tiempo acumulado, bytes y una muestra de las duraciones de una función o bloque.
+    """
+    __slots__ = ('nombre', 'llamadas', 'errores', 'tiempo_total', 'tiempo_maximo', 'bytes', 'muestras', '_lock')
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.llamadas = 0
+        self.errores = 0
+        self.tiempo_total = 0.0
+        self.tiempo_maximo = 0.0
+        self.bytes = 0
+        self.muestras = []
+        self._lock = threading.Lock()
+
+    def agregar(self, duracion: float, bytes_medidos: int = 0, error: bool = False):
+        with self._lock:
+            self.llamadas += 1
+            self.errores += error
+            self.tiempo_total += duracion
+            self.tiempo_maximo = max(self.tiempo_maximo, duracion)
+            self.bytes += bytes_medidos
+            if len(self.muestras) < MAX_MUESTRAS:
+                self.muestras.append(duracion)
+            else:
+                # Muestreo de reservorio: cada duración tiene la misma probabilidad de quedar en la muestra
+                posicion = random.randrange(self.llamadas)
+                if posicion < MAX_MUESTRAS:
+                    self.muestras[posicion] = duracion
+
+    def resumen(self) -> dict:
+        with self._lock:
+            return {
+                'nombre': self.nombre,
+                'llamadas': self.llamadas,
+                'errores': self.errores,
+                'total_s': round(self.tiempo_total, 4),
+                'promedio_ms': round(self.tiempo_total / self.llamadas * 1000, 3) if self.llamadas else 0.0,
+                'p95_ms': round(percentil(self.muestras, 95) * 1000, 3),
+                'maximo_ms': round(self.tiempo_maximo * 1000, 3),
+                'bytes': self.bytes,
+            }
+
+
+class _Medicion:
+    """
+    Medición en curso de una llamada o bloque; `agregar_bytes` suma a la medición más interna.
+    """
+    __slots__ = ('estadisticas', 'inicio', 'bytes', '_token')
+
+    def __init__(self, estadisticas: EstadisticasFuncion):
+        self.estadisticas = estadisticas
+        self.bytes = 0
+
+    def agregar_bytes(self, cantidad: int):
+        self.bytes += cantidad or 0
+
+    def __enter__(self):
+        self._token = _medicion_actual.set(self)
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.estadisticas.agregar(time.perf_counter() - self.inicio, self.bytes, tipo is not None)
+        _medicion_actual.reset(self._token)
+        return False
+
+
+class _MedicionNula:
+    """
+    Bloque sin medición que se devuelve con el perfilado desactivado.
+    """
+    __slots__ = ()
+
+    def agregar_bytes(self, cantidad: int):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        return False
+
+
+_MEDICION_NULA = _MedicionNula()
+
+
+def _obtener_estadisticas(nombre: str) -> EstadisticasFuncion:
+    estadisticas = _estadisticas.get(nombre)
+    if estadisticas is None:
+        with _lock:
+            estadisticas = _estadisticas.setdefault(nombre, EstadisticasFuncion(nombre))
+    return estadisticas
+
+
+def esta_activo() -> bool:
+    return _activo
+
+
+def activar():
+    """Activa la medición de los decoradores y bloques (equivale al modo 'tiempos')."""
+    global _activo
+    _activo = True
+
+
+def desactivar():
+    global _activo
+    _activo = False
+
+
+def reiniciar():
+    """Elimina las estadísticas acumuladas."""
+    with _lock:
+        _estadisticas.clear()
+
+
+def medir(nombre: str):
+    """
+    Context manager que mide un bloque de código con el nombre indicado.
+
+    Ejemplo:
+        with medir('exportar_csv') as medicion:
+            df.to_csv(ruta)
+            medicion.agregar_bytes(os.path.getsize(ruta))
+    """
+    if not _activo:
+        return _MEDICION_NULA
+    return _Medicion(_obtener_estadisticas(nombre))
+
+
+def agregar_bytes(cantidad: int):
+    """
+    Suma bytes a la función o bloque medido más interno (por ejemplo el tamaño de una respuesta HTTP).
+    """
+    if _activo:
+        medicion = _medicion_actual.get()
+        if medicion is not None:
+            medicion.agregar_bytes(cantidad)
+
+
+def tamano_data_frame(data_frame) -> int:
+    """Bytes en memoria de un DataFrame resultado, para usar como `bytes_resultado` de perfilar."""
+    return int(data_frame.memory_usage(index=False).sum()) if data_frame is not None else 0
+
+
+def perfilar(funcion=None, *, nombre: str = None, bytes_resultado=None):
+    """
+    Decorador que registra las llamadas, el tiempo acumulado, el p95 y los bytes de una función (también async).
+
+    Con el perfilado desactivado solo agrega una consulta a una variable del módulo por llamada.
+
+    Args:
+        funcion (Callable): Función decorada, cuando se usa como @perfilar sin argumentos.
+        nombre (str, opcional): Nombre en el resumen, por defecto módulo.función.
+        bytes_resultado (Callable, opcional): Función que recibe el resultado y devuelve sus bytes (por ejemplo tamano_data_frame).
+
+    Ejemplo:
+        @perfilar(bytes_resultado=tamano_data_frame)
+        def ejecutar_consulta_pyodbc(conexion_sql_server, consulta): ...
+    """
+    if funcion is None:
+        return functools.partial(perfilar, nombre=nombre, bytes_resultado=bytes_resultado)
+
+    nombre = nombre or f'{funcion.__module__}.{funcion.__qualname__}'
+
+    if inspect.iscoroutinefunction(funcion):
+        @functools.wraps(funcion)
+        async def envoltura_async(*args, **kwargs):
+            if not _activo:
+                return await funcion(*args, **kwargs)
+            with _Medicion(_obtener_estadisticas(nombre)) as medicion:
+                resultado = await funcion(*args, **kwargs)
+                if bytes_resultado is not None:
+                    medicion.agregar_bytes(bytes_resultado(resultado))
+                return resultado
+        return envoltura_async
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if not _activo:
+            return funcion(*args, **kwargs)
+        with _Medicion(_obtener_estadisticas(nombre)) as medicion:
+            resultado = funcion(*args, **kwargs)
+            if bytes_resultado is not None:
+                medicion.agregar_bytes(bytes_resultado(resultado))
+            return resultado
+    return envoltura
+
+
+def resumen() -> list:
+    """
+    Devuelve las estadísticas de las funciones y bloques medidos, ordenadas por tiempo acumulado.
+    """
+    with _lock:
+        estadisticas = list(_estadisticas.values())
+    return sorted((estadistica.resumen() for estadistica in estadisticas), key=lambda fila: fila['total_s'], reverse=True)
+
+
+def interpretar_modos(valor) -> tuple:
+    """
+    Convierte el valor de PERFILADO o --perfilar ('tiempos,cprofile', 'true', '1', ...) en los modos activos.
+
+    Raises:
+        ValueError: Si algún modo no es válido.
+    """
+    if valor is None or str(valor).strip().lower() in ('', '0', 'false', 'no'):
+        return ()
+    if str(valor).strip().lower() in ('1', 'true', 'si', 'sí'):
+        return (MODO_TIEMPOS,)
+    modos = tuple(dict.fromkeys(modo.strip().lower() for modo in str(valor).split(',') if modo.strip()))
+    invalidos = [modo for modo in modos if modo not in MODOS_PERFILADO]
+    if invalidos:
+        raise ValueError(f"Modos de perfilado no válidos: {', '.join(invalidos)}. Use {', '.join(MODOS_PERFILADO)}.")
+    return modos
+
+
+def iniciar_perfilado(modos=None) -> tuple:
+    """
+    Activa el perfilado con los modos indicados o, si no se indican, con la variable PERFILADO del .env.
+
+    Los tiempos por función se activan siempre que haya algún modo; 'cprofile' perfila el hilo
+    principal y 'tracemalloc' registra las asignaciones de memoria (ambos agregan una sobrecarga
+    considerable y solo se deben usar para diagnosticar).
+
+    Returns:
+        tuple: Modos activados (vacío si el perfilado quedó desactivado).
+    """
+    global _perfil_cprofile, _tracemalloc_iniciado
+    if modos is None:
+        try:
+            from utils.configuracion import obtener_configuracion
+            modos = obtener_configuracion().PERFILADO
+        except Exception:
+            # Los errores de configuración los informa main al iniciar la ejecución
+            return ()
+    modos = interpretar_modos(modos) if isinstance(modos, str) or modos is None else tuple(modos)
+    if not modos:
+        return ()
+
+    activar()
+    if MODO_TRACEMALLOC in modos and not _tracemalloc_iniciado:
+        import tracemalloc
+        tracemalloc.start()
+        _tracemalloc_iniciado = True
+    if MODO_CPROFILE in modos and _perfil_cprofile is None:
+        import cProfile
+        _perfil_cprofile = cProfile.Profile()
+        _perfil_cprofile.enable()
+
+    logger.info("Perfilado activado: %s", ', '.join(modos))
+    return modos
+
+
+def finalizar_perfilado(carpeta: str = None) -> list:
+    """
+    Detiene el perfilado y escribe los reportes en la carpeta de logs.
+
+    Se escriben perfilado_<fecha>.json con el resumen por función y, si se activaron, perfil_<fecha>.prof
+    (se puede abrir con snakeviz o pstats) con su resumen perfil_<fecha>.txt y memoria_<fecha>.txt con las
+    líneas que más memoria asignaron.
+
+    Returns:
+        list: Rutas de los archivos escritos.
+    """
+    global _perfil_cprofile, _tracemalloc_iniciado
+    carpeta = str(carpeta or obtener_carpeta_logs())
+    os.makedirs(carpeta, exist_ok=True)
+    sufijo = datetime.now().strftime('%Y-%m-%d_%H%M%S')
+    archivos = []
+
+    if _perfil_cprofile is not None:
+        import pstats
+        _perfil_cprofile.disable()
+        ruta_prof = os.path.join(carpeta, f'perfil_{sufijo}.prof')
+        _perfil_cprofile.dump_stats(ruta_prof)
+        ruta_texto = os.path.join(carpeta, f'perfil_{sufijo}.txt')
+        with open(ruta_texto, 'w', encoding='utf-8') as archivo:
+            pstats.Stats(_perfil_cprofile, stream=archivo).sort_stats('cumulative').print_stats(LINEAS_REPORTE)
+        archivos += [ruta_prof, ruta_texto]
+        _perfil_cprofile = None
+
+    if _tracemalloc_iniciado:
+        import tracemalloc
+        captura = tracemalloc.take_snapshot()
+        actual, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        _tracemalloc_iniciado = False
+        ruta_memoria = os.path.join(carpeta, f'memoria_{sufijo}.txt')
+        with open(ruta_memoria, 'w', encoding='utf-8') as archivo:
+            archivo.write(f'Memoria asignada al finalizar: {actual / 1024 ** 2:.1f} MB, pico: {pico / 1024 ** 2:.1f} MB\n\n')
+            for estadistica in captura.statistics('lineno')[:LINEAS_REPORTE]:
+                archivo.write(f'{estadistica}\n')
+        archivos.append(ruta_memoria)
+
+    filas = resumen()
+    if filas:
+        ruta_resumen = os.path.join(carpeta, f'perfilado_{sufijo}.json')
+        with open(ruta_resumen, 'w', encoding='utf-8') as archivo:
+            json.dump(filas, archivo, ensure_ascii=False, indent=2)
+        archivos.append(ruta_resumen)
+        for fila in filas:
+            logger.info("Perfilado %s: %s llamadas, %s errores, total %.3fs, promedio %.1fms, p95 %.1fms, máximo %.1fms, %s bytes",
+                        fila['nombre'], fila['llamadas'], fila['errores'], fila['total_s'], fila['promedio_ms'],
+                        fila['p95_ms'], fila['maximo_ms'], fila['bytes'])
+
+    desactivar()
+    if archivos:
+        logger.info("Reportes de perfilado: %s", ', '.join(archivos))
+    return archivos
@@ -0,0 +1,188 @@
+# Importaciones de la biblioteca estándar de Python
+import threading
+
+# Importaciones de terceros
+import numpy as np
+import pandas as pd
+
+# Importaciones propias
+from utils.logger import logger
+
+# Valor de esquema con el que los tipos se eligen según los datos (ver `sugerir_esquema`)
+ESQUEMA_AUTOMATICO = 'auto'
+
+# Tipo de los textos que no se convierten en categoría: guarda los textos en un solo bloque de Arrow
+# en lugar de un objeto de Python por valor
+TIPO_TEXTO = 'string[pyarrow]'
+
+# Proporción máxima de valores distintos para guardar una columna de texto como categoría
+MAX_PROPORCION_CATEGORIAS = 0.5
+
+# Reducciones de memoria de la ejecución, una fila por columna convertida (ver `reporte_memoria`)
+_reducciones = []
+_lock_reducciones = threading.Lock()
+
+
+def sugerir_esquema(df: pd.DataFrame, max_proporcion_categorias: float = MAX_PROPORCION_CATEGORIAS) -> dict:
+    """
+    Propone tipos compactos para las columnas de un DataFrame según sus valores.
+
+    - Textos con pocos valores distintos (bodegas, estados, títulos repetidos por variante): 'category'.
+    - Demás textos (SKUs, correos, nombres): 'string[pyarrow]'.
+    - Enteros en el rango de int32: 'int32', o 'Int32'/'Int64' si vienen como object con nulos.
+    - Decimales que no pierden precisión en float32: 'float32'.
+
+    Las columnas que ya tienen un tipo compacto, las fechas, los booleanos y los números Decimal
+    (DECIMAL y money de SQL Server, que perderían precisión en float) no se incluyen.
+
+    Args:
+        df (pd.DataFrame): Datos a analizar.
+        max_proporcion_categorias (float): Proporción máxima de valores distintos para usar 'category'.
+
+    Returns:
+        dict: Tipo propuesto para cada columna, por ejemplo {'sku': 'string[pyarrow]', 'bodega': 'category'}.
+    """
+    esquema = {}
+    for columna in df.columns:
+        serie = df[columna]
+        tipo = None
+        if isinstance(serie.dtype, pd.StringDtype):
+            # Los textos que ya tienen un tipo de texto solo se cambian si conviene la categoría
+            if _tipo_texto(serie, max_proporcion_categorias) == 'category':
+                tipo = 'category'
+        elif pd.api.types.is_object_dtype(serie.dtype):
+            inferido = pd.api.types.infer_dtype(serie, skipna=True)
+            if inferido == 'string':
+                tipo = _tipo_texto(serie, max_proporcion_categorias)
+            elif inferido == 'integer':
+                try:
+                    enteros = serie.dropna().astype('int64')
+                except (OverflowError, ValueError, TypeError):
+                    # Enteros de Python que no caben en int64: la columna se deja como está
+                    enteros = None
+                if enteros is not None:
+                    tipo = 'Int32' if _cabe_en_int32(enteros) else 'Int64'
+        elif pd.api.types.is_integer_dtype(serie.dtype) and serie.dtype.itemsize > 4:
+            if _cabe_en_int32(serie):
+                tipo = 'int32' if isinstance(serie.dtype, np.dtype) else 'Int32'
+        elif serie.dtype == np.float64:
+            # Solo se reduce si todos los valores se conservan exactos en float32
+            valores = serie.to_numpy()
+            if np.array_equal(valores.astype(np.float32).astype(np.float64), valores, equal_nan=True):
+                tipo = 'float32'
+        if tipo is not None:
+            esquema[columna] = tipo
+    return esquema
+
+
+def aplicar_esquema(df: pd.DataFrame, esquema, nombre: str = None, reporte: bool = True) -> pd.DataFrame:
+    """
+    Convierte las columnas de un DataFrame a los tipos declarados para la consulta o el endpoint.
+
+    Una columna que no se puede convertir (por ejemplo un id con texto o un número fuera de rango
+    para int32) conserva su tipo y se registra una advertencia, para no detener el proceso por un
+    tipo mal declarado. Las columnas declaradas que no vienen en los datos se ignoran.
+
+    Args:
+        df (pd.DataFrame): Datos recién construidos.
+        esquema (dict o str): Tipo de cada columna ({'sku': 'string[pyarrow]', 'cantidad': 'Int32',
+            'bodega': 'category', 'precio': 'float32'}) o 'auto' para usar `sugerir_esquema`.
+        nombre (str, opcional): Nombre de la consulta o del endpoint en el log y en el reporte.
+        reporte (bool): Medir la memoria antes y después, registrarla en el log y en `reporte_memoria`.
+
+    Returns:
+        pd.DataFrame: DataFrame con las columnas convertidas.
+
+    Ejemplo:
+        df = aplicar_esquema(df, {'Id': 'int64', 'Bodega': 'category', 'Sku': 'string[pyarrow]'}, nombre='inventario')
+    """
+    if esquema == ESQUEMA_AUTOMATICO:
+        esquema = sugerir_esquema(df)
+    if not esquema or df.empty:
+        return df
+
+    nombre = nombre or 'data_frame'
+    columnas = {}
+    for columna, tipo in esquema.items():
+        if columna not in df.columns:
+            continue
+        try:
+            columnas[columna] = _convertir(df[columna], tipo)
+        except (ValueError, TypeError, OverflowError) as e:
+            logger.warning("No se pudo convertir la columna %s de %s a %s: %s", columna, nombre, tipo, e)
+    if not columnas:
+        return df
+
+    convertido = df.assign(**columnas)
+    if reporte:
+        _registrar_reduccion(nombre, df, convertido, list(columnas))
+    return convertido
+
+
+def reporte_memoria(reiniciar: bool = False) -> pd.DataFrame:
+    """
+    Devuelve la memoria ahorrada por `aplicar_esquema` en la ejecución, una fila por columna convertida.
+
+    Columnas: nombre, columna, tipo_anterior, tipo_nuevo, bytes_antes, bytes_despues y ahorro (proporción).
+
+    Args:
+        reiniciar (bool): Vaciar el reporte después de leerlo (por ejemplo al iniciar cada ejecución del programador).
+    """
+    with _lock_reducciones:
+        filas = list(_reducciones)
+        if reiniciar:
+            _reducciones.clear()
+    reporte = pd.DataFrame(filas, columns=['nombre', 'columna', 'tipo_anterior', 'tipo_nuevo', 'bytes_antes', 'bytes_despues'])
+    reporte['ahorro'] = 1 - reporte['bytes_despues'] / reporte['bytes_antes'].where(reporte['bytes_antes'] > 0)
+    return reporte
+
+
+def _tipo_texto(serie: pd.Series, max_proporcion_categorias: float) -> str:
+    no_nulos = serie.count()
+    if no_nulos and serie.nunique() <= no_nulos * max_proporcion_categorias:
+        return 'category'
+    return TIPO_TEXTO
+
+
+def _cabe_en_int32(serie: pd.Series) -> bool:
+    info = np.iinfo(np.int32)
+    return serie.empty or (serie.min() >= info.min and serie.max() <= info.max)
+
+
+def _convertir(serie: pd.Series, tipo: str) -> pd.Series:
+    if str(serie.dtype) == tipo:
+        return serie
+    if pd.api.types.is_object_dtype(serie.dtype) and tipo.startswith(('int', 'Int', 'float', 'Float')):
+        # Los números que llegan como object (Decimal de SQL Server, enteros con None) se convierten
+        # primero a número; un texto que no es número lanza ValueError
+        serie = pd.to_numeric(serie)
+    if tipo.startswith('int') and serie.dtype.kind == 'f':
+        # astype a int trunca los decimales y convierte NaN en un número inválido
+        if serie.isna().any() or not (serie % 1 == 0).all():
+            raise ValueError('la columna tiene nulos o decimales, use un tipo con nulos como Int32 o Int64')
+    if tipo.startswith(('int', 'Int', 'uint', 'UInt')) and serie.dtype.kind in 'iuf' and not serie.empty:
+        # astype de numpy no valida el rango: un número que no cabe en el tipo cambiaría de valor
+        info = np.iinfo(tipo.lower().split('[')[0])
+        if serie.min() < info.min or serie.max() > info.max:
+            raise OverflowError(f'hay valores fuera del rango de {tipo}')
+    return serie.astype(tipo)
+
+
+def _registrar_reduccion(nombre: str, antes: pd.DataFrame, despues: pd.DataFrame, columnas: list):
+    bytes_antes = antes[columnas].memory_usage(deep=True, index=False)
+    bytes_despues = despues[columnas].memory_usage(deep=True, index=False)
+    filas = [{
+        'nombre': nombre,
+        'columna': columna,
+        'tipo_anterior': str(antes[columna].dtype),
+        'tipo_nuevo': str(despues[columna].dtype),
+        'bytes_antes': int(bytes_antes[columna]),
+        'bytes_despues': int(bytes_despues[columna]),
+    } for columna in columnas]
+    with _lock_reducciones:
+        _reducciones.extend(filas)
+
+    total_antes, total_despues = int(bytes_antes.sum()), int(bytes_despues.sum())
+    logger.info("Tipos de %s: %s columnas convertidas, %.2f MB -> %.2f MB (%.0f%% menos).", nombre, len(columnas),
+                total_antes / (1024 * 1024), total_despues / (1024 * 1024),
+                100 * (1 - total_despues / total_antes) if total_antes else 0)
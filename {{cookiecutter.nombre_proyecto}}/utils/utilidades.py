@@ -5,6 +5,7 @@ import sys
 import time
 import json
 from datetime import datetime
+from itertools import chain
 from typing import Callable
 from email.message import EmailMessage
 import smtplib
@@ -19,33 +20,24 @@ from tqdm import tqdm
 # Imports propios
 from utils.bcolors import bcolors
 # from utils.variables_entorno import obj_variables_entorno
-from utils.logger import logger_info, logger_debug, logger_error
+from utils.logger import logger
+from utils.configuracion import ruta_recurso  # Se conserva el import desde utils.utilidades
+from utils.tipos_datos import aplicar_esquema, TIPO_TEXTO
 
 # Crear una instancia de variables_entorno
 # dot_env = obj_variables_entorno
 
+# Tipos de las columnas de las variantes de Shopify (ver utils/tipos_datos.py): el título se repite
+# en cada variante del producto y el inventory_item_id puede faltar
+TIPOS_VARIANTES_SHOPIFY = {
+    'id': 'int64',
+    'title': 'category',
+    'sku': TIPO_TEXTO,
+    'inventory_item_id': 'Int64',
+}
 
-def ruta_recurso(nombre_archivo: str):
-    """
-    Devuelve la ruta de un archivo cuando se ejecuta desde el código fuente o desde el .exe creado con pyinstaller.
-
-    Args:
-        nombre_archivo (str): El nombre del archivo cuya ruta se quiere obtener.
 
-    Returns:
-        str: La ruta completa del archivo.
-    """
-    # Verificar si el script se está ejecutando desde un ejecutable de PyInstaller
-    if getattr(sys, 'frozen', False):
-        # En este caso, sys._MEIPASS contiene la ruta a la carpeta temporal
-        base_path = sys._MEIPASS
-    else:
-        # Si no es un ejecutable de PyInstaller, obtener la ruta de la carpeta actual
-        base_path = os.path.abspath(".")
-    # Unir la ruta base con el nombre del archivo y devolverla
-    return os.path.join(base_path, nombre_archivo)
-
-def convert_list_to_data_frame(list_all_products: list) -> pd.DataFrame:
+def convert_list_to_data_frame(list_all_products: list, vectorizado: bool = True, esquema: dict = None) -> pd.DataFrame:
     """
     Convierte una lista de productos en un DataFrame de pandas.
 
@@ -53,11 +45,21 @@ def convert_list_to_data_frame(list_all_products: list) -> pd.DataFrame:
     sus variantes, incluyendo campos como 'id', 'title', 'sku' e 'inventory_item_id', 
     para convertirlos en un DataFrame de pandas.
 
+    Por defecto las columnas se construyen directamente con listas (sin crear un diccionario
+    por variante) y la validación de la estructura se hace por columnas. Si algún producto o
+    variante no tiene la estructura esperada se recorre la lista con el método iterativo,
+    que identifica el registro con el error.
+
     Parámetros
     ----------
     list_all_products : list
         Lista de productos obtenidos desde la API de Shopify. Cada producto debe ser 
         un diccionario con un campo 'variants', que es una lista de variantes.
+    vectorizado : bool, opcional
+        Si es False se usa el recorrido producto por producto y variante por variante.
+    esquema : dict, opcional
+        Tipos de las columnas, por ejemplo TIPOS_VARIANTES_SHOPIFY para reducir la memoria. Por defecto
+        se conservan los tipos que infiere pandas (itertuples() devuelve valores que acepta json.dumps()).
 
     Retorna
     -------
@@ -78,62 +80,114 @@ def convert_list_to_data_frame(list_all_products: list) -> pd.DataFrame:
     ]
     df = convert_list_to_data_frame(products)
     # Retorna un DataFrame con las columnas 'id', 'title', 'sku', 'inventory_item_id'
+    df = convert_list_to_data_frame(products, esquema=TIPOS_VARIANTES_SHOPIFY)
+    # Las mismas columnas con tipos compactos (category, string[pyarrow], Int64)
     """
     # Validar que la entrada es una lista
     if not isinstance(list_all_products, list):
-        logger_error.error("El parámetro list_all_products no es una lista.")
+        logger.error("El parámetro list_all_products no es una lista.")
         raise ValueError("Se esperaba una lista de productos.")
 
-    productos_data = []
-
     try:
-        # Recorrer todos los productos
-        for producto in list_all_products:
-            # Validar que cada producto tiene las claves 'id', 'title' y 'variants'
-            if 'id' not in producto or 'title' not in producto or 'variants' not in producto:
-                logger_error.error(f"Estructura de producto no válida: {producto}")
-                raise ValueError(f"Producto sin la estructura esperada: {producto}")
-            
-            product_id = producto['id']
-            title = producto['title']
-            producto_variantes = producto['variants']
-
-            # Validar que las variantes son una lista
-            if not isinstance(producto_variantes, list):
-                logger_error.error(f"Las variantes del producto {product_id} no son una lista.")
-                raise ValueError(f"Variantes del producto {product_id} no tienen la estructura esperada.")
-
-            # Recorrer todas las variantes del producto
-            for variante in producto_variantes:
-                # Validar que las variantes contienen 'sku' y 'inventory_item_id'
-                if 'sku' not in variante or 'inventory_item_id' not in variante:
-                    logger_error.error(f"Estructura de variante no válida: {variante}")
-                    raise ValueError(f"Variante sin la estructura esperada: {variante}")
-
-                sku = variante['sku']
-                inventory_item_id = variante['inventory_item_id']
-                
-                # Agregar los datos a la lista como un diccionario
-                productos_data.append({
-                    'id': product_id,
-                    'title': title,
-                    'sku': sku,
-                    'inventory_item_id': inventory_item_id
-                })
+        df = None
+        if vectorizado:
+            try:
+                df = _variantes_a_data_frame(list_all_products)
+            except (KeyError, TypeError):
+                # Estructura no válida: el recorrido iterativo identifica el producto o la variante con el error
+                df = None
         
-        # Convertir la lista de diccionarios a un DataFrame de pandas
-        df = pd.DataFrame(productos_data)
-        logger_info.info(f"Se convirtieron {len(df)} productos/variantes en un DataFrame.")
+        if df is None:
+            df = pd.DataFrame(_recorrer_variantes(list_all_products))
+        
+        if esquema is not None:
+            df = aplicar_esquema(df, esquema, nombre='variantes_shopify')
+        
+        logger.info("Se convirtieron %s productos/variantes en un DataFrame.", len(df))
         return df
 
     except ValueError as ve:
-        logger_error.error(f"Error en la conversión de productos a DataFrame: {ve}")
+        logger.error(f"Error en la conversión de productos a DataFrame: {ve}")
         raise
 
     except Exception as e:
-        logger_error.error(f"Error inesperado en convert_list_to_data_frame: {e}")
+        logger.error(f"Error inesperado en convert_list_to_data_frame: {e}")
         raise Exception(f"Ocurrió un error inesperado en convert_list_to_data_frame: {e}") from e
 
+def _variantes_a_data_frame(list_all_products: list) -> pd.DataFrame:
+    """
+    Construye el DataFrame de variantes columna por columna.
+
+    Las claves se acceden directamente, de modo que un producto o variante incompleto genera
+    KeyError (o TypeError si no es un diccionario) en lugar de validar cada clave con `in`.
+    """
+    variantes_por_producto = [producto['variants'] for producto in list_all_products]
+    if not all(type(variantes) is list for variantes in variantes_por_producto):
+        raise TypeError("Las variantes de un producto no son una lista.")
+    
+    cantidades = [len(variantes) for variantes in variantes_por_producto]
+    variantes = list(chain.from_iterable(variantes_por_producto))
+    
+    # El id y el título del producto se repiten una vez por cada una de sus variantes
+    ids = pd.Series([producto['id'] for producto in list_all_products]).repeat(cantidades)
+    titulos = pd.Series([producto['title'] for producto in list_all_products]).repeat(cantidades)
+    
+    df = pd.DataFrame({
+        'id': ids.to_numpy(),
+        'title': titulos.to_numpy(),
+        'sku': [variante['sku'] for variante in variantes],
+        'inventory_item_id': [variante['inventory_item_id'] for variante in variantes],
+    })
+    
+    # Validación por columnas: las variantes sin inventory_item_id no se pueden actualizar en Shopify
+    sin_inventory_item = int(df['inventory_item_id'].isna().sum())
+    if sin_inventory_item:
+        logger.warning("%s variantes no tienen inventory_item_id.", sin_inventory_item)
+    
+    return df
+
+def _recorrer_variantes(list_all_products: list) -> list:
+    """
+    Recorre producto por producto y variante por variante validando la estructura de cada uno.
+    """
+    productos_data = []
+
+    # Recorrer todos los productos
+    for producto in list_all_products:
+        # Validar que cada producto tiene las claves 'id', 'title' y 'variants'
+        if 'id' not in producto or 'title' not in producto or 'variants' not in producto:
+            logger.error(f"Estructura de producto no válida: {producto}")
+            raise ValueError(f"Producto sin la estructura esperada: {producto}")
+        
+        product_id = producto['id']
+        title = producto['title']
+        producto_variantes = producto['variants']
+
+        # Validar que las variantes son una lista
+        if not isinstance(producto_variantes, list):
+            logger.error(f"Las variantes del producto {product_id} no son una lista.")
+            raise ValueError(f"Variantes del producto {product_id} no tienen la estructura esperada.")
+
+        # Recorrer todas las variantes del producto
+        for variante in producto_variantes:
+            # Validar que las variantes contienen 'sku' y 'inventory_item_id'
+            if 'sku' not in variante or 'inventory_item_id' not in variante:
+                logger.error(f"Estructura de variante no válida: {variante}")
+                raise ValueError(f"Variante sin la estructura esperada: {variante}")
+
+            sku = variante['sku']
+            inventory_item_id = variante['inventory_item_id']
+            
+            # Agregar los datos a la lista como un diccionario
+            productos_data.append({
+                'id': product_id,
+                'title': title,
+                'sku': sku,
+                'inventory_item_id': inventory_item_id
+            })
+    
+    return productos_data
+
 def exportar_lista_a_csv(lista_informacion: list, nombre_archivo: str):
     """
         Exporta la información contenida en un DataFrame a un archivo CSV.
@@ -1,10 +1,9 @@
 # Imports de Python
-import os
-from decouple import Config, RepositoryEnv, UndefinedValueError
+from decouple import UndefinedValueError
 
 # Imports propios
-from utils.utilidades import ruta_recurso
-from utils.logger import logger_info, logger_debug, logger_error
+from utils.logger import logger
+from utils.configuracion import obtener_configuracion
 
 
 class VariablesEntorno:
@@ -34,23 +33,31 @@ class VariablesEntorno:
 
     def cargar_variables_entorno_local(self):
         try:
-            config = Config(RepositoryEnv(ruta_recurso('.env')))
+            # El .env se lee y se valida una sola vez por proceso en utils.configuracion
+            config = obtener_configuracion()
             
             # Cargar las variables de entorno
-            self.USUARIO_DB = config('USUARIO_DB')
-            self.CONTRASENA_DB = config('CONTRASENA_DB')
-            self.SERVIDOR_DB = config('SERVIDOR_DB')
-            self.INSTANCIA_DB = config('INSTANCIA_DB')
-            self.NOMBRE_DB = config('NOMBRE_DB')
-            self.NOMBRE_CARPETA_LOGS = config('NOMBRE_CARPETA_LOGS')
-
-            logger_info.info("Variables de entorno cargadas exitosamente")
-        except UndefinedValueError as e:
-            logger_error.error(f"Error al obtener una de las variables de entorno: {e}")
+            self.USUARIO_DB = config.USUARIO_DB
+            self.CONTRASENA_DB = config.CONTRASENA_DB
+            self.SERVIDOR_DB = config.SERVIDOR_DB
+            self.INSTANCIA_DB = config.INSTANCIA_DB
+            self.NOMBRE_DB = config.NOMBRE_DB
+            self.NOMBRE_CARPETA_LOGS = config.NOMBRE_CARPETA_LOGS
+
+            logger.info("Variables de entorno cargadas exitosamente")
+        except (UndefinedValueError, ValueError) as e:
+            logger.error(f"Error al obtener una de las variables de entorno: {e}")
             raise
 
-# Ejemplo de cómo acceder a las variables de entorno en otros archivos
-variables_entorno = VariablesEntorno()
 
-# Ahora en cualquier parte de tu código, puedes usar la instancia Singleton
-# Por ejemplo: variables_entorno.USUARIO_DB
+def __getattr__(nombre: str):
+    # Compatibilidad con el código que importa la instancia del módulo: se crea la primera vez que se usa,
+    # no al importar el módulo
+    if nombre == 'variables_entorno':
+        return VariablesEntorno()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+# Ejemplo de cómo acceder a las variables de entorno en otros archivos
+# (también se puede usar directamente utils.configuracion.obtener_configuracion()):
+# from utils.variables_entorno import variables_entorno
+# variables_entorno.USUARIO_DB